@@ -1,5 +1,6 @@
 # app.py (Página Principal)
 import streamlit as st
+from inicializacao import iniciar_aquecimento
 
 st.set_page_config(
     page_title="Agente LDR de IA",
@@ -7,6 +8,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# A página principal não usa pandas nem a IA: a thread carrega os módulos das estações enquanto o usuário lê
+iniciar_aquecimento()
+
 st.title("🤖 Agente LDR com Inteligência Artificial v2.0")
 st.write("Bem-vindo! Esta é a central de operações para qualificação e limpeza de leads.")
 st.write("---")
@@ -0,0 +1,478 @@
+# Benchmarks de desempenho das duas estações sobre dados sintéticos (ver `dados_sinteticos`) e IA simulada
+# (ver `ia_simulada`), com comparação contra uma referência gravada:
+#   python benchmark.py --linhas 1000 100000 --salvar-referencia
+#   python benchmark.py --linhas 1000 100000 --comparar
+# Também mede a partida de cada página (importação e primeira renderização em processos novos).
+# A referência só vale para a mesma máquina; grave-a de novo ao trocar de ambiente.
+import argparse
+import gc
+import hashlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from coleta_sites import LIMITE_CARACTERES_TEXTO
+from dados_sinteticos import gravar_csv_apollo
+from filtros_icp import compilar_filtro_icp, compilar_preclassificador
+from ia_simulada import BackendSimulado, modelo_simulado
+from ingestao import ler_csv
+from inicializacao import VARIAVEL_SEM_AQUECIMENTO
+from limpeza import MAPA_COLUNAS, funcoes_padronizacao, limpar_dataframe, padronizar_coluna, padronizar_nome_contato_vetorizado
+from localidades import carregar_localidades
+from metricas import Metricas
+from prompts import ORCAMENTO_PADRAO, SEM_ORCAMENTO
+from qualificacao import qualificar_dataframe
+from roteamento import Camada, MODELO_FORTE, Roteador, camadas_padrao
+
+LINHAS_PADRAO = [1_000, 100_000]
+ARQUIVO_REFERENCIA = 'benchmark_referencia.json'
+TOLERANCIA_PADRAO = 0.25  # variação aceita antes de apontar regressão
+SEGUNDOS_MINIMOS_COMPARACAO = 0.05  # abaixo disso o tempo é ruído e não é comparado
+ICP_BENCHMARK = {
+    'segmentos': "Serviços financeiros, Saúde, Varejo, E-commerce, Logística, Tecnologia, BPO",
+    'funcionarios': "acima de 50",
+    'observacoes': "Não pode ser do setor governamental",
+}
+# Resumo como os que o modelo devolvia sem teto de saída: marcação, frases longas e itens repetidos
+ICP_RESUMIDO_EXTENSO = '''**Resumo do Perfil de Cliente Ideal (ICP)**
+
+O cliente ideal é uma empresa de médio ou grande porte, com **mais de 50 funcionários**, que atua em um dos segmentos abaixo.
+
+* **Segmentos-alvo:** Serviços financeiros, Saúde, Varejo, E-commerce, Logística, Tecnologia e BPO (terceirização de processos de negócio).
+* **Porte:** acima de 50 funcionários.
+* **Exclusões:** empresas do setor governamental, órgãos públicos, autarquias e empresas de economia mista.
+* **Segmentos-alvo:** Serviços financeiros, Saúde, Varejo, E-commerce, Logística, Tecnologia e BPO (terceirização de processos de negócio).
+
+**Como usar este resumo nos próximos prompts:** classifique como dentro do ICP as empresas privadas dos segmentos-alvo,
+com porte compatível, e como fora do ICP as demais, em especial as do setor governamental.
+'''
+TOKENS_POR_MINUTO_BENCHMARK = 600_000  # cota TPM em escala de tempo reduzida, para o benchmark durar segundos
+DIRETORIO_APP = os.path.dirname(os.path.abspath(__file__))
+PAGINAS_PARTIDA = ['app.py', 'pages/_Limpeza_De_Dados.py', 'pages/_Analise_de_IPC.py']
+MODULOS_PESADOS = ('pandas', 'requests', 'google.generativeai', 'localidades')
+# Executado num processo novo por medição: 'importacao' importa os módulos que a página importa no topo;
+# 'renderizacao' renderiza a página (AppTest) duas vezes, fria e com os módulos já carregados
+SCRIPT_PARTIDA = '''
+import ast, importlib, json, sys, time
+pagina, modo = sys.argv[1], sys.argv[2]
+sys.path.insert(0, '.')
+resultado = {}
+if modo == 'importacao':
+    with open(pagina, encoding='utf-8') as arquivo:
+        arvore = ast.parse(arquivo.read())
+    modulos = [a.name for n in arvore.body if isinstance(n, ast.Import) for a in n.names]
+    modulos += [n.module for n in arvore.body if isinstance(n, ast.ImportFrom) and n.module and not n.level]
+    inicio = time.perf_counter()
+    for modulo in modulos:
+        importlib.import_module(modulo)
+    resultado['segundos'] = time.perf_counter() - inicio
+else:
+    from streamlit.testing.v1 import AppTest
+    app = AppTest.from_file(pagina, default_timeout=120)
+    inicio = time.perf_counter()
+    app.run()
+    resultado['segundos'] = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    app.run()
+    resultado['segundos_aquecida'] = time.perf_counter() - inicio
+    resultado['erros'] = len(app.exception)
+resultado['modulos_pesados'] = [m for m in %r if m in sys.modules]
+resultado['pico_memoria_mb'] = 0.0
+try:  # pico de RSS do próprio processo (Linux); em outros sistemas a memória não é medida
+    with open('/proc/self/status') as status:
+        resultado['pico_memoria_mb'] = next(int(l.split()[1]) for l in status if l.startswith('VmHWM')) / 1024
+except OSError:
+    pass
+print(json.dumps(resultado))
+''' % (MODULOS_PESADOS,)
+# Nome da função de `limpeza` aplicada a cada coluna (as colunas *_Empresa repetem as de contato)
+FUNCOES_POR_COLUNA = {
+    'Nome_Empresa': 'padronizar_nome_empresa',
+    'Site_Original': 'padronizar_site',
+    'Telefone_Original': 'padronizar_telefone',
+    'Segmento_Original': 'padronizar_segmento',
+    'Cidade_Contato': 'padronizar_localidade_geral[cidade]',
+    'Estado_Contato': 'padronizar_localidade_geral[estado]',
+    'Pais_Contato': 'padronizar_localidade_geral[pais]',
+}
+
+
+# --- MEDIÇÃO ---
+
+def assinatura(resultado):
+    """Hash curto do conteúdo de um DataFrame/Series, para notar mudanças de resultado entre versões."""
+    if isinstance(resultado, pd.Series):
+        resultado = resultado.to_frame()
+    if not isinstance(resultado, pd.DataFrame):
+        return None
+    texto = resultado.astype(object).where(resultado.notna(), '').astype(str)
+    return hashlib.sha256(pd.util.hash_pandas_object(texto, index=False).to_numpy().tobytes()).hexdigest()[:16]
+
+
+def medir(funcao, repeticoes=3):
+    """Tempo (mediana e mínimo de `repeticoes` execuções) e pico de memória numa execução à parte.
+
+    O pico vem do `tracemalloc` (objetos Python e arrays NumPy); buffers do Arrow não entram na conta.
+    """
+    tempos = []
+    resultado = None
+    for _ in range(repeticoes):
+        resultado = None
+        gc.collect()
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    del resultado
+    gc.collect()
+    tracemalloc.start()
+    try:
+        resultado = funcao()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return resultado, {
+        'segundos_mediana': round(statistics.median(tempos), 4),
+        'segundos_min': round(min(tempos), 4),
+        'pico_memoria_mb': round(pico / 1024 ** 2, 2),
+    }
+
+
+def _medir_processo_novo(pagina, modo):
+    ambiente_processo = {**os.environ, VARIAVEL_SEM_AQUECIMENTO: '1'}
+    saida = subprocess.run([sys.executable, '-c', SCRIPT_PARTIDA, pagina, modo], cwd=DIRETORIO_APP, env=ambiente_processo,
+                           capture_output=True, text=True, check=True)
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def medir_partida(pagina, repeticoes=3):
+    """Partida a frio de `pagina`: importação dos seus módulos e primeira renderização, cada uma em processos novos.
+
+    A thread de aquecimento fica desligada, para medir o pior caso (o usuário abre a página antes de ela
+    terminar). O pico de memória é o RSS máximo do processo de renderização (só no Linux).
+    """
+    importacoes = [_medir_processo_novo(pagina, 'importacao') for _ in range(repeticoes)]
+    renderizacoes = [_medir_processo_novo(pagina, 'renderizacao') for _ in range(repeticoes)]
+    tempos = [r['segundos'] for r in renderizacoes]
+    metricas = {
+        'segundos_mediana': round(statistics.median(tempos), 4),
+        'segundos_min': round(min(tempos), 4),
+        'pico_memoria_mb': round(max(r['pico_memoria_mb'] for r in renderizacoes), 2),
+    }
+    extras = {
+        'segundos_importacao': round(statistics.median(r['segundos'] for r in importacoes), 4),
+        'segundos_renderizacao_aquecida': round(statistics.median(r['segundos_aquecida'] for r in renderizacoes), 4),
+        'modulos_pesados_na_renderizacao': renderizacoes[-1]['modulos_pesados'],
+        'erros_renderizacao': renderizacoes[-1]['erros'],
+    }
+    return metricas, extras
+
+
+def ambiente():
+    return {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'plataforma': platform.platform(),
+        'nucleos': os.cpu_count(),
+    }
+
+
+# --- CASOS ---
+
+def casos_estacao1(caminho_csv, mapa_cidades, mapa_estados):
+    """(nome, função) de cada benchmark da Estação 1 sobre o CSV sintético."""
+    bruto = ler_csv(caminho_csv)
+    renomeado = bruto.rename(columns=MAPA_COLUNAS)
+    casos = [
+        ('ler_csv_flexivel', lambda: ler_csv(caminho_csv)),
+        ('padronizar_nome_contato', lambda: padronizar_nome_contato_vetorizado(renomeado)),
+    ]
+    funcoes = funcoes_padronizacao(mapa_cidades, mapa_estados)
+    for coluna, nome in FUNCOES_POR_COLUNA.items():
+        casos.append((nome, lambda coluna=coluna: padronizar_coluna(renomeado[coluna], funcoes[coluna])))
+    casos.append(('limpar_dataframe', lambda: limpar_dataframe(bruto, mapa_cidades, mapa_estados)))
+    casos.append(('limpar_dataframe[compactar]', lambda: limpar_dataframe(bruto, mapa_cidades, mapa_estados, compactar=True)))
+    return casos
+
+
+def executar_estacao2(leads_df, opcoes_ia, max_concorrencia=8, tamanho_lote=10, preclassificar=True):
+    """Filtro, pré-classificação e loop de IA (simulada) sobre uma cópia de `leads_df`; devolve (df, métricas)."""
+    df = leads_df.copy()
+    filtro_icp = compilar_filtro_icp(ICP_BENCHMARK['funcionarios'], ICP_BENCHMARK['observacoes'])
+    preclassificador = compilar_preclassificador(ICP_BENCHMARK['segmentos'], ICP_BENCHMARK['observacoes']) if preclassificar else None
+    with modelo_simulado(**opcoes_ia) as ia:
+        inicio = time.perf_counter()
+        plano = qualificar_dataframe(
+            df, "ICP simulado", filtro_icp, preclassificador=preclassificador,
+            max_concorrencia=max_concorrencia, requisicoes_por_minuto=1_000_000, tamanho_lote=tamanho_lote,
+        )
+        segundos = time.perf_counter() - inicio
+    empresas = len(plano['sites_por_empresa'])
+    return df, {
+        'empresas_ia': empresas,
+        'chamadas_evitadas': plano['chamadas_evitadas'],
+        'empresas_por_minuto': round(60 * empresas / segundos, 1) if segundos else None,
+        **ia.resumo(),
+    }
+
+
+def executar_estacao2_camadas(leads_df, opcoes_ia, max_concorrencia=8, tamanho_lote=10):
+    """Loop de IA em camadas sobre modelos simulados, comparado com o modelo forte sozinho; devolve (df, métricas).
+
+    O modelo rápido tem 40% da latência configurada, erra metade das empresas difíceis (20% do total, com
+    confiança baixa) e às vezes responde malformado; o forte tem o dobro da latência e acerta todas.
+    """
+    latencia = opcoes_ia.get('latencia', 0.05)
+    semente = opcoes_ia.get('semente', 0)
+    filtro_icp = compilar_filtro_icp(ICP_BENCHMARK['funcionarios'], ICP_BENCHMARK['observacoes'])
+    preclassificador = compilar_preclassificador(ICP_BENCHMARK['segmentos'], ICP_BENCHMARK['observacoes'])
+
+    def qualificar(camadas):
+        df = leads_df.copy()
+        roteador = Roteador(camadas)
+        inicio = time.perf_counter()
+        plano = qualificar_dataframe(
+            df, "ICP simulado", filtro_icp, preclassificador=preclassificador, roteador=roteador,
+            max_concorrencia=max_concorrencia, requisicoes_por_minuto=1_000_000, tamanho_lote=tamanho_lote,
+        )
+        return df, plano, roteador.estatisticas, time.perf_counter() - inicio
+
+    def acuracia(df, plano, backend):
+        empresas = plano['empresa_por_indice']
+        indices = empresas.index[empresas.isin(list(plano['sites_por_empresa']))]
+        if not len(indices):
+            return None
+        esperado = ['Dentro do ICP' if backend.configuracao.dentro_do_icp(plano['sites_por_empresa'][e]) else 'Fora do ICP' for e in empresas[indices]]
+        return round(float((df.loc[indices, 'classificacao_icp'].astype(str).to_numpy() == esperado).mean()), 4)
+
+    def backends():
+        rapido = BackendSimulado(latencia=0.4 * latencia, fracao_dificil=0.2, acerto_dificil=0.5, taxa_malformada=0.02, semente=semente)
+        forte = BackendSimulado(latencia=2 * latencia, fracao_dificil=0.2, confianca_dificil=0.85, semente=semente + 1)
+        return rapido, forte
+
+    rapido, forte = backends()
+    df, plano, camadas, segundos = qualificar(camadas_padrao(backend_rapido=rapido, backend_forte=forte))
+    _, forte_sozinho = backends()
+    df_forte, plano_forte, so_forte, segundos_forte = qualificar([Camada('forte', MODELO_FORTE, backend=forte_sozinho)])
+    empresas = len(plano['sites_por_empresa'])
+    return df, {
+        'empresas_ia': empresas,
+        'acuracia': acuracia(df, plano, rapido),
+        'acuracia_so_forte': acuracia(df_forte, plano_forte, forte_sozinho),
+        'custo_usd': round(camadas.custo_total(), 6),
+        'custo_so_forte_usd': round(so_forte.custo_total(), 6),
+        'segundos_por_empresa': round(segundos / empresas, 4) if empresas else None,
+        'segundos_por_empresa_so_forte': round(segundos_forte / empresas, 4) if empresas else None,
+        'camadas': camadas.resumo(),
+    }
+
+
+class _ColetorTextosSimulados:
+    """Como o `ColetorSites`, mas sem rede: cada site tem um texto do tamanho máximo da coleta."""
+
+    PARAGRAFO = ("Somos referência em soluções completas para empresas de todos os portes, com atendimento "
+                 "personalizado, equipe especializada e tecnologia de ponta. Conheça nossos serviços, cases e "
+                 "depoimentos de clientes, e fale com um consultor. ")
+
+    def textos(self, sites):
+        return {site: (f"{site} | " + self.PARAGRAFO * (LIMITE_CARACTERES_TEXTO // len(self.PARAGRAFO) + 1))[:LIMITE_CARACTERES_TEXTO]
+                for site in sites}
+
+
+def executar_estacao2_orcamento(leads_df, opcoes_ia, tokens_por_minuto=TOKENS_POR_MINUTO_BENCHMARK, max_concorrencia=8, tamanho_lote=10):
+    """Loop de IA com os textos dos sites e a cota de tokens por minuto, com e sem o orçamento dos prompts; devolve (df, métricas).
+
+    Sem orçamento, o prompt leva o resumo extenso do ICP e o texto inteiro de cada site, como antes.
+    """
+    filtro_icp = compilar_filtro_icp(ICP_BENCHMARK['funcionarios'], ICP_BENCHMARK['observacoes'])
+    preclassificador = compilar_preclassificador(ICP_BENCHMARK['segmentos'], ICP_BENCHMARK['observacoes'])
+
+    def qualificar(orcamento):
+        df = leads_df.copy()
+        metricas = Metricas()
+        with modelo_simulado(**opcoes_ia):
+            inicio = time.perf_counter()
+            plano = qualificar_dataframe(
+                df, ICP_RESUMIDO_EXTENSO, filtro_icp, preclassificador=preclassificador, metricas=metricas,
+                max_concorrencia=max_concorrencia, requisicoes_por_minuto=1_000_000, tokens_por_minuto=tokens_por_minuto,
+                tamanho_lote=tamanho_lote, coletor=_ColetorTextosSimulados(), orcamento=orcamento,
+            )
+            segundos = time.perf_counter() - inicio
+        empresas = len(plano['sites_por_empresa'])
+        tokens = metricas.quantidades()
+        return df, {
+            'empresas_por_minuto': round(60 * empresas / segundos, 1) if segundos else None,
+            'tokens_prompt_por_empresa': round(tokens['tokens.prompt_por_empresa']['media'], 1) if tokens else None,
+            'tokens_resposta_por_empresa': round(tokens['tokens.resposta_por_empresa']['media'], 1) if tokens else None,
+            'erros': metricas.contadores().get('ia.erros', 0),
+            'respostas_cortadas': metricas.contadores().get('ia.respostas_cortadas', 0),
+        }, empresas
+
+    df, com_orcamento, empresas = qualificar(ORCAMENTO_PADRAO)
+    df_sem, sem_orcamento, _ = qualificar(SEM_ORCAMENTO)
+    return df, {
+        'empresas_ia': empresas,
+        'tokens_por_minuto': tokens_por_minuto,
+        **com_orcamento,
+        **{f'{chave}_sem_orcamento': valor for chave, valor in sem_orcamento.items()},
+        'mesmos_veredictos': bool((df['classificacao_icp'].astype(str) == df_sem['classificacao_icp'].astype(str)).all()),
+    }
+
+
+def rodar(linhas_lista, semente=0, repeticoes=3, linhas_ia=2_000, opcoes_ia=None, apenas=None, estacao2=True,
+          diretorio=None, partida=True, emitir=print):
+    """Executa todos os benchmarks para cada tamanho em `linhas_lista` e devolve o relatório (dict serializável)."""
+    mapa_cidades, mapa_estados, _ = carregar_localidades()
+    opcoes_ia = opcoes_ia or {}
+    resultados = []
+
+    def selecionado(nome):
+        return not apenas or any(trecho in nome for trecho in apenas)
+
+    def registrar(nome, linhas, metricas, resultado=None, extras=None):
+        registro = {'benchmark': nome, 'linhas': linhas, **metricas, 'assinatura': assinatura(resultado), **(extras or {})}
+        segundos = registro['segundos_mediana']
+        registro['linhas_por_segundo'] = round(linhas / segundos) if segundos else None
+        resultados.append(registro)
+        emitir(f"{nome:<40} {linhas:>10,} linhas  {segundos:>9.4f} s  {registro['pico_memoria_mb']:>9.1f} MB")
+
+    if partida:
+        for pagina in PAGINAS_PARTIDA:
+            nome = f"partida[{os.path.basename(pagina)}]"
+            if selecionado(nome):
+                metricas, extras = medir_partida(pagina, repeticoes)
+                registrar(nome, 0, metricas, extras=extras)
+
+    with tempfile.TemporaryDirectory(dir=diretorio) as temporario:
+        for linhas in linhas_lista:
+            caminho = os.path.join(temporario, f"apollo_{linhas}.csv")
+            inicio = time.perf_counter()
+            gravar_csv_apollo(caminho, linhas, semente)
+            emitir(f"-- {linhas:,} linhas geradas em {time.perf_counter() - inicio:.1f} s ({os.path.getsize(caminho) / 1024 ** 2:.1f} MB)")
+            for nome, funcao in casos_estacao1(caminho, mapa_cidades, mapa_estados):
+                if not selecionado(nome):
+                    continue
+                resultado, metricas = medir(funcao, repeticoes)
+                registrar(nome, linhas, metricas, resultado)
+                del resultado
+
+            if estacao2 and selecionado('estacao2[qualificacao]'):
+                limpo = limpar_dataframe(ler_csv(caminho), mapa_cidades, mapa_estados, compactar=True).head(linhas_ia)
+                extras = {}
+
+                def estacao2_uma_vez():
+                    df, metricas_ia = executar_estacao2(limpo, opcoes_ia)
+                    extras.update(metricas_ia)
+                    return df
+
+                resultado, metricas = medir(estacao2_uma_vez, repeticoes=1)
+                registrar('estacao2[qualificacao]', len(limpo), metricas, resultado, extras)
+
+            if estacao2 and selecionado('estacao2[camadas]'):
+                limpo = limpar_dataframe(ler_csv(caminho), mapa_cidades, mapa_estados, compactar=True).head(linhas_ia)
+                extras = {}
+
+                def camadas_uma_vez():
+                    df, metricas_ia = executar_estacao2_camadas(limpo, opcoes_ia)
+                    extras.update(metricas_ia)
+                    return df
+
+                resultado, metricas = medir(camadas_uma_vez, repeticoes=1)
+                registrar('estacao2[camadas]', len(limpo), metricas, resultado, extras)
+                emitir(f"   acurácia {extras['acuracia']} (só o forte: {extras['acuracia_so_forte']}), "
+                       f"custo US$ {extras['custo_usd']} (só o forte: {extras['custo_so_forte_usd']})")
+
+            if estacao2 and selecionado('estacao2[orcamento]'):
+                limpo = limpar_dataframe(ler_csv(caminho), mapa_cidades, mapa_estados, compactar=True).head(linhas_ia)
+                extras = {}
+
+                def orcamento_uma_vez():
+                    df, metricas_ia = executar_estacao2_orcamento(limpo, opcoes_ia)
+                    extras.update(metricas_ia)
+                    return df
+
+                resultado, metricas = medir(orcamento_uma_vez, repeticoes=1)
+                registrar('estacao2[orcamento]', len(limpo), metricas, resultado, extras)
+                emitir(f"   {extras['empresas_por_minuto']} empresas/min com {extras['tokens_prompt_por_empresa']} tokens de prompt por empresa "
+                       f"(sem orçamento: {extras['empresas_por_minuto_sem_orcamento']} com {extras['tokens_prompt_por_empresa_sem_orcamento']})")
+            os.remove(caminho)
+    return {'ambiente': ambiente(), 'semente': semente, 'opcoes_ia': opcoes_ia, 'resultados': resultados}
+
+
+# --- COMPARAÇÃO COM A REFERÊNCIA ---
+
+def comparar(relatorio, referencia, tolerancia=TOLERANCIA_PADRAO):
+    """Lista as regressões de tempo, memória ou resultado em relação à `referencia` (mesmo benchmark e tamanho)."""
+    anteriores = {(r['benchmark'], r['linhas']): r for r in referencia['resultados']}
+    regressoes = []
+    for atual in relatorio['resultados']:
+        anterior = anteriores.get((atual['benchmark'], atual['linhas']))
+        if anterior is None:
+            continue
+        if (atual['segundos_mediana'] >= SEGUNDOS_MINIMOS_COMPARACAO
+                and atual['segundos_mediana'] > anterior['segundos_mediana'] * (1 + tolerancia)):
+            regressoes.append({**_chave(atual), 'tipo': 'tempo', 'antes': anterior['segundos_mediana'], 'agora': atual['segundos_mediana']})
+        if atual['pico_memoria_mb'] > max(anterior['pico_memoria_mb'] * (1 + tolerancia), anterior['pico_memoria_mb'] + 1):
+            regressoes.append({**_chave(atual), 'tipo': 'memoria', 'antes': anterior['pico_memoria_mb'], 'agora': atual['pico_memoria_mb']})
+        if anterior.get('assinatura') and atual.get('assinatura') and anterior['assinatura'] != atual['assinatura']:
+            regressoes.append({**_chave(atual), 'tipo': 'resultado', 'antes': anterior['assinatura'], 'agora': atual['assinatura']})
+    return regressoes
+
+
+def _chave(registro):
+    return {'benchmark': registro['benchmark'], 'linhas': registro['linhas']}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de desempenho do Agente LDR com dados sintéticos.")
+    parser.add_argument('--linhas', type=int, nargs='+', default=LINHAS_PADRAO, help="tamanhos a medir, de 1000 a 5000000 (padrão: %(default)s)")
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--repeticoes', type=int, default=3, help="execuções cronometradas por benchmark (padrão: %(default)s)")
+    parser.add_argument('--apenas', nargs='+', help="só os benchmarks cujo nome contém um destes trechos (ex.: telefone estacao2)")
+    parser.add_argument('--sem-estacao2', action='store_true', help="não mede o loop de qualificação")
+    parser.add_argument('--sem-partida', action='store_true', help="não mede a importação e a primeira renderização das páginas")
+    parser.add_argument('--linhas-ia', type=int, default=2_000, help="linhas limpas usadas no loop de IA (padrão: %(default)s)")
+    parser.add_argument('--latencia', type=float, default=0.05, help="segundos por chamada à IA simulada (padrão: %(default)s)")
+    parser.add_argument('--taxa-erro', type=float, default=0.0, help="fração de chamadas com erro não transitório")
+    parser.add_argument('--taxa-429', type=float, default=0.0, help="fração de chamadas recusadas por cota (429)")
+    parser.add_argument('--saida', help="grava o relatório completo em JSON")
+    parser.add_argument('--salvar-referencia', nargs='?', const=ARQUIVO_REFERENCIA, help="grava o relatório como referência")
+    parser.add_argument('--comparar', nargs='?', const=ARQUIVO_REFERENCIA, help="compara com a referência; sai com código 1 se houver regressão")
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA_PADRAO, help="variação aceita (padrão: %(default)s)")
+    args = parser.parse_args(argv)
+
+    opcoes_ia = {'latencia': args.latencia, 'variacao': args.latencia / 2, 'taxa_erro': args.taxa_erro,
+                 'taxa_429': args.taxa_429, 'semente': args.semente}
+    relatorio = rodar(args.linhas, args.semente, args.repeticoes, args.linhas_ia, opcoes_ia, args.apenas, not args.sem_estacao2,
+                     partida=not args.sem_partida)
+
+    for caminho in filter(None, (args.saida, args.salvar_referencia)):
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+        print(f"Relatório gravado em {caminho}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as arquivo:
+            referencia = json.load(arquivo)
+        if referencia.get('ambiente') != relatorio['ambiente']:
+            print("Aviso: a referência foi gravada em outro ambiente; diferenças de tempo podem não ser regressões.")
+        regressoes = comparar(relatorio, referencia, args.tolerancia)
+        for r in regressoes:
+            print(f"REGRESSÃO ({r['tipo']}) {r['benchmark']} [{r['linhas']:,} linhas]: {r['antes']} -> {r['agora']}")
+        if regressoes:
+            return 1
+        print(f"Sem regressões em relação a {args.comparar} (tolerância de {args.tolerancia:.0%}).")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
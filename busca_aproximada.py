@@ -0,0 +1,158 @@
+# Correspondência aproximada (erros de digitação e variações) com índice invertido de trigramas.
+import threading
+from collections import defaultdict
+
+import numpy as np
+
+LIMIAR_PADRAO = 0.85
+CANDIDATOS_POR_BUSCA = 5
+TAMANHO_MAXIMO_MEMO = 200_000
+
+
+def trigramas(texto):
+    """Conjunto de trigramas do texto, com espaços nas bordas para valorizar início e fim das palavras."""
+    texto = f"  {' '.join(texto.split())} "
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+def similaridade_edicao(a, b, minimo=0.0):
+    """1 - distância de edição (com transposição de vizinhos) / tamanho da maior string.
+
+    Só a faixa da matriz compatível com `minimo` é calculada; abaixo dele o resultado é 0.
+    """
+    if a == b:
+        return 1.0
+    maior = max(len(a), len(b))
+    limite = int((1 - minimo) * maior)  # máximo de edições admitido
+    if not a or not b or abs(len(a) - len(b)) > limite:
+        return 0.0
+    fora = limite + 1
+    anterior2, anterior = None, [j if j <= limite else fora for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        atual = [i if i <= limite else fora] + [fora] * len(b)
+        for j in range(max(1, i - limite), min(len(b), i + limite) + 1):
+            custo = a[i - 1] != b[j - 1]
+            valor = min(anterior[j] + 1, atual[j - 1] + 1, anterior[j - 1] + custo)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                valor = min(valor, anterior2[j - 2] + 1)
+            atual[j] = valor
+        if min(atual) > limite:
+            return 0.0
+        anterior2, anterior = anterior, atual
+    distancia = anterior[len(b)]
+    return 1 - distancia / maior if distancia <= limite else 0.0
+
+
+class IndiceTrigramas:
+    """Índice invertido trigrama -> chaves: a busca nunca percorre todas as chaves, só as que compartilham trigramas."""
+
+    def __init__(self, chaves):
+        self.chaves = list(chaves)
+        postings = defaultdict(list)
+        tamanhos = []
+        for posicao, chave in enumerate(self.chaves):
+            grams = trigramas(chave)
+            tamanhos.append(len(grams))
+            for gram in grams:
+                postings[gram].append(posicao)
+        self._tamanhos = np.asarray(tamanhos, dtype=np.float64)
+        self._comprimentos = np.asarray([len(chave) for chave in self.chaves])
+        self._postings = {gram: np.asarray(posicoes, dtype=np.int32) for gram, posicoes in postings.items()}
+
+    def buscar(self, consulta, limiar=LIMIAR_PADRAO):
+        """Retorna `(chave, similaridade)` da chave mais parecida ou `(None, melhor_similaridade)`.
+
+        O índice seleciona as chaves com mais trigramas em comum (coeficiente de Dice) e só
+        essas são comparadas por distância de edição, que tolera letras trocadas de lugar.
+        Empates entre chaves diferentes no topo são tratados como ambíguos.
+        """
+        grams = trigramas(consulta)
+        listas = [self._postings[gram] for gram in grams if gram in self._postings]
+        if not listas:
+            return None, 0.0
+        comuns = np.bincount(np.concatenate(listas), minlength=len(self.chaves))
+        dice = 2 * comuns / (len(grams) + self._tamanhos)
+        # Chaves cujo tamanho já impede atingir o limiar não disputam a etapa de edição
+        max_edicoes = (1 - limiar) * len(consulta) / limiar
+        dice[np.abs(self._comprimentos - len(consulta)) > max_edicoes] = 0
+        quantidade = min(CANDIDATOS_POR_BUSCA, len(dice))
+        candidatos = np.argpartition(-dice, quantidade - 1)[:quantidade]
+
+        melhor, melhor_nota, empate = None, 0.0, False
+        for posicao in candidatos[dice[candidatos] > 0]:
+            nota = similaridade_edicao(consulta, self.chaves[posicao], limiar)
+            if nota > melhor_nota:
+                melhor, melhor_nota, empate = posicao, nota, False
+            elif nota == melhor_nota:
+                empate = True
+        if melhor is None or empate or melhor_nota < limiar:
+            return None, melhor_nota
+        return self.chaves[melhor], melhor_nota
+
+
+class MapaAproximado(dict):
+    """Dicionário de padronização cujo `get` recorre a uma busca aproximada quando a chave exata não existe.
+
+    `preparar` normaliza variações conhecidas (sufixo de UF, '&' x 'and') antes da busca.
+    Chaves de até `tamanho_chave_curta` caracteres usam `limiar_chaves_curtas`, quando definido: nelas uma
+    única letra diferente já separa nomes distintos (ex.: 'atlanta' e 'atalanta').
+    Resultados são memorizados por valor de entrada, então cada valor distinto é resolvido uma vez.
+    O índice é construído só na primeira chave não encontrada e não é serializado (pickle).
+    """
+
+    def __init__(self, mapa, limiar=LIMIAR_PADRAO, preparar=None, tamanho_minimo=4, limiar_chaves_curtas=None, tamanho_chave_curta=8):
+        super().__init__(mapa)
+        self.limiar = limiar
+        self.preparar = preparar
+        self.tamanho_minimo = tamanho_minimo
+        self.limiar_chaves_curtas = limiar_chaves_curtas
+        self.tamanho_chave_curta = tamanho_chave_curta
+        self._memo = {}
+        self._preparados = None
+        self._indice = None
+        self._trava = threading.Lock()
+
+    def __getstate__(self):
+        return {'limiar': self.limiar, 'preparar': self.preparar, 'tamanho_minimo': self.tamanho_minimo,
+                'limiar_chaves_curtas': self.limiar_chaves_curtas, 'tamanho_chave_curta': self.tamanho_chave_curta}
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._memo, self._preparados, self._indice, self._trava = {}, None, None, threading.Lock()
+
+    def _preparar(self, chave):
+        return self.preparar(chave) if self.preparar else chave
+
+    def _construir_indice(self):
+        with self._trava:
+            if self._indice is None:
+                preparados = {}
+                for chave, valor in self.items():
+                    preparados.setdefault(self._preparar(chave), valor)
+                self._preparados = preparados
+                self._indice = IndiceTrigramas(preparados)
+
+    def resolver(self, chave):
+        """Valor padronizado para `chave` (exato, preparado ou aproximado) ou None."""
+        if dict.__contains__(self, chave):
+            return dict.__getitem__(self, chave)
+        if chave in self._memo:
+            return self._memo[chave]
+        if self._indice is None:
+            self._construir_indice()
+        chave_preparada = self._preparar(chave)
+        valor = self._preparados.get(chave_preparada)
+        if valor is None and len(chave_preparada) >= self.tamanho_minimo:
+            limiar = self.limiar
+            if self.limiar_chaves_curtas is not None and len(chave_preparada) <= self.tamanho_chave_curta:
+                limiar = max(limiar, self.limiar_chaves_curtas)
+            encontrada, _ = self._indice.buscar(chave_preparada, limiar)
+            valor = self._preparados[encontrada] if encontrada is not None else None
+        if len(self._memo) >= TAMANHO_MAXIMO_MEMO:
+            self._memo.clear()
+        self._memo[chave] = valor
+        return valor
+
+    def get(self, chave, padrao=None):
+        valor = self.resolver(chave)
+        return padrao if valor is None else valor
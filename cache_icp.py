@@ -0,0 +1,101 @@
+# Cache persistente (SQLite) dos resumos de ICP e dos veredictos da IA por empresa.
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DIRETORIO_CACHE = os.environ.get('AGENTE_LDR_CACHE_DIR', '.cache_agente_ldr')
+TTL_PADRAO_SEGUNDOS = 30 * 24 * 3600
+MAX_ENTRADAS_PADRAO = 200_000
+
+
+def gerar_hash(texto):
+    """Hash estável (SHA-256) usado como chave de cache para textos longos."""
+    return hashlib.sha256(str(texto).strip().encode('utf-8')).hexdigest()
+
+
+class CacheICP:
+    """Cache em disco com expiração (TTL) e descarte por tamanho (remove os menos acessados)."""
+
+    TABELAS = ('resumos', 'veredictos')
+
+    def __init__(self, caminho=None, ttl_segundos=TTL_PADRAO_SEGUNDOS, max_entradas=MAX_ENTRADAS_PADRAO):
+        if caminho is None:
+            os.makedirs(DIRETORIO_CACHE, exist_ok=True)
+            caminho = os.path.join(DIRETORIO_CACHE, 'cache_icp.sqlite3')
+        self.ttl_segundos = ttl_segundos
+        self.max_entradas = max_entradas
+        self.acertos = 0
+        self.falhas = 0
+        self._trava = threading.Lock()
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False, timeout=30)
+        with self._conexao:
+            for tabela in self.TABELAS:
+                self._conexao.execute(
+                    f"CREATE TABLE IF NOT EXISTS {tabela} ("
+                    "chave TEXT PRIMARY KEY, valor TEXT NOT NULL, criado_em REAL NOT NULL, acessado_em REAL NOT NULL)"
+                )
+                self._conexao.execute(f"CREATE INDEX IF NOT EXISTS idx_{tabela}_acesso ON {tabela} (acessado_em)")
+        self.descartar_excedentes()
+
+    # --- Operações genéricas ---
+
+    def _obter(self, tabela, chave):
+        agora = time.time()
+        with self._trava:
+            linha = self._conexao.execute(
+                f"SELECT valor, criado_em FROM {tabela} WHERE chave = ?", (chave,)
+            ).fetchone()
+            if linha is None or agora - linha[1] > self.ttl_segundos:
+                self.falhas += 1
+                return None
+            with self._conexao:
+                self._conexao.execute(f"UPDATE {tabela} SET acessado_em = ? WHERE chave = ?", (agora, chave))
+            self.acertos += 1
+            return json.loads(linha[0])
+
+    def _salvar(self, tabela, chave, valor):
+        agora = time.time()
+        with self._trava, self._conexao:
+            self._conexao.execute(
+                f"INSERT OR REPLACE INTO {tabela} (chave, valor, criado_em, acessado_em) VALUES (?, ?, ?, ?)",
+                (chave, json.dumps(valor, ensure_ascii=False), agora, agora),
+            )
+
+    def descartar_excedentes(self):
+        """Remove entradas expiradas e, acima de `max_entradas`, as acessadas há mais tempo."""
+        limite = time.time() - self.ttl_segundos
+        with self._trava, self._conexao:
+            for tabela in self.TABELAS:
+                self._conexao.execute(f"DELETE FROM {tabela} WHERE criado_em < ?", (limite,))
+                self._conexao.execute(
+                    f"DELETE FROM {tabela} WHERE chave IN ("
+                    f"SELECT chave FROM {tabela} ORDER BY acessado_em DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entradas,),
+                )
+
+    # --- Resumos de ICP ---
+
+    def obter_resumo(self, criterios_icp_texto):
+        return self._obter('resumos', gerar_hash(criterios_icp_texto))
+
+    def salvar_resumo(self, criterios_icp_texto, resumo):
+        self._salvar('resumos', gerar_hash(criterios_icp_texto), resumo)
+
+    # --- Veredictos por empresa ---
+
+    @staticmethod
+    def chave_veredito(dominio, icp_resumido, modelo):
+        return f"{dominio}|{gerar_hash(icp_resumido)}|{modelo}"
+
+    def obter_veredito(self, dominio, icp_resumido, modelo):
+        return self._obter('veredictos', self.chave_veredito(dominio, icp_resumido, modelo))
+
+    def salvar_veredito(self, dominio, icp_resumido, modelo, analise):
+        self._salvar('veredictos', self.chave_veredito(dominio, icp_resumido, modelo), analise)
+
+    def fechar(self):
+        self.descartar_excedentes()
+        self._conexao.close()
@@ -0,0 +1,302 @@
+# Coleta dos sites das empresas antes da IA: download concorrente com pool de conexões, robots.txt,
+# cache HTTP em disco (ETag / Last-Modified) e extração do texto visível, que vai ao modelo no lugar da URL.
+# Os sites vêm da planilha de leads: cada salto de redirecionamento passa pelo robots.txt e só vai a hosts públicos.
+import ipaddress
+import json
+import os
+import re
+import socket
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+from urllib.robotparser import RobotFileParser
+
+from cache_icp import DIRETORIO_CACHE
+from inicializacao import sob_demanda
+
+requests = sob_demanda('requests')
+
+AGENTE_USUARIO = "AgenteLDR/1.0 (qualificacao de leads B2B)"
+TIMEOUT_SEGUNDOS = (3.05, 10)  # (conexão, leitura)
+CONEXOES_POR_HOST = 2
+MAX_REDIRECIONAMENTOS = 5
+MAX_BYTES_PAGINA = 2 * 1024 * 1024
+LIMITE_CARACTERES_TEXTO = 3000
+VALIDADE_CACHE_SEGUNDOS = 7 * 24 * 3600  # dentro deste prazo nem a revalidação é feita
+
+TAGS_IGNORADAS = {'script', 'style', 'noscript', 'svg', 'template', 'iframe', 'head'}
+PADRAO_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.IGNORECASE)
+
+
+# --- EXTRAÇÃO DE TEXTO ---
+
+class _ExtratorTexto(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.titulo = ''
+        self.descricao = ''
+        self.partes = []
+        self._ignorando = 0
+        self._no_titulo = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'title':
+            self._no_titulo = True
+        elif tag == 'meta':
+            atributos = dict(attrs)
+            if (atributos.get('name') or atributos.get('property') or '').lower() in ('description', 'og:description'):
+                self.descricao = self.descricao or (atributos.get('content') or '')
+        elif tag in TAGS_IGNORADAS:
+            self._ignorando += 1
+
+    def handle_endtag(self, tag):
+        if tag == 'title':
+            self._no_titulo = False
+        elif tag in TAGS_IGNORADAS and self._ignorando:
+            self._ignorando -= 1
+
+    def handle_data(self, data):
+        if self._no_titulo:
+            self.titulo += data
+        elif not self._ignorando and data.strip():
+            self.partes.append(data)
+
+
+def extrair_texto(html, limite=LIMITE_CARACTERES_TEXTO):
+    """Título, descrição e texto visível da página, com espaços normalizados e cortado em `limite` caracteres."""
+    extrator = _ExtratorTexto()
+    try:
+        extrator.feed(html)
+        extrator.close()
+    except Exception:
+        pass  # HTML malformado: fica o que foi extraído até o erro
+    texto = ' '.join(p for p in (extrator.titulo, extrator.descricao, ' '.join(extrator.partes)) if p)
+    texto = ' '.join(texto.split())
+    if len(texto) > limite:
+        texto = texto[:limite].rsplit(' ', 1)[0]
+    return texto
+
+
+def _decodificar(conteudo, content_type):
+    charset = requests.utils.get_encoding_from_headers({'content-type': content_type}) if 'charset' in content_type.lower() else None
+    if not charset:
+        encontrado = PADRAO_CHARSET.search(conteudo[:4096])
+        charset = encontrado.group(1).decode('ascii') if encontrado else 'utf-8'
+    try:
+        return conteudo.decode(charset, errors='replace')
+    except LookupError:
+        return conteudo.decode('utf-8', errors='replace')
+
+
+def normalizar_url(site):
+    """'www.empresa.com.br' -> 'https://www.empresa.com.br/'; URLs com esquema são mantidas."""
+    site = str(site).strip()
+    if not re.match(r'^[a-z][a-z0-9+.-]*://', site, re.IGNORECASE):
+        site = 'https://' + site
+    return site if urlsplit(site).path else site + '/'
+
+
+class BloqueadoRobots(Exception):
+    pass
+
+
+class EnderecoNaoPermitido(Exception):
+    pass
+
+
+def host_publico(host):
+    """False se `host` resolve para loopback, rede privada, link-local ou outro endereço não roteável na internet.
+
+    Um host que não resolve passa: a própria requisição falha depois, com o erro de conexão.
+    """
+    try:
+        enderecos = {info[4][0] for info in socket.getaddrinfo(host, None)}
+    except (socket.gaierror, UnicodeError):
+        return True
+    for endereco in enderecos:
+        ip = ipaddress.ip_address(endereco.split('%')[0])
+        ip = getattr(ip, 'ipv4_mapped', None) or ip
+        if not ip.is_global or ip.is_multicast:
+            return False
+    return True
+
+
+# --- CACHE HTTP EM DISCO ---
+
+class CacheHTTP:
+    """Texto extraído por URL, com os validadores (ETag / Last-Modified) para requisições condicionais."""
+
+    def __init__(self, caminho=None):
+        if caminho is None:
+            os.makedirs(DIRETORIO_CACHE, exist_ok=True)
+            caminho = os.path.join(DIRETORIO_CACHE, 'paginas.sqlite3')
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False, timeout=30)
+        self._trava = threading.Lock()
+        with self._trava, self._conexao:
+            self._conexao.execute(
+                "CREATE TABLE IF NOT EXISTS paginas (url TEXT PRIMARY KEY, dados TEXT NOT NULL, obtido_em REAL NOT NULL)"
+            )
+
+    def obter(self, url):
+        with self._trava:
+            linha = self._conexao.execute("SELECT dados, obtido_em FROM paginas WHERE url = ?", (url,)).fetchone()
+        return (json.loads(linha[0]), linha[1]) if linha else (None, None)
+
+    def salvar(self, url, dados):
+        with self._trava, self._conexao:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO paginas (url, dados, obtido_em) VALUES (?, ?, ?)",
+                (url, json.dumps(dados, ensure_ascii=False), time.time()),
+            )
+
+    def fechar(self):
+        self._conexao.close()
+
+
+# --- COLETOR ---
+
+class ColetorSites:
+    """Baixa as páginas iniciais das empresas com uma `requests.Session` compartilhada.
+
+    O pool de conexões bloqueia em `conexoes_por_host` conexões simultâneas por host, então vários
+    contatos do mesmo domínio (ou subdomínios no mesmo servidor) não sobrecarregam um único site.
+    Os redirecionamentos são seguidos aqui, e não pelo `requests`: cada salto (e o recuo para http://)
+    confere o robots.txt da sua origem e, sem `permitir_enderecos_privados`, recusa hosts não públicos.
+    """
+
+    def __init__(self, cache=None, max_concorrencia=16, conexoes_por_host=CONEXOES_POR_HOST,
+                 timeout=TIMEOUT_SEGUNDOS, respeitar_robots=True, permitir_enderecos_privados=False):
+        self.cache = cache
+        self.max_concorrencia = max_concorrencia
+        self.timeout = timeout
+        self.respeitar_robots = respeitar_robots
+        self.permitir_enderecos_privados = permitir_enderecos_privados
+        self.sessao = requests.Session()
+        self.sessao.headers['User-Agent'] = AGENTE_USUARIO
+        adaptador = requests.adapters.HTTPAdapter(pool_connections=max_concorrencia, pool_maxsize=conexoes_por_host, pool_block=True, max_retries=0)
+        self.sessao.mount('http://', adaptador)
+        self.sessao.mount('https://', adaptador)
+        self._robots = {}
+        self._trava_robots = threading.Lock()
+        self.contagens = {'rede': 0, 'cache': 0, 'revalidado': 0, 'falha': 0, 'robots': 0}
+        self._trava_contagens = threading.Lock()
+
+    def _contar(self, origem):
+        with self._trava_contagens:
+            self.contagens[origem] += 1
+
+    def _permitido(self, url):
+        if not self.respeitar_robots:
+            return True
+        partes = urlsplit(url)
+        origem = f"{partes.scheme}://{partes.netloc}"
+        with self._trava_robots:
+            entrada = self._robots.setdefault(origem, {'trava': threading.Lock(), 'regras': None})
+        with entrada['trava']:  # um único download do robots.txt por host, mesmo com várias threads
+            if entrada['regras'] is None:
+                regras = RobotFileParser()
+                try:
+                    resposta = self.sessao.get(origem + '/robots.txt', timeout=self.timeout, allow_redirects=False)
+                    if resposta.status_code in (401, 403):
+                        regras.disallow_all = True
+                    elif resposta.ok:
+                        regras.parse(resposta.text.splitlines())
+                    else:
+                        regras.allow_all = True
+                except requests.RequestException:
+                    regras.allow_all = True  # sem robots.txt acessível vale a página em si
+                entrada['regras'] = regras
+        return entrada['regras'].can_fetch(AGENTE_USUARIO, url)
+
+    def _conferir_destino(self, url):
+        """Esquema http(s), host público (salvo `permitir_enderecos_privados`) e robots.txt da origem de `url`."""
+        partes = urlsplit(url)
+        if partes.scheme not in ('http', 'https') or not partes.hostname:
+            raise EnderecoNaoPermitido(f"URL não suportada: {url}")
+        if not self.permitir_enderecos_privados and not host_publico(partes.hostname):
+            raise EnderecoNaoPermitido(f"Host fora da internet pública: {partes.hostname}")
+        if not self._permitido(url):
+            raise BloqueadoRobots(url)
+
+    def _abrir(self, url, cabecalhos):
+        """GET de `url` seguindo até `MAX_REDIRECIONAMENTOS` saltos, cada um conferido por `_conferir_destino`."""
+        for _ in range(MAX_REDIRECIONAMENTOS + 1):
+            self._conferir_destino(url)
+            resposta = self.sessao.get(url, headers=cabecalhos, timeout=self.timeout, stream=True, allow_redirects=False)
+            if not resposta.is_redirect:
+                return resposta
+            resposta.close()
+            url = urljoin(resposta.url, resposta.headers['Location'])
+        raise requests.TooManyRedirects(f"Mais de {MAX_REDIRECIONAMENTOS} redirecionamentos")
+
+    def _baixar(self, url, anterior):
+        cabecalhos = {}
+        if anterior and anterior.get('etag'):
+            cabecalhos['If-None-Match'] = anterior['etag']
+        if anterior and anterior.get('last_modified'):
+            cabecalhos['If-Modified-Since'] = anterior['last_modified']
+        with self._abrir(url, cabecalhos) as resposta:
+            if resposta.status_code == 304 and anterior:
+                return anterior, 'revalidado'
+            resposta.raise_for_status()
+            content_type = resposta.headers.get('Content-Type', '')
+            if 'html' not in content_type.lower() and 'text/plain' not in content_type.lower():
+                raise ValueError(f"Conteúdo não é uma página ({content_type or 'sem Content-Type'})")
+            conteudo = b''
+            for bloco in resposta.iter_content(64 * 1024):
+                conteudo += bloco
+                if len(conteudo) >= MAX_BYTES_PAGINA:
+                    break
+            dados = {
+                'url_final': resposta.url,
+                'texto': extrair_texto(_decodificar(conteudo, content_type)),
+                'etag': resposta.headers.get('ETag'),
+                'last_modified': resposta.headers.get('Last-Modified'),
+            }
+            return dados, 'rede'
+
+    def coletar_um(self, site):
+        """Retorna {'url_final', 'texto', 'origem'} ou {'erro', 'origem': 'falha' | 'robots'}."""
+        url = normalizar_url(site)
+        anterior, obtido_em = self.cache.obter(url) if self.cache else (None, None)
+        if anterior and time.time() - obtido_em < VALIDADE_CACHE_SEGUNDOS:
+            self._contar('cache')
+            return {**anterior, 'origem': 'cache'}
+        try:
+            try:
+                dados, origem = self._baixar(url, anterior)
+            except (requests.exceptions.SSLError, requests.exceptions.ConnectionError):
+                if not url.startswith('https://'):
+                    raise
+                url_http = 'http://' + url[len('https://'):]  # sites sem HTTPS válido; conferido como qualquer salto
+                dados, origem = self._baixar(url_http, anterior)
+        except BloqueadoRobots:
+            self._contar('robots')
+            return {'erro': "Bloqueado pelo robots.txt", 'origem': 'robots'}
+        except Exception as e:
+            self._contar('falha')
+            return {'erro': f"{type(e).__name__}: {e}", 'origem': 'falha'}
+        if self.cache:
+            self.cache.salvar(url, dados)
+        self._contar(origem)
+        return {**dados, 'origem': origem}
+
+    def coletar(self, sites):
+        """Coleta vários sites em paralelo; retorna {site: resultado de `coletar_um`}."""
+        sites = list(dict.fromkeys(sites))
+        if not sites:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.max_concorrencia, len(sites))) as executor:
+            return dict(zip(sites, executor.map(self.coletar_um, sites)))
+
+    def textos(self, sites):
+        """{site: texto extraído} só para os sites lidos com algum texto."""
+        return {site: r['texto'] for site, r in self.coletar(sites).items() if r.get('texto')}
+
+    def fechar(self):
+        self.sessao.close()
+        if self.cache:
+            self.cache.fechar()
@@ -0,0 +1,165 @@
+# Gerador determinístico de exports do Apollo com a sujeira dos arquivos reais (telefones, sites,
+# cidades e nomes em formatos variados, campos vazios e contatos duplicados), para medir desempenho.
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from dados_traducao import DICIONARIO_SEGMENTOS
+from limpeza import MAPA_COLUNAS
+
+PRIMEIROS_NOMES = ['João', 'maria', 'ANA', '  José ', 'Pedro', 'lucas', 'Fernanda', 'BEATRIZ', 'Carlos', 'Émile',
+                   'Rafael', 'juliana', 'Marcos', 'Patrícia', 'Thiago', 'gabriela', 'Bruno', 'Letícia', 'Rodrigo', 'Camila']
+SOBRENOMES = ['da Silva', 'Souza de', 'DOS SANTOS', 'Oliveira', 'pereira', 'de Almeida', 'Costa', 'Rodrigues',
+              'Ferreira Lima', 'van der Berg', "O'Neil", 'de', 'Gomes', 'Martins', 'Araújo', 'Ribeiro', '']
+CARGOS = ['CEO', 'CFO', 'Diretor de TI', 'Head of Sales', 'Gerente Comercial', 'Analista', 'Dev', 'COO', 'Sócio']
+RADICAIS_EMPRESA = ['acme', 'nova', 'brasil', 'tec', 'log', 'fin', 'pay', 'med', 'agro', 'varejo', 'data', 'cloud',
+                    'prime', 'alpha', 'sul', 'norte', 'max', 'smart', 'bio', 'invest', 'shop', 'express', 'lab', 'hub']
+SUFIXOS_EMPRESA = ['LTDA', 'Ltda.', 'S/A', 'S.A.', 'SA', 'ME', 'EIRELI', 'EPP', 'MEI', '', '', '']
+DOMINIOS_TOPO = ['.com.br', '.com.br', '.com', '.io', '.net.br', '.gov.br']
+CIDADES = ['São Paulo', 'sao paulo', 'SAO PAULO', 'Rio de Janeiro', 'rio de janeiro', 'Belo Horizonte', 'belo horizonte',
+           'Campinas', 'curitiba', 'Porto Alegre', 'Recife', 'salvador', 'Florianópolis', 'florianopolis', 'Nowhere City']
+ESTADOS = ['SP', 'sp', 'State of São Paulo', 'São Paulo', 'RJ', 'Rio de Janeiro', 'MG', 'Minas Gerais', 'PR', 'rs',
+           'Santa Catarina', 'Texas']
+PAISES = ['Brazil', 'Brazil', 'Brazil', 'br', 'BRA', 'Brasil', 'United States', 'Portugal']
+FUNCIONARIOS = ['11', '50', '120', '350', '1.2k', '2,000', '5000', '10k', 'abc']
+DDDS = np.array([11, 11, 11, 21, 21, 31, 41, 48, 51, 61, 71, 81, 85, 19, 27])
+
+
+def _sem_acentos(texto):
+    return ''.join(c for c in unicodedata.normalize('NFD', texto) if unicodedata.category(c) != 'Mn')
+
+
+def _escolher(rng, opcoes, n, fracao_vazios=0.0):
+    valores = np.asarray(opcoes, dtype=object)[rng.integers(0, len(opcoes), n)]
+    if fracao_vazios:
+        valores[rng.random(n) < fracao_vazios] = None
+    return valores
+
+
+def _variar_caixa(rng, textos):
+    # Um terço fica como está, um terço em minúsculas e o restante em maiúsculas
+    sorteio = rng.integers(0, 3, len(textos))
+    return np.array([t if s == 0 or not isinstance(t, str) else (t.lower() if s == 1 else t.upper()) for t, s in zip(textos, sorteio)],
+                    dtype=object)
+
+
+def gerar_empresas(quantidade, semente=0):
+    """Catálogo de empresas: nome sujo, site sujo, segmento (em inglês, como no Apollo), porte e localização."""
+    rng = np.random.default_rng(semente)
+    radicais = np.asarray(RADICAIS_EMPRESA, dtype=object)
+    primeiro, segundo = rng.integers(0, len(radicais), quantidade), rng.integers(0, len(radicais), quantidade)
+    slugs = [f"{radicais[a]}{radicais[b]}{i}" for i, (a, b) in enumerate(zip(primeiro, segundo))]
+    sufixos = _escolher(rng, SUFIXOS_EMPRESA, quantidade)
+    nomes = [f"{s.capitalize()} {suf}".strip() for s, suf in zip(slugs, sufixos)]
+
+    # Site: protocolo, 'www.', caixa e barra final variam; parte das empresas não informa o site
+    topo = _escolher(rng, DOMINIOS_TOPO, quantidade)
+    prefixos = _escolher(rng, ['', 'www.', 'http://', 'https://www.', 'HTTP://WWW.', ' '], quantidade)
+    finais = _escolher(rng, ['', '', '/', '//', '/contato'], quantidade)
+    sites = np.array([f"{p}{s}{t}{f}" for p, s, t, f in zip(prefixos, slugs, topo, finais)], dtype=object)
+    sites[rng.random(quantidade) < 0.08] = None
+
+    segmentos = list(DICIONARIO_SEGMENTOS)
+    segmentos_sujos = segmentos + [s.upper() for s in segmentos[:20]] + [f"  {s.replace(' and ', ' & ')} " for s in segmentos[:20]]
+    return pd.DataFrame({
+        'Company': _variar_caixa(rng, nomes),
+        'Website': sites,
+        'Industry': _escolher(rng, segmentos_sujos + ['Unknown Thing'], quantidade, fracao_vazios=0.05),
+        '# Employees': _escolher(rng, FUNCIONARIOS, quantidade, fracao_vazios=0.05),
+        'Company City': _escolher(rng, CIDADES, quantidade, fracao_vazios=0.1),
+        'Company State': _escolher(rng, ESTADOS, quantidade, fracao_vazios=0.1),
+        'Company Country': _escolher(rng, PAISES, quantidade, fracao_vazios=0.05),
+        'Company Linkedin Url': [f"http://www.linkedin.com/company/{s}" for s in slugs],
+        'Facebook Url': np.where(rng.random(quantidade) < 0.3, [f"https://facebook.com/{s}" for s in slugs], None),
+    })
+
+
+def _telefones(rng, n):
+    """Telefones quase únicos em vários formatos: +55, DDD com zero, fixo, 0800, internacional e lixo."""
+    ddd = DDDS[rng.integers(0, len(DDDS), n)]
+    celular = rng.integers(90_000_000, 100_000_000, n)
+    fixo = rng.integers(30_000_000, 40_000_000, n)
+    formato = rng.integers(0, 10, n)
+    valores = np.empty(n, dtype=object)
+    for i in range(n):
+        f, d, c, x = formato[i], ddd[i], celular[i], fixo[i]
+        if f == 0:
+            valores[i] = f"+55 {d} {str(c)[:5]}-{str(c)[5:]}"
+        elif f == 1:
+            valores[i] = f"({d}) {str(x)[:4]}-{str(x)[4:]}"
+        elif f == 2:
+            valores[i] = f"0{d}{c}"
+        elif f == 3:
+            valores[i] = f"55{d}{c}"
+        elif f == 4:
+            valores[i] = f"+55 ({d}) {x}"
+        elif f == 5:
+            valores[i] = f"0800 {str(x)[:3]} {str(x)[3:7]}"
+        elif f == 6:
+            valores[i] = f"+1 555 {str(x)[:4]}"
+        elif f == 7:
+            valores[i] = str(x)[:3]
+        elif f == 8:
+            valores[i] = f"{d}9{str(c)[1:]}"
+        else:
+            valores[i] = None
+    return valores
+
+
+def gerar_leads_apollo(linhas, semente=0, empresas=None, fracao_duplicados=0.03, catalogo=None):
+    """DataFrame com `linhas` contatos e as colunas de `MAPA_COLUNAS` (mais uma coluna extra, ignorada na limpeza).
+
+    Por padrão há uma empresa para cada 15 contatos; `fracao_duplicados` dos contatos se repetem
+    (metade exatamente igual, metade com outra caixa no nome). A mesma `semente` gera o mesmo arquivo.
+    """
+    rng = np.random.default_rng(semente)
+    if catalogo is None:
+        catalogo = gerar_empresas(empresas or max(1, linhas // 15), semente)
+    originais = linhas - int(linhas * fracao_duplicados)
+    empresa = catalogo.iloc[rng.integers(0, len(catalogo), originais)].reset_index(drop=True)
+
+    primeiros = _escolher(rng, PRIMEIROS_NOMES, originais, fracao_vazios=0.02)
+    sobrenomes = _escolher(rng, SOBRENOMES, originais, fracao_vazios=0.05)
+    slugs_empresa = empresa['Company Linkedin Url'].str.rsplit('/', n=1).str[-1].to_numpy(dtype=object)
+    emails = [
+        f"{_sem_acentos(str(p)).strip().lower()}.{i}@{s}.com.br" if p is not None and r > 0.15 else None
+        for i, (p, s, r) in enumerate(zip(primeiros, slugs_empresa, rng.random(originais)))
+    ]
+    contatos = pd.DataFrame({
+        'First Name': primeiros,
+        'Last Name': sobrenomes,
+        'Title': _escolher(rng, CARGOS, originais, fracao_vazios=0.1),
+        'Email': emails,
+        'Corporate Phone': _telefones(rng, originais),
+        'City': _escolher(rng, CIDADES, originais, fracao_vazios=0.1),
+        'State': _escolher(rng, ESTADOS, originais, fracao_vazios=0.1),
+        'Country': _escolher(rng, PAISES, originais, fracao_vazios=0.05),
+        'Person Linkedin Url': [f"http://www.linkedin.com/in/contato-{semente}-{i}" for i in range(originais)],
+        'Extra Col': _escolher(rng, ['x', None], originais),
+    })
+    df = pd.concat([contatos, empresa], axis=1)
+
+    # Duplicados: metade cópia exata, metade com o nome em outra caixa (o Apollo repete contatos entre listas)
+    repetidos = df.iloc[rng.integers(0, originais, linhas - originais)].copy()
+    metade = len(repetidos) // 2
+    repetidos.iloc[:metade, repetidos.columns.get_loc('First Name')] = _variar_caixa(rng, repetidos['First Name'].iloc[:metade].to_numpy())
+    df = pd.concat([df, repetidos], ignore_index=True)
+    df = df.iloc[rng.permutation(len(df))].reset_index(drop=True)
+    return df[list(MAPA_COLUNAS) + ['Extra Col']]
+
+
+def gravar_csv_apollo(caminho, linhas, semente=0, linhas_por_bloco=250_000, **opcoes):
+    """Grava um CSV do Apollo com `linhas` contatos em blocos (até milhões de linhas sem tudo em memória).
+
+    Todos os blocos compartilham o mesmo catálogo de empresas; cada bloco usa uma semente derivada de `semente`.
+    """
+    catalogo = gerar_empresas(opcoes.pop('empresas', None) or max(1, linhas // 15), semente)
+    gravadas = 0
+    with open(caminho, 'w', encoding='utf-8', newline='') as arquivo:
+        for bloco, inicio in enumerate(range(0, linhas, linhas_por_bloco)):
+            tamanho = min(linhas_por_bloco, linhas - inicio)
+            df = gerar_leads_apollo(tamanho, semente=semente * 100_003 + bloco, catalogo=catalogo, **opcoes)
+            df.to_csv(arquivo, index=False, header=bloco == 0)
+            gravadas += len(df)
+    return gravadas
@@ -0,0 +1,257 @@
+# Índice persistente de leads: linhas já limpas em envios anteriores voltam do disco (só as novas passam
+# pela limpeza) e contatos repetidos, no mesmo envio ou entre envios, viram um único registro.
+# O índice é colunar (Parquet) e consultado com merges do pandas: buscar linha a linha custaria mais do
+# que a própria limpeza vetorizada.
+import hashlib
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from cache_icp import DIRETORIO_CACHE
+from limpeza import MAPA_COLUNAS, colunas_como_texto, limpar_dataframe_em_paralelo, normalizar_texto_para_comparacao
+from metricas import cronometrar
+
+VERSAO_LIMPEZA = '3'  # aumentar quando as regras de `limpeza` mudarem: as linhas guardadas deixam de valer
+TTL_LINHAS_SEGUNDOS = 180 * 24 * 3600
+MAX_LINHAS_GUARDADAS = 2_000_000  # acima disso saem as linhas usadas há mais tempo
+CHAVES_HASH = ('agente-ldr-hash1', 'agente-ldr-hash2')  # duas chaves de 16 bytes: impressão digital de 128 bits
+HASH_NULO = np.uint64(0x9E3779B97F4A7C15)  # valor das células nulas (o código -1 do factorize pega o último item)
+MULTIPLICADOR_HASH = np.uint64(0x100000001B3)
+
+REGRAS_SOBREVIVENCIA = {
+    'mais_completo': "Mais completo (mais campos preenchidos)",
+    'mais_recente': "Mais recente (o registro do envio atual prevalece)",
+    'mais_antigo': "Mais antigo (o primeiro registro visto prevalece)",
+}
+STATUS_CONTATO = ('novo', 'alterado', 'repetido', 'sem_chave')
+COLUNAS_CONTROLE_CONTATOS = ['k1', 'k2', 'c1', 'c2', 'r1', 'r2', 'preenchidos', 'envios', 'primeiro_envio', 'ultimo_envio']
+
+
+# --- IMPRESSÕES DIGITAIS ---
+
+def impressoes_digitais(df, sal=''):
+    """Dois hashes de 64 bits por linha, sobre o conteúdo de todas as colunas (nulo difere de texto vazio) e o `sal`.
+
+    Cada coluna é fatorada uma única vez e só os valores distintos são hasheados, com as duas chaves.
+    """
+    hashes = [np.full(len(df), pd.util.hash_array(np.array([sal], dtype=object), hash_key=chave)[0], dtype=np.uint64) for chave in CHAVES_HASH]
+    for col in df.columns:
+        codigos, unicos = pd.factorize(df[col])
+        unicos = np.asarray(unicos, dtype=object)
+        for i, chave in enumerate(CHAVES_HASH):
+            valores = np.append(pd.util.hash_array(unicos, hash_key=chave, categorize=False), HASH_NULO)[codigos]
+            hashes[i] = (hashes[i] * MULTIPLICADOR_HASH) ^ valores
+    return tuple(h.view(np.int64) for h in hashes)
+
+
+def _normalizar_valores(serie, func):
+    codigos, unicos = pd.factorize(serie.astype(object).fillna(''), use_na_sentinel=False)
+    return np.asarray([func(str(v)) for v in unicos], dtype=object)[codigos]
+
+
+def chaves_identidade(df_limpo):
+    """Chave de cada contato limpo: o e-mail normalizado ou, sem ele, nome completo + empresa; None se faltarem ambos."""
+    n = len(df_limpo)
+    vazio = np.full(n, '', dtype=object)
+    emails = _normalizar_valores(df_limpo['Email_Lead'], lambda v: v.strip().lower()) if 'Email_Lead' in df_limpo.columns else vazio
+    normalizar = lambda v: ' '.join(normalizar_texto_para_comparacao(v).split())
+    nomes = _normalizar_valores(df_limpo['Nome_Completo'], normalizar) if 'Nome_Completo' in df_limpo.columns else vazio
+    empresas = _normalizar_valores(df_limpo['Nome_Empresa'], normalizar) if 'Nome_Empresa' in df_limpo.columns else vazio
+    chaves = np.full(n, None, dtype=object)
+    por_nome = (nomes != '') & (empresas != '')
+    chaves[por_nome] = 'n:' + nomes[por_nome] + '|' + empresas[por_nome]
+    por_email = emails != ''
+    chaves[por_email] = 'e:' + emails[por_email]
+    return chaves
+
+
+# --- ARMAZENAMENTO ---
+
+class IndiceLeads:
+    """Diretório com as linhas limpas por impressão digital da linha bruta (um Parquet por versão da limpeza
+    e conjunto de colunas) e o registro sobrevivente de cada contato (`contatos.parquet`).
+
+    Os arquivos são regravados inteiros (troca atômica) ao fim de cada envio.
+    """
+
+    def __init__(self, diretorio=None, ttl_segundos=TTL_LINHAS_SEGUNDOS, max_linhas=MAX_LINHAS_GUARDADAS):
+        self.diretorio = diretorio or os.path.join(DIRETORIO_CACHE, 'indice_leads')
+        self.ttl_segundos = ttl_segundos
+        self.max_linhas = max_linhas
+        self.trava = threading.Lock()  # um envio por vez lê e regrava o índice
+        os.makedirs(self.diretorio, exist_ok=True)
+
+    def _caminho_linhas(self, sal):
+        return os.path.join(self.diretorio, f"linhas_{hashlib.sha256(sal.encode('utf-8')).hexdigest()[:16]}.parquet")
+
+    def _ler(self, caminho):
+        return pd.read_parquet(caminho) if os.path.exists(caminho) else None
+
+    def _gravar(self, df, caminho):
+        temporario = caminho + '.tmp'
+        df.to_parquet(temporario, index=False)
+        os.replace(temporario, caminho)
+
+    def ler_linhas(self, sal):
+        return self._ler(self._caminho_linhas(sal))
+
+    def gravar_linhas(self, sal, linhas):
+        """Grava as linhas limpas (colunas h1, h2, usado_em e as da limpeza), sem as expiradas e até `max_linhas`."""
+        linhas = linhas[linhas['usado_em'] >= time.time() - self.ttl_segundos]
+        if len(linhas) > self.max_linhas:
+            linhas = linhas.nlargest(self.max_linhas, 'usado_em')
+        self._gravar(linhas, self._caminho_linhas(sal))
+
+    def ler_contatos(self):
+        return self._ler(os.path.join(self.diretorio, 'contatos.parquet'))
+
+    def gravar_contatos(self, contatos):
+        self._gravar(contatos, os.path.join(self.diretorio, 'contatos.parquet'))
+
+    def contagens(self):
+        contatos = self.ler_contatos()
+        linhas = sum(pd.read_parquet(os.path.join(self.diretorio, nome), columns=['h1']).shape[0]
+                     for nome in os.listdir(self.diretorio) if nome.startswith('linhas_') and nome.endswith('.parquet'))
+        return {'linhas': linhas, 'contatos': 0 if contatos is None else len(contatos)}
+
+    def esvaziar(self):
+        for nome in os.listdir(self.diretorio):
+            if nome.endswith('.parquet'):
+                os.remove(os.path.join(self.diretorio, nome))
+
+
+# --- LIMPEZA INCREMENTAL ---
+
+def _limpar_novas(bruto, indice, sal, mapa_cidades, mapa_estados, processos, metricas):
+    """Limpa só as linhas de `bruto` cuja impressão digital não está no índice; devolve (df_limpo, reaproveitadas, limpas)."""
+    h1, h2 = impressoes_digitais(bruto, sal)
+    consulta = pd.DataFrame({'h1': h1, 'h2': h2})
+    with cronometrar(metricas, 'indice.ler_linhas'):
+        guardadas = indice.ler_linhas(sal)
+    conhecidas = consulta.merge(guardadas[['h1', 'h2']], on=['h1', 'h2'], how='left', indicator=True)['_merge'].to_numpy() == 'both' \
+        if guardadas is not None else np.zeros(len(bruto), dtype=bool)
+    posicoes_novas = consulta[~conhecidas].drop_duplicates().index.to_numpy()
+
+    limpas = limpar_dataframe_em_paralelo(bruto.iloc[posicoes_novas], mapa_cidades, mapa_estados, processos, metricas=metricas)
+    limpas.insert(0, 'h1', h1[posicoes_novas])
+    limpas.insert(1, 'h2', h2[posicoes_novas])
+    agora = time.time()
+    if guardadas is None:
+        todas = limpas.assign(usado_em=agora)
+    else:
+        usadas = guardadas[['h1', 'h2']].merge(consulta.drop_duplicates(), how='left', indicator=True)['_merge'].to_numpy() == 'both'
+        guardadas.loc[usadas, 'usado_em'] = agora
+        todas = pd.concat([guardadas, limpas.assign(usado_em=agora)], ignore_index=True)
+    with cronometrar(metricas, 'indice.montar_linhas'):
+        colunas = [col for col in todas.columns if col not in ('h1', 'h2', 'usado_em')]
+        df_limpo = consulta.merge(todas, on=['h1', 'h2'], how='left')[colunas].fillna('')
+        df_limpo.index = bruto.index
+    with cronometrar(metricas, 'indice.gravar_linhas'):
+        indice.gravar_linhas(sal, todas)
+    return df_limpo, int(conhecidas.sum()), len(posicoes_novas)
+
+
+def _escolher_sobreviventes(chaves, preenchidos, regra):
+    """Posição do registro que sobrevive para cada chave repetida no envio."""
+    tabela = pd.DataFrame({'chave': chaves, 'preenchidos': preenchidos, 'posicao': np.arange(len(chaves))}).dropna(subset=['chave'])
+    if regra == 'mais_completo':  # empate: o que aparece primeiro
+        tabela = tabela.sort_values(['chave', 'preenchidos', 'posicao'], ascending=[True, False, True], kind='stable')
+        return tabela.drop_duplicates('chave', keep='first')['posicao'].to_numpy()
+    return tabela.drop_duplicates('chave', keep='last' if regra == 'mais_recente' else 'first')['posicao'].to_numpy()
+
+
+def _comparar_com_anteriores(resultado, chaves, preenchidos, indice, regra):
+    """Marca cada contato como novo, alterado, repetido ou sem chave, aplica a `regra` aos alterados e atualiza o índice.
+
+    O índice guarda, por contato, o registro sobrevivente (impressão c1/c2) e a impressão do último registro
+    recebido (r1/r2): reenviar um registro que a regra descartou também conta como repetido.
+    """
+    colunas = list(resultado.columns)
+    k1, k2 = impressoes_digitais(pd.DataFrame({'chave': chaves}))
+    c1, c2 = impressoes_digitais(resultado.reset_index(drop=True))
+    atuais = pd.DataFrame({'k1': k1, 'k2': k2, 'c1': c1, 'c2': c2, 'r1': c1, 'r2': c2, 'preenchidos': preenchidos})
+    com_chave = pd.notna(chaves)
+    anteriores = indice.ler_contatos()
+    status = np.where(com_chave, 'novo', 'sem_chave').astype(object)
+    agora = time.time()
+    novos_registros = pd.concat([atuais, resultado.reset_index(drop=True)], axis=1)[com_chave]
+    if anteriores is None:
+        contatos = novos_registros.assign(envios=1, primeiro_envio=agora, ultimo_envio=agora)
+    else:
+        if 'r1' not in anteriores.columns:  # índice gravado antes de guardar o último registro recebido
+            anteriores = anteriores.assign(r1=anteriores['c1'], r2=anteriores['c2'])
+        # Só as chaves entram no merge; o registro anterior de cada contato é lido pela posição em `anteriores`
+        posicoes = atuais[['k1', 'k2']].merge(
+            anteriores[['k1', 'k2']].assign(posicao=np.arange(len(anteriores))), on=['k1', 'k2'], how='left')['posicao'].to_numpy()
+        vistos = ~np.isnan(posicoes) & com_chave
+        anterior = anteriores.iloc[posicoes[vistos].astype(int)].reset_index(drop=True)
+        impressoes = atuais.loc[vistos, ['c1', 'c2']].to_numpy()
+        mesmo_guardado = (impressoes == anterior[['c1', 'c2']].to_numpy()).all(axis=1)
+        mesmo_recebido = (impressoes == anterior[['r1', 'r2']].to_numpy()).all(axis=1)
+        status[vistos] = np.where(mesmo_guardado | mesmo_recebido, 'repetido', 'alterado')
+        mantem = ~mesmo_guardado & ((regra == 'mais_antigo') | ((regra == 'mais_completo') & (anterior['preenchidos'].to_numpy() > preenchidos[vistos])))
+        if mantem.any():
+            mantem_anterior = np.flatnonzero(vistos)[mantem]
+            for col in colunas:
+                if col in anterior.columns:
+                    valores = resultado[col].to_numpy(dtype=object, copy=True)
+                    valores[mantem_anterior] = anterior.loc[mantem, col].to_numpy(dtype=object)
+                    resultado[col] = valores
+            atuais.loc[mantem_anterior, ['c1', 'c2', 'preenchidos']] = anterior.loc[mantem, ['c1', 'c2', 'preenchidos']].to_numpy()
+            novos_registros = pd.concat([atuais, resultado.reset_index(drop=True)], axis=1)[com_chave]
+        envios, primeiro_envio = np.ones(len(atuais), dtype=int), np.full(len(atuais), agora)
+        envios[vistos] += anterior['envios'].to_numpy(dtype=int)
+        primeiro_envio[vistos] = anterior['primeiro_envio'].to_numpy()
+        novos_registros = novos_registros.reset_index(drop=True).assign(
+            envios=envios[com_chave], primeiro_envio=primeiro_envio[com_chave], ultimo_envio=agora)
+        # Um contato repetido no envio tem um único sobrevivente, então as chaves de `novos_registros` são únicas
+        fora_do_envio = anteriores.merge(atuais.loc[com_chave, ['k1', 'k2']], how='left', indicator=True)['_merge'].to_numpy() == 'left_only'
+        contatos = pd.concat([anteriores[fora_do_envio], novos_registros], ignore_index=True)
+    colunas_contatos = COLUNAS_CONTROLE_CONTATOS + [col for col in contatos.columns if col not in COLUNAS_CONTROLE_CONTATOS]
+    indice.gravar_contatos(contatos[colunas_contatos].astype({col: str for col in contatos.columns if col not in COLUNAS_CONTROLE_CONTATOS}))
+    return resultado, status
+
+
+def limpar_com_indice(df, indice, mapa_cidades=None, mapa_estados=None, regra='mais_completo', versao_localidades='',
+                      processos=1, compactar=False, apenas_novos=False, metricas=None):
+    """Limpa `df` reaproveitando as linhas guardadas em `indice` e colapsa os contatos repetidos.
+
+    Cada contato (ver `chaves_identidade`) fica com um único registro, escolhido por `regra` entre as
+    repetições do envio e o registro de envios anteriores (ver `REGRAS_SOBREVIVENCIA`). Com `apenas_novos`,
+    saem só os contatos novos ou alterados (e os sem chave). Retorna `(df_limpo, resumo)`, com as contagens
+    de linhas reaproveitadas e de contatos novos, alterados e repetidos.
+    """
+    if regra not in REGRAS_SOBREVIVENCIA:
+        raise ValueError(f"Regra de sobrevivência desconhecida: {regra}")
+    df = df.rename(columns=lambda c: str(c).strip())
+    colunas_brutas = [col for col in df.columns if col in MAPA_COLUNAS]
+    sal = '|'.join([VERSAO_LIMPEZA, str(versao_localidades), *colunas_brutas])
+    with indice.trava:
+        with cronometrar(metricas, 'indice.limpeza_incremental'):
+            df_limpo, linhas_reaproveitadas, linhas_limpas = _limpar_novas(
+                df[colunas_brutas], indice, sal, mapa_cidades, mapa_estados, processos, metricas)
+
+        with cronometrar(metricas, 'indice.deduplicacao'):
+            chaves = chaves_identidade(df_limpo)
+            preenchidos = (df_limpo != '').sum(axis=1).to_numpy()
+            sobreviventes = _escolher_sobreviventes(chaves, preenchidos, regra)
+            mantidas = np.sort(np.concatenate([sobreviventes, np.flatnonzero(pd.isna(chaves))]))
+            resultado, status = _comparar_com_anteriores(
+                df_limpo.iloc[mantidas].copy(), chaves[mantidas], preenchidos[mantidas], indice, regra)
+            if apenas_novos:
+                resultado = resultado[status != 'repetido']
+            resultado = colunas_como_texto(resultado, True) if compactar else resultado.astype(str)
+
+    contagem_status = pd.Series(status).value_counts()
+    resumo = {
+        'linhas': len(df),
+        'linhas_reaproveitadas': linhas_reaproveitadas,
+        'linhas_limpas': linhas_limpas,
+        'duplicados_no_envio': int(pd.notna(chaves).sum()) - len(sobreviventes),
+        **{s: int(contagem_status.get(s, 0)) for s in STATUS_CONTATO},
+        'linhas_saida': len(resultado),
+    }
+    return resultado, resumo
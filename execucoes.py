@@ -0,0 +1,119 @@
+# Checkpoints das análises de ICP: cada execução grava os veredictos em JSONL assim que saem da IA,
+# para que uma queda, um refresh ou um novo envio do mesmo arquivo continuem de onde pararam.
+import hashlib
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+from cache_icp import DIRETORIO_CACHE, TTL_PADRAO_SEGUNDOS
+from qualificacao import concluir_qualificacao, preparar_qualificacao
+from roteamento import identificador_camadas
+
+DIRETORIO_EXECUCOES = os.path.join(DIRETORIO_CACHE, 'execucoes')
+COLUNAS_RESULTADO = ('classificacao_icp', 'motivo_classificacao')
+
+
+def gerar_id_execucao(leads_df, icp, camadas=None):
+    """Id estável de uma execução: o mesmo conteúdo de leads com o mesmo ICP (dict do formulário) gera o mesmo id.
+
+    Com a classificação em camadas, os modelos e limites de confiança também entram no id (como no cache de
+    veredictos): ligar, desligar ou mudar as camadas não retoma o checkpoint de outra configuração.
+    """
+    colunas = [col for col in leads_df.columns if col not in COLUNAS_RESULTADO]
+    conteudo = hashlib.sha256()
+    conteudo.update(json.dumps(colunas).encode('utf-8'))
+    for col in colunas:
+        # Texto explícito: a mesma lista vinda da sessão (category / Arrow) ou de um CSV gera o mesmo hash
+        valores = leads_df[col].astype(object).where(leads_df[col].notna(), '').astype(str)
+        conteudo.update(pd.util.hash_pandas_object(valores, index=False).to_numpy().tobytes())
+    conteudo.update(json.dumps(icp, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+    if camadas:
+        conteudo.update(identificador_camadas(camadas).encode('utf-8'))
+    return conteudo.hexdigest()[:16]
+
+
+def caminho_execucao(id_execucao, diretorio=DIRETORIO_EXECUCOES):
+    return os.path.join(diretorio, f"{id_execucao}.jsonl")
+
+
+def descartar_execucoes_antigas(diretorio=DIRETORIO_EXECUCOES, ttl_segundos=TTL_PADRAO_SEGUNDOS):
+    """Remove checkpoints sem alteração há mais de `ttl_segundos`."""
+    if not os.path.isdir(diretorio):
+        return
+    limite = time.time() - ttl_segundos
+    for nome in os.listdir(diretorio):
+        caminho = os.path.join(diretorio, nome)
+        if nome.endswith('.jsonl') and os.path.getmtime(caminho) < limite:
+            os.remove(caminho)
+
+
+class CheckpointExecucao:
+    """Arquivo JSONL de uma execução: uma linha de início com o resumo do ICP e uma linha por empresa analisada.
+
+    Uma última linha incompleta (queda no meio da gravação) é ignorada na leitura.
+    """
+
+    def __init__(self, id_execucao, diretorio=DIRETORIO_EXECUCOES):
+        os.makedirs(diretorio, exist_ok=True)
+        descartar_execucoes_antigas(diretorio)
+        self.id_execucao = id_execucao
+        self.caminho = caminho_execucao(id_execucao, diretorio)
+        self.icp_resumido = None
+        self.resultados = {}
+        self._trava = threading.Lock()
+        self._carregar()
+        self._arquivo = open(self.caminho, 'a', encoding='utf-8')
+
+    def _carregar(self):
+        if not os.path.exists(self.caminho):
+            return
+        with open(self.caminho, encoding='utf-8') as arquivo:
+            for linha in arquivo:
+                try:
+                    registro = json.loads(linha)
+                except json.JSONDecodeError:
+                    continue
+                if registro.get('tipo') == 'inicio':
+                    self.icp_resumido = registro['icp_resumido']
+                elif registro.get('tipo') == 'resultado':
+                    self.resultados[registro['empresa']] = registro['analise']
+
+    def _gravar(self, registro):
+        with self._trava:
+            self._arquivo.write(json.dumps(registro, ensure_ascii=False) + '\n')
+            self._arquivo.flush()
+
+    def iniciar(self, icp_resumido):
+        """Registra o resumo do ICP usado; numa retomada, o resumo gravado é mantido."""
+        if self.icp_resumido is None:
+            self.icp_resumido = icp_resumido
+            self._gravar({'tipo': 'inicio', 'icp_resumido': icp_resumido, 'criado_em': time.time()})
+
+    def registrar(self, empresa, analise):
+        """Grava um veredicto; pode ser chamado de várias threads."""
+        self._gravar({'tipo': 'resultado', 'empresa': empresa, 'analise': analise})
+        self.resultados[empresa] = analise
+
+    def concluidas(self):
+        """Veredictos bem-sucedidos; empresas com erro são analisadas de novo na retomada."""
+        return {empresa: analise for empresa, analise in self.resultados.items() if "error" not in analise}
+
+    def fechar(self):
+        self._arquivo.close()
+
+
+def montar_resultado_parcial(leads_df, filtro_icp, checkpoint, preclassificador=None, plano=None):
+    """Cópia de `leads_df` com os veredictos gravados até agora; empresas ainda não analisadas ficam sem classificação.
+
+    Com `plano`, `leads_df` é o resultado de `preparar_qualificacao` com esse plano, e o filtro não é refeito.
+    """
+    if plano is None:
+        parcial = leads_df.drop(columns=[col for col in COLUNAS_RESULTADO if col in leads_df.columns])
+        plano = preparar_qualificacao(parcial, filtro_icp, preclassificador)
+    else:
+        parcial = leads_df.copy()
+    concluir_qualificacao(parcial, plano, dict(checkpoint.resultados))  # cópia: a execução pode estar gravando
+    return parcial
@@ -0,0 +1,296 @@
+# Filtro determinístico do ICP: compilado uma vez e aplicado de forma vetorizada antes da IA.
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+MOTIVOS_REGRAS = {
+    'porte': 'Porte da empresa fora do perfil',
+    'segmento': 'Segmento excluído pelas observações do ICP',
+    'pais': 'País fora do ICP',
+    'estado': 'Estado fora do ICP',
+}
+
+UFS = {
+    'ac': 'acre', 'al': 'alagoas', 'ap': 'amapa', 'am': 'amazonas', 'ba': 'bahia', 'ce': 'ceara',
+    'df': 'distrito federal', 'es': 'espirito santo', 'go': 'goias', 'ma': 'maranhao', 'mt': 'mato grosso',
+    'ms': 'mato grosso do sul', 'mg': 'minas gerais', 'pa': 'para', 'pb': 'paraiba', 'pr': 'parana',
+    'pe': 'pernambuco', 'pi': 'piaui', 'rj': 'rio de janeiro', 'rn': 'rio grande do norte',
+    'rs': 'rio grande do sul', 'ro': 'rondonia', 'rr': 'roraima', 'sc': 'santa catarina', 'sp': 'sao paulo',
+    'se': 'sergipe', 'to': 'tocantins',
+}
+PAISES_EQUIVALENTES = {'br': 'brasil', 'bra': 'brasil', 'brazil': 'brasil'}
+
+# Expressões das "Observações" que introduzem segmentos a excluir
+PADRAO_EXCLUSAO = re.compile(r'(?:nao pode ser|nao podem ser|nao deve ser|exceto|excluir|exclua)\s+([^.;\n]+)')
+PALAVRAS_IGNORADAS = {
+    'do', 'da', 'de', 'dos', 'das', 'o', 'a', 'os', 'as', 'um', 'uma', 'no', 'na', 'em',
+    'setor', 'setores', 'segmento', 'segmentos', 'area', 'areas', 'empresa', 'empresas', 'ramo',
+}
+
+
+def normalizar(texto):
+    """Remove acentos e converte para minúsculo."""
+    s = str(texto).lower().strip()
+    return ''.join(c for c in unicodedata.normalize('NFD', s) if unicodedata.category(c) != 'Mn')
+
+
+def _radical(palavra):
+    # Aproxima singular/plural e variações simples ("governamental" / "governamentais")
+    for sufixo in ('ais', 'eis', 'al', 'el', 'es', 's'):
+        if len(palavra) > len(sufixo) + 4 and palavra.endswith(sufixo):
+            return palavra[:-len(sufixo)]
+    return palavra
+
+
+def _normalizar_serie(serie):
+    uniques = serie.dropna().unique()
+    # Em colunas `category` (Parquet da Estação 1) o `map` devolveria categorias, que não aceitam valores novos
+    normalizados = serie.map({valor: normalizar(valor) for valor in uniques}).to_numpy(dtype=object)
+    return pd.Series(normalizados, index=serie.index, dtype=object).fillna('')
+
+
+class FiltroICP:
+    """Critérios determinísticos do ICP já interpretados: faixa de funcionários, segmentos excluídos, países e estados."""
+
+    def __init__(self, faixa_funcionarios, segmentos_excluidos, paises_permitidos, estados_permitidos):
+        self.faixa_funcionarios = faixa_funcionarios
+        self.segmentos_excluidos = segmentos_excluidos
+        self.paises_permitidos = paises_permitidos
+        self.estados_permitidos = estados_permitidos
+
+    # --- Regras individuais (cada uma devolve a máscara das linhas aprovadas) ---
+
+    def _aprovados_por_porte(self, df):
+        if self.faixa_funcionarios is None:
+            return pd.Series(True, index=df.index)
+        operador, limites = self.faixa_funcionarios
+        if operador == 'nenhum' or 'Numero_Funcionarios' not in df.columns:
+            return pd.Series(False, index=df.index)
+        texto = (df['Numero_Funcionarios'].astype('string').str.strip().str.lower()
+                 .str.replace('.', '', regex=False).str.replace(',', '', regex=False))
+        tem_k = texto.str.contains('k', regex=False).fillna(False)
+        numeros = pd.to_numeric(texto.str.replace('k', '', regex=False), errors='coerce').astype(float)
+        numeros = numeros.where(~tem_k, numeros * 1000).to_numpy()
+        with np.errstate(invalid='ignore'):
+            if operador == '>':
+                aprovados = numeros > limites[0]
+            elif operador == '<':
+                aprovados = numeros < limites[0]
+            elif operador == 'entre':
+                aprovados = (numeros >= limites[0]) & (numeros <= limites[1])
+            else:
+                aprovados = numeros >= limites[0]
+        return pd.Series(aprovados & ~np.isnan(numeros), index=df.index)
+
+    def _aprovados_por_segmento(self, df):
+        if not self.segmentos_excluidos or 'Segmento_Original' not in df.columns:
+            return pd.Series(True, index=df.index)
+        segmentos = _normalizar_serie(df['Segmento_Original'])
+        excluidos = pd.Series(False, index=df.index)
+        for radicais in self.segmentos_excluidos:
+            contem_todos = pd.Series(True, index=df.index)
+            for radical in radicais:
+                contem_todos &= segmentos.str.contains(r'\b' + re.escape(radical), regex=True)
+            excluidos |= contem_todos
+        return ~excluidos
+
+    @staticmethod
+    def _aprovados_por_lista(df, colunas, permitidos, equivalentes):
+        coluna = next((c for c in colunas if c in df.columns), None)
+        if not permitidos or coluna is None:
+            return pd.Series(True, index=df.index)
+        valores = _normalizar_serie(df[coluna]).replace(equivalentes)
+        # Valores ausentes não são eliminados: o filtro só remove o que é sabidamente diferente
+        return (valores == '') | valores.isin(permitidos)
+
+    # --- Aplicação ---
+
+    def aplicar(self, df):
+        """Retorna (mascara_aprovados, motivos, remocoes_por_regra).
+
+        Cada linha reprovada é atribuída à primeira regra que a eliminou, na ordem de `MOTIVOS_REGRAS`.
+        """
+        regras = {
+            'porte': self._aprovados_por_porte(df),
+            'segmento': self._aprovados_por_segmento(df),
+            'pais': self._aprovados_por_lista(df, ['Pais_Empresa', 'Pais_Contato'], self.paises_permitidos, PAISES_EQUIVALENTES),
+            'estado': self._aprovados_por_lista(df, ['Estado_Empresa', 'Estado_Contato'], self.estados_permitidos, UFS),
+        }
+        mascara = pd.Series(True, index=df.index)
+        motivos = pd.Series('', index=df.index, dtype=object)
+        remocoes = {}
+        for regra, aprovados in regras.items():
+            removidos = mascara & ~aprovados.fillna(False).astype(bool)
+            remocoes[MOTIVOS_REGRAS[regra]] = int(removidos.sum())
+            motivos[removidos] = MOTIVOS_REGRAS[regra]
+            mascara &= ~removidos
+        return mascara, motivos, remocoes
+
+
+def _interpretar_faixa(faixa_icp_str):
+    if pd.isna(faixa_icp_str) or str(faixa_icp_str).strip() == '': return None
+    faixa_str = str(faixa_icp_str).lower()
+    numeros = [int(s) for s in re.findall(r'\d+', faixa_str)]
+    if not numeros: return ('nenhum', [])
+    if "acima" in faixa_str or "maior" in faixa_str: return ('>', numeros)
+    elif "abaixo" in faixa_str or "menor" in faixa_str: return ('<', numeros)
+    elif "-" in faixa_str and len(numeros) == 2: return ('entre', numeros)
+    elif len(numeros) == 1: return ('>=', numeros)
+    return ('nenhum', [])
+
+
+def _interpretar_exclusoes(observacoes):
+    # Cada termo vira uma tupla de radicais; o segmento é excluído se contiver todos os radicais de algum termo
+    termos = set()
+    for trecho in PADRAO_EXCLUSAO.findall(normalizar(observacoes or '')):
+        for termo in re.split(r',|\s+e\s+|\s+ou\s+', trecho):
+            palavras = [p for p in re.findall(r'[a-z0-9&-]+', termo) if p not in PALAVRAS_IGNORADAS and len(p) > 2]
+            if palavras:
+                termos.add(tuple(_radical(p) for p in palavras))
+    return sorted(termos)
+
+
+def _interpretar_lista(texto, equivalentes):
+    itens = {normalizar(item) for item in str(texto or '').split(',') if item.strip()}
+    return {equivalentes.get(item, item) for item in itens}
+
+
+def compilar_filtro_icp(funcionarios, observacoes='', paises='', estados=''):
+    """Interpreta uma única vez os critérios determinísticos do formulário de ICP."""
+    return FiltroICP(
+        faixa_funcionarios=_interpretar_faixa(funcionarios),
+        segmentos_excluidos=_interpretar_exclusoes(observacoes),
+        paises_permitidos=_interpretar_lista(paises, PAISES_EQUIVALENTES),
+        estados_permitidos=_interpretar_lista(estados, UFS),
+    )
+
+
+# --- PRÉ-CLASSIFICAÇÃO LOCAL (CASOS ÓBVIOS SEM IA) ---
+
+CODIGOS_PRE_CLASSIFICACAO = {
+    'segmento': 'REGRA_LOCAL_SEGMENTO',
+    'exclusao': 'REGRA_LOCAL_EXCLUSAO',
+}
+# Peso de cada campo na confiança; só o segmento, cobrindo uma palavra-chave inteira, basta para decidir
+PESOS_CAMPOS = {'segmento': 0.6, 'nome': 0.25, 'dominio': 0.15}
+LIMITE_CONFIANCA_LOCAL = 0.6
+# Sinais inequívocos de setor público, usados quando as observações excluem o governo
+RADICAIS_SETOR_PUBLICO = ('govern', 'public')
+NOMES_SETOR_PUBLICO = ('prefeitura', 'secretaria', 'ministerio', 'governo', 'municipio', 'camara municipal',
+                       'assembleia legislativa', 'tribunal', 'autarquia')
+PADRAO_NOME_SETOR_PUBLICO = re.compile(r'\b(?:' + '|'.join(NOMES_SETOR_PUBLICO) + r')\b')
+DOMINIOS_SETOR_PUBLICO = ('.gov.br', '.gov', '.leg.br', '.jus.br', '.mil.br', '.mp.br')
+
+
+def _radical_token(palavra):
+    # Além do plural, ignora o gênero ("financeiro" / "financeira")
+    radical = _radical(palavra)
+    return radical[:-1] if len(radical) > 5 and radical[-1] in 'ao' else radical
+
+
+def _tokens(texto, normalizado=False):
+    palavras = re.findall(r'[a-z0-9&]+(?:-[a-z0-9]+)*', texto if normalizado else normalizar(texto))  # "e-commerce" é uma palavra só
+    return frozenset(_radical_token(p) for p in palavras if len(p) > 1 and p not in PALAVRAS_IGNORADAS)
+
+
+class PreClassificadorICP:
+    """Decide localmente as empresas cujo segmento, nome ou domínio deixam o veredicto evidente.
+
+    As palavras-chave dos segmentos desejados ficam num índice radical -> palavras-chave; a confiança
+    de uma empresa é a maior cobertura ponderada (`PESOS_CAMPOS`) de uma palavra-chave pelos seus campos.
+    """
+
+    def __init__(self, palavras_chave, segmentos_excluidos):
+        self.palavras_chave = palavras_chave  # [(texto normalizado, radicais)]
+        self.segmentos_excluidos = segmentos_excluidos
+        self.indice = {}
+        for posicao, (_, radicais) in enumerate(palavras_chave):
+            for radical in radicais:
+                self.indice.setdefault(radical, set()).add(posicao)
+        self.exclui_setor_publico = any(
+            radical.startswith(RADICAIS_SETOR_PUBLICO) for radicais in segmentos_excluidos for radical in radicais
+        )
+        self._cache_segmentos = {}
+
+    def _coberturas(self, tokens):
+        # Fração dos radicais de cada palavra-chave candidata presentes em `tokens`
+        candidatas = set().union(*(self.indice.get(t, ()) for t in tokens)) if tokens else set()
+        return {k: len(tokens & self.palavras_chave[k][1]) / len(self.palavras_chave[k][1]) for k in candidatas}
+
+    def _segmento(self, segmento):
+        # Poucos segmentos distintos (traduzidos na Estação 1): tokens e coberturas são calculados uma vez por valor
+        if segmento not in self._cache_segmentos:
+            texto = normalizar(segmento)
+            tokens = _tokens(texto, normalizado=True)
+            coberturas = self._coberturas(tokens)
+            for k, (palavra, _) in enumerate(self.palavras_chave):
+                if texto == palavra:
+                    coberturas[k] = 1.0
+            self._cache_segmentos[segmento] = (coberturas, self._exclusao_por_tokens(tokens))
+        return self._cache_segmentos[segmento]
+
+    def _dominio_contem(self, dominio):
+        # Domínios costumam juntar palavras ("acmelogistica.com.br"): busca por substring nos rótulos
+        rotulos = dominio.split('.')[0] if dominio else ''
+        return {k for k, (_, radicais) in enumerate(self.palavras_chave)
+                if rotulos and all(len(r) >= 4 and r in rotulos for r in radicais)}
+
+    def _exclusao_por_tokens(self, tokens):
+        for radicais in self.segmentos_excluidos:
+            if all(any(t.startswith(r) for t in tokens) for r in radicais):
+                return f"contém '{' '.join(radicais)}', excluído pelas observações do ICP"
+        return None
+
+    def _exclusao(self, exclusao_segmento, nome, nome_normalizado, tokens_nome, dominio):
+        motivo = exclusao_segmento or (self._exclusao_por_tokens(tokens_nome) if tokens_nome else None)
+        if motivo is None and self.exclui_setor_publico:
+            if dominio.endswith(DOMINIOS_SETOR_PUBLICO):
+                motivo = f"domínio {dominio} é de órgão público"
+            elif PADRAO_NOME_SETOR_PUBLICO.search(nome_normalizado):
+                motivo = f"'{nome}' é órgão público"
+        return motivo
+
+    def classificar(self, segmento='', nome='', dominio=''):
+        """Retorna a análise local (no formato da IA, com `codigo` e `confianca`) ou None se o caso for ambíguo."""
+        segmento, nome, dominio = (str(v) if v is not None and not pd.isna(v) else '' for v in (segmento, nome, dominio))
+        por_segmento, exclusao_segmento = self._segmento(segmento)
+        nome_normalizado = normalizar(nome)
+        tokens_nome = _tokens(nome_normalizado, normalizado=True)
+        motivo_exclusao = self._exclusao(exclusao_segmento, nome, nome_normalizado, tokens_nome, dominio)
+        if motivo_exclusao:
+            codigo = CODIGOS_PRE_CLASSIFICACAO['exclusao']
+            return {"is_segmento_correto": False, "motivo_segmento": f"[{codigo}] {motivo_exclusao}",
+                    "codigo": codigo, "confianca": 1.0}
+
+        por_nome = self._coberturas(tokens_nome)
+        por_dominio = self._dominio_contem(dominio)
+        melhor, confianca = None, 0.0
+        for k in set(por_segmento) | set(por_nome) | por_dominio:
+            valor = (PESOS_CAMPOS['segmento'] * por_segmento.get(k, 0.0) + PESOS_CAMPOS['nome'] * por_nome.get(k, 0.0)
+                     + PESOS_CAMPOS['dominio'] * (k in por_dominio))
+            if valor > confianca:
+                melhor, confianca = k, valor
+        if confianca < LIMITE_CONFIANCA_LOCAL:
+            return None
+        evidencias = [descricao for descricao, casou in (
+            (f"segmento '{segmento}'", por_segmento.get(melhor, 0.0) > 0),
+            (f"nome '{nome}'", por_nome.get(melhor, 0.0) > 0),
+            (f"domínio {dominio}", melhor in por_dominio),
+        ) if casou]
+        codigo = CODIGOS_PRE_CLASSIFICACAO['segmento']
+        return {"is_segmento_correto": True,
+                "motivo_segmento": f"[{codigo}] {' e '.join(evidencias)} {'correspondem' if len(evidencias) > 1 else 'corresponde'} "
+                                   f"a '{self.palavras_chave[melhor][0]}' do ICP",
+                "codigo": codigo, "confianca": round(min(confianca, 1.0), 2)}
+
+
+def compilar_preclassificador(segmentos, observacoes=''):
+    """Interpreta os segmentos desejados (separados por vírgula) e as exclusões das observações."""
+    palavras_chave = []
+    for termo in str(segmentos or '').split(','):
+        radicais = _tokens(termo)
+        if radicais:
+            palavras_chave.append((normalizar(termo), radicais))
+    return PreClassificadorICP(palavras_chave, _interpretar_exclusoes(observacoes))
@@ -0,0 +1,172 @@
+# Formatos de troca entre as estações: Parquet (colunar, com tipos e categorias preservados) como formato
+# principal de upload, passagem e download; CSV e Excel gerados só quando pedidos e guardados por versão.
+import io
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+ASSINATURA_PARQUET = b'PAR1'
+COMPRESSAO_PARQUET = 'zstd'
+VERSAO_FORMATO = '1'
+# Colunas repetitivas gravadas como dicionário (viram `category` na leitura), mesmo quando o DataFrame não é compacto
+COLUNAS_CATEGORICAS = [
+    'Cargo', 'Segmento_Original', 'Numero_Funcionarios', 'Cidade_Contato', 'Estado_Contato', 'Pais_Contato',
+    'Cidade_Empresa', 'Estado_Empresa', 'Pais_Empresa', 'classificacao_icp',
+]
+MAX_LINHAS_EXCEL = 1_048_575  # limite de linhas de uma planilha, sem o cabeçalho
+EXPORTACOES_EM_CACHE = 4
+
+FORMATOS_EXPORTACAO = {
+    'csv': ('csv', 'text/csv'),
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'excel': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+
+
+# --- LEITURA ---
+
+def eh_parquet(arquivo):
+    """Verifica pela assinatura (e não pela extensão) se o arquivo, caminho ou upload, é Parquet."""
+    if isinstance(arquivo, (str, os.PathLike)):
+        with open(arquivo, 'rb') as entrada:
+            return entrada.read(4) == ASSINATURA_PARQUET
+    arquivo.seek(0)
+    inicio = arquivo.read(4)
+    arquivo.seek(0)
+    return inicio == ASSINATURA_PARQUET
+
+
+def ler_parquet(arquivo):
+    if not isinstance(arquivo, (str, os.PathLike)):
+        arquivo.seek(0)
+    return pd.read_parquet(arquivo)
+
+
+def amostra_parquet(caminho, linhas=10):
+    """Primeiras `linhas` de um Parquet em disco, sem ler o arquivo inteiro."""
+    arquivo = pq.ParquetFile(caminho)
+    lote = next(arquivo.iter_batches(batch_size=linhas), None)
+    return lote.to_pandas() if lote is not None else arquivo.schema_arrow.empty_table().to_pandas()
+
+
+# --- ESCRITA ---
+
+def _metadados_arrow(metadados=None):
+    extras = {'formato': VERSAO_FORMATO, **(metadados or {})}
+    return {f'agente_ldr.{chave}'.encode(): str(valor).encode() for chave, valor in extras.items()}
+
+
+def esquema_arrow(df, metadados=None):
+    """Esquema Arrow do DataFrame (categorias como dicionário), com a versão do formato nos metadados."""
+    esquema = pa.Schema.from_pandas(df, preserve_index=False)
+    return esquema.with_metadata({**(esquema.metadata or {}), **_metadados_arrow(metadados)})
+
+
+def parquet_bytes(df, metadados=None):
+    tabela = pa.Table.from_pandas(df, schema=esquema_arrow(df, metadados), preserve_index=False)
+    saida = io.BytesIO()
+    pq.write_table(tabela, saida, compression=COMPRESSAO_PARQUET)
+    return saida.getvalue()
+
+
+def gravar_parquet(df, caminho, metadados=None):
+    with open(caminho, 'wb') as saida:
+        saida.write(parquet_bytes(df, metadados))
+
+
+def csv_bytes(df):
+    """CSV no formato das estações: ';' e UTF-8 com BOM (abre direto no Excel em português)."""
+    return df.to_csv(sep=';', index=False).encode('utf-8-sig')
+
+
+def excel_bytes(df):
+    if len(df) > MAX_LINHAS_EXCEL:
+        raise ValueError(f"O Excel comporta até {MAX_LINHAS_EXCEL:,} linhas; use CSV ou Parquet.".replace(',', '.'))
+    saida = io.BytesIO()
+    df.to_excel(saida, index=False, engine='openpyxl')
+    return saida.getvalue()
+
+
+EXPORTADORES = {'csv': csv_bytes, 'parquet': parquet_bytes, 'excel': excel_bytes}
+
+
+class EscritorParquetEmBlocos:
+    """Grava blocos com as mesmas colunas num único Parquet, um row group por bloco.
+
+    As `COLUNAS_CATEGORICAS` presentes viram dicionário e as demais texto; o esquema é fixado no primeiro bloco.
+    """
+
+    def __init__(self, caminho, metadados=None):
+        self.caminho = caminho
+        self.metadados = metadados
+        self._escritor = None
+        self._esquema = None
+
+    def escrever(self, bloco):
+        if self._escritor is None:
+            campos = [(col, pa.dictionary(pa.int32(), pa.string()) if col in COLUNAS_CATEGORICAS else pa.string()) for col in bloco.columns]
+            self._esquema = pa.schema(campos, metadata=_metadados_arrow(self.metadados))
+            self._escritor = pq.ParquetWriter(self.caminho, self._esquema, compression=COMPRESSAO_PARQUET)
+        self._escritor.write_table(pa.Table.from_pandas(bloco, schema=self._esquema, preserve_index=False))
+
+    def fechar(self):
+        if self._escritor is not None:
+            self._escritor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.fechar()
+
+
+# --- EXPORTAÇÃO SOB DEMANDA ---
+# Os botões de download recebem uma função, e não os bytes: o arquivo só é gerado quando o usuário
+# clica, e o resultado fica guardado pela versão do conjunto de dados (reruns não o refazem).
+
+_exportacoes = OrderedDict()
+_trava_exportacoes = threading.Lock()
+
+
+def exportar(df, formato, versao=None):
+    """Bytes do DataFrame em `formato` ('csv', 'parquet' ou 'excel'); com `versao`, reaproveita a última geração dessa versão."""
+    if versao is None:
+        return EXPORTADORES[formato](df)
+    chave = (versao, formato)
+    with _trava_exportacoes:
+        if chave in _exportacoes:
+            _exportacoes.move_to_end(chave)
+            return _exportacoes[chave]
+    conteudo = EXPORTADORES[formato](df)
+    with _trava_exportacoes:
+        _exportacoes[chave] = conteudo
+        while len(_exportacoes) > EXPORTACOES_EM_CACHE:
+            _exportacoes.popitem(last=False)
+    return conteudo
+
+
+def exportador(obter_df, formato, versao):
+    """Função sem argumentos para o `data` de `st.download_button`; `obter_df` só é chamada no clique."""
+    return lambda: exportar(obter_df() if callable(obter_df) else obter_df, formato, versao)
+
+
+def exportar_parquet_como_csv(caminho):
+    """Converte um Parquet em disco para o CSV das estações em blocos, sem carregá-lo inteiro; devolve o caminho do CSV.
+
+    O CSV fica ao lado do Parquet e só é refeito quando o Parquet muda.
+    """
+    destino = os.path.splitext(caminho)[0] + '.csv'
+    if os.path.exists(destino) and os.path.getmtime(destino) >= os.path.getmtime(caminho):
+        return destino
+    arquivo = pq.ParquetFile(caminho)
+    descritor, temporario = tempfile.mkstemp(suffix='.csv', dir=os.path.dirname(caminho) or None)
+    with os.fdopen(descritor, 'w', encoding='utf-8-sig', newline='') as saida:
+        for grupo in range(arquivo.num_row_groups):
+            arquivo.read_row_group(grupo).to_pandas().to_csv(saida, sep=';', index=False, header=grupo == 0)
+    os.replace(temporario, destino)
+    return destino
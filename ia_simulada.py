@@ -0,0 +1,212 @@
+# Substituto do `genai.GenerativeModel` para benchmarks e execuções sem chave de API: responde no formato
+# esperado pelos prompts do Agente LDR, com latência, erros e respostas 429 configuráveis.
+import contextlib
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+
+import google.generativeai as genai
+
+
+def _fracao(chave):
+    """Número em [0, 1) estável para a mesma chave."""
+    return int.from_bytes(hashlib.sha256(str(chave).encode('utf-8')).digest()[:4], 'big') / 2 ** 32
+
+
+class ErroCotaSimulado(Exception):
+    """Equivalente ao ResourceExhausted (429) da API; `code` é lido por `eh_erro_transitorio`."""
+    code = 429
+
+
+class ErroSimulado(Exception):
+    """Falha não transitória (ex.: resposta bloqueada), que não é refeita."""
+
+
+class UsoSimulado:
+    """Como o `usage_metadata` da API, com tokens estimados em 4 caracteres cada."""
+
+    def __init__(self, prompt, texto):
+        self.prompt_token_count = len(prompt) // 4
+        self.candidates_token_count = len(texto) // 4
+        self.total_token_count = self.prompt_token_count + self.candidates_token_count
+
+
+class CandidatoSimulado:
+    def __init__(self, finish_reason):
+        self.finish_reason = finish_reason
+
+
+class RespostaSimulada:
+    """Como a resposta da API: `finish_reason` do candidato é 'MAX_TOKENS' quando o texto foi cortado no teto."""
+
+    def __init__(self, texto, prompt='', finish_reason='STOP'):
+        self.text = texto
+        self.usage_metadata = UsoSimulado(prompt, texto)
+        self.candidates = [CandidatoSimulado(finish_reason)]
+
+
+class ConfiguracaoSimulada:
+    """Comportamento e contadores compartilhados por todos os modelos simulados criados enquanto ela está instalada.
+
+    - `latencia` / `variacao`: segundos por chamada (uniforme entre latencia ± variacao), mais
+      `latencia_por_item` para cada empresa de um lote;
+    - `taxa_erro`: fração de chamadas que falham sem ser transitórias;
+    - `taxa_429`: fração de chamadas recusadas por cota; com `limite_rpm`, também são recusadas as
+      chamadas acima desse número nos últimos 60 segundos, como a cota real da API;
+    - `fracao_dentro`: fração das empresas classificadas como dentro do ICP (decisão estável por site);
+    - `fracao_dificil`: fração das empresas difíceis (as mesmas para todos os modelos), em que o modelo acerta
+      com probabilidade `acerto_dificil` e informa `confianca_dificil` (nas fáceis, acerta com `confianca_facil`);
+    - `taxa_malformada`: fração das empresas respondidas sem veredicto booleano nem confiança.
+    A confiança só vai na resposta quando o prompt a pede.
+    """
+
+    def __init__(self, latencia=0.2, variacao=0.0, latencia_por_item=0.0, taxa_erro=0.0, taxa_429=0.0,
+                 limite_rpm=None, fracao_dentro=0.5, fracao_dificil=0.0, acerto_dificil=1.0, confianca_facil=0.9,
+                 confianca_dificil=0.5, taxa_malformada=0.0, semente=0):
+        self.latencia = latencia
+        self.variacao = variacao
+        self.latencia_por_item = latencia_por_item
+        self.taxa_erro = taxa_erro
+        self.taxa_429 = taxa_429
+        self.limite_rpm = limite_rpm
+        self.fracao_dentro = fracao_dentro
+        self.fracao_dificil = fracao_dificil
+        self.acerto_dificil = acerto_dificil
+        self.confianca_facil = confianca_facil
+        self.confianca_dificil = confianca_dificil
+        self.taxa_malformada = taxa_malformada
+        self._aleatorio = random.Random(semente)
+        self._janela = deque()
+        self._trava = threading.Lock()
+        self.chamadas = 0
+        self.erros = 0
+        self.erros_429 = 0
+        self.itens = 0
+        self.segundos = 0.0
+
+    def _sortear(self):
+        with self._trava:
+            self.chamadas += 1
+            agora = time.monotonic()
+            while self._janela and agora - self._janela[0] >= 60:
+                self._janela.popleft()
+            acima_da_cota = self.limite_rpm is not None and len(self._janela) >= self.limite_rpm
+            if not acima_da_cota:
+                self._janela.append(agora)
+            sorteio = self._aleatorio.random()
+            atraso = max(0.0, self.latencia + self._aleatorio.uniform(-self.variacao, self.variacao))
+        if acima_da_cota or sorteio < self.taxa_429:
+            return 'cota', atraso
+        if sorteio < self.taxa_429 + self.taxa_erro:
+            return 'erro', atraso
+        return 'ok', atraso
+
+    def dentro_do_icp(self, chave):
+        # Estável entre chamadas e execuções: o mesmo site recebe sempre o mesmo veredicto
+        return _fracao(chave) < self.fracao_dentro
+
+    def veredicto(self, chave, modelo=None):
+        """(dentro do ICP, confiança) que o `modelo` responde para `chave`; None se a resposta sair malformada."""
+        with self._trava:
+            malformada = self._aleatorio.random() < self.taxa_malformada
+        if malformada:
+            return None
+        correto = self.dentro_do_icp(chave)
+        if _fracao(f"dificil|{chave}") >= self.fracao_dificil:
+            return correto, self.confianca_facil
+        acerta = _fracao(f"{modelo}|{chave}") < self.acerto_dificil
+        return (correto if acerta else not correto), self.confianca_dificil
+
+    def resumo(self):
+        return {'chamadas': self.chamadas, 'erros': self.erros, 'erros_429': self.erros_429,
+                'itens': self.itens, 'segundos_simulados': round(self.segundos, 3)}
+
+
+class ModeloSimulado:
+    """Mesma interface usada de `genai.GenerativeModel`: `generate_content(prompt, generation_config=None, request_options=None)`.
+
+    Como a API, corta a resposta em `max_output_tokens` (e o JSON cortado chega malformado).
+    """
+
+    configuracao = ConfiguracaoSimulada()
+
+    def __init__(self, model_name=None, configuracao=None, **_):
+        self.model_name = model_name
+        if configuracao is not None:
+            self.configuracao = configuracao
+
+    def generate_content(self, prompt, generation_config=None, request_options=None, **_):
+        config = self.configuracao
+        resultado, atraso = config._sortear()
+        linhas_empresas = [linha.strip() for linha in prompt.splitlines() if linha.strip().startswith('{"id"')]
+        atraso += config.latencia_por_item * len(linhas_empresas)
+        time.sleep(atraso)
+        with config._trava:
+            config.segundos += atraso
+            config.itens += max(1, len(linhas_empresas))
+            if resultado == 'cota':
+                config.erros_429 += 1
+            elif resultado == 'erro':
+                config.erros += 1
+        if resultado == 'cota':
+            raise ErroCotaSimulado("429 Resource has been exhausted (simulado)")
+        if resultado == 'erro':
+            raise ErroSimulado("Resposta bloqueada (simulado)")
+        texto = self._responder(prompt, linhas_empresas)
+        max_tokens = (generation_config or {}).get('max_output_tokens')
+        if max_tokens is not None and len(texto) // 4 > max_tokens:
+            return RespostaSimulada(texto[:max_tokens * 4], prompt, 'MAX_TOKENS')
+        return RespostaSimulada(texto, prompt)
+
+    def _analise(self, chave, pedir_confianca):
+        resposta = self.configuracao.veredicto(chave, self.model_name)
+        if resposta is None:
+            return {"is_segmento_correto": "talvez", "motivo_segmento": "Resposta incompleta (simulado)"}
+        dentro, confianca = resposta
+        analise = {"is_segmento_correto": dentro, "motivo_segmento": "Atende ao ICP (simulado)" if dentro else "Fora do ICP (simulado)"}
+        if pedir_confianca:
+            analise["confianca"] = confianca
+        return analise
+
+    def _responder(self, prompt, linhas_empresas):
+        pedir_confianca = '"confianca"' in prompt
+        if linhas_empresas:  # lote: um objeto por id recebido
+            respostas = []
+            for linha in linhas_empresas:
+                empresa = json.loads(linha)
+                respostas.append({"id": empresa['id'], **self._analise(empresa.get('site'), pedir_confianca)})
+            return "```json\n" + json.dumps(respostas, ensure_ascii=False) + "\n```"
+        if 'is_segmento_correto' not in prompt:  # resumo do ICP
+            return "ICP simulado: empresas de médio e grande porte dos segmentos informados."
+        # A chave é a primeira palavra do material (a URL ou o começo do texto): estável quando o texto é cortado
+        material = re.search(r'material: "(.*?)"', prompt, re.DOTALL)
+        chave = (material.group(1).split() or [''])[0] if material else prompt
+        return json.dumps(self._analise(chave, pedir_confianca))
+
+
+class BackendSimulado:
+    """Backend de uma camada do roteamento (ver `roteamento.Camada`): cria modelos simulados com configuração própria."""
+
+    def __init__(self, **opcoes):
+        self.configuracao = ConfiguracaoSimulada(**opcoes)
+
+    def __call__(self, nome_modelo):
+        return ModeloSimulado(nome_modelo, self.configuracao)
+
+
+@contextlib.contextmanager
+def modelo_simulado(**opcoes):
+    """Substitui `genai.GenerativeModel` pelo `ModeloSimulado` durante o bloco e devolve a configuração (com os contadores)."""
+    configuracao = ConfiguracaoSimulada(**opcoes)
+    original_modelo, original_configuracao = genai.GenerativeModel, ModeloSimulado.configuracao
+    ModeloSimulado.configuracao = configuracao
+    genai.GenerativeModel = ModeloSimulado
+    try:
+        yield configuracao
+    finally:
+        genai.GenerativeModel = original_modelo
+        ModeloSimulado.configuracao = original_configuracao
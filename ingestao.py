@@ -0,0 +1,147 @@
+# Leitura de exports CSV (detecção de separador/codificação) ou Parquet e limpeza em blocos com gravação incremental.
+import codecs
+import csv
+import io
+import os
+import time
+
+import pandas as pd
+
+from formatos import EscritorParquetEmBlocos, eh_parquet, ler_parquet
+from limpeza import limpar_dataframe
+from metricas import cronometrar
+
+SEPARADORES = ',;\t|'
+CODIFICACOES = ['utf-8-sig', 'utf-8', 'cp1252', 'latin-1']
+TAMANHO_AMOSTRA = 64 * 1024
+LINHAS_POR_BLOCO = 50_000
+
+
+def _abrir_binario(arquivo):
+    """Aceita caminho ou objeto de arquivo (ex.: UploadedFile do Streamlit) e devolve (arquivo, deve_fechar)."""
+    if isinstance(arquivo, (str, os.PathLike)):
+        return open(arquivo, 'rb'), True
+    arquivo.seek(0)
+    return arquivo, False
+
+
+def _tamanho_total(arquivo):
+    posicao = arquivo.tell()
+    arquivo.seek(0, io.SEEK_END)
+    tamanho = arquivo.tell()
+    arquivo.seek(posicao)
+    return tamanho
+
+
+def detectar_formato(arquivo, tamanho_amostra=TAMANHO_AMOSTRA):
+    """Lê só os primeiros KB do arquivo e retorna `(separador, codificacao)`."""
+    arquivo, deve_fechar = _abrir_binario(arquivo)
+    try:
+        amostra = arquivo.read(tamanho_amostra)
+        arquivo.seek(0)
+    finally:
+        if deve_fechar:
+            arquivo.close()
+    if isinstance(amostra, str):
+        texto, codificacao = amostra, 'utf-8'
+    else:
+        texto, codificacao = None, None
+        for candidata in CODIFICACOES:
+            if candidata == 'utf-8-sig' and not amostra.startswith(codecs.BOM_UTF8):
+                continue
+            try:
+                # final=False: um caractere multibyte cortado no fim da amostra não conta como erro
+                texto = codecs.getincrementaldecoder(candidata)().decode(amostra, final=False)
+                codificacao = candidata
+                break
+            except UnicodeDecodeError:
+                continue
+
+    linhas = texto.splitlines()
+    if len(linhas) > 1 and not texto.endswith(('\n', '\r')):
+        linhas = linhas[:-1]  # descarta a última linha, provavelmente incompleta
+    try:
+        separador = csv.Sniffer().sniff('\n'.join(linhas[:50]), delimiters=SEPARADORES).delimiter
+    except csv.Error:
+        cabecalho = linhas[0] if linhas else ''
+        separador = max(SEPARADORES, key=cabecalho.count)
+    return separador, codificacao
+
+
+def ler_csv(arquivo, **kwargs):
+    """Lê o CSV inteiro numa única passada, com separador e codificação detectados.
+
+    As colunas são lidas como texto, como em `limpar_csv_em_blocos`: os dois modos da Estação 1 limpam
+    os mesmos valores (ex.: funcionários '120', e não '120.0' numa coluna com células vazias).
+    """
+    separador, codificacao = detectar_formato(arquivo)
+    arquivo, deve_fechar = _abrir_binario(arquivo)
+    kwargs.setdefault('dtype', str)
+    try:
+        df = pd.read_csv(arquivo, sep=separador, encoding=codificacao, on_bad_lines='skip', low_memory=False, **kwargs)
+    finally:
+        if deve_fechar:
+            arquivo.close()
+    df.columns = df.columns.str.strip()
+    return df
+
+
+def ler_leads(arquivo):
+    """Lê um arquivo de leads em Parquet (com os tipos gravados) ou CSV (separador e codificação detectados)."""
+    return ler_parquet(arquivo) if eh_parquet(arquivo) else ler_csv(arquivo)
+
+
+def limpar_csv_em_blocos(arquivo, destino, mapa_cidades=None, mapa_estados=None, linhas_por_bloco=LINHAS_POR_BLOCO, ao_progredir=None,
+                         metricas=None):
+    """Limpa um CSV grande bloco a bloco e grava o resultado incrementalmente em `destino`.
+
+    Com `destino` terminado em '.parquet', cada bloco vira um row group (colunas repetitivas como
+    categoria, ver `formatos.EscritorParquetEmBlocos`); senão, CSV com ';' e UTF-8 com BOM.
+    Só um bloco fica em memória por vez. As colunas são lidas como texto para que todos os blocos
+    tenham o mesmo tipo (ex.: funcionários saem como '120', e não '120.0' em alguns blocos).
+    `ao_progredir(linhas, fracao_lida)` é chamado após cada bloco. Retorna um resumo da execução.
+    Com `metricas`, registra por bloco a leitura, cada etapa da limpeza e a gravação.
+    """
+    inicio = time.perf_counter()
+    separador, codificacao = detectar_formato(arquivo)
+    entrada, deve_fechar = _abrir_binario(arquivo)
+    total_bytes = _tamanho_total(entrada)
+    linhas = blocos = 0
+    colunas = []
+    try:
+        leitor = pd.read_csv(
+            entrada, sep=separador, encoding=codificacao, on_bad_lines='skip',
+            dtype=str, chunksize=linhas_por_bloco,
+        )
+        em_parquet = destino.lower().endswith('.parquet')
+        with (EscritorParquetEmBlocos(destino) if em_parquet else open(destino, 'w', encoding='utf-8-sig', newline='')) as saida:
+            while True:
+                with cronometrar(metricas, 'limpeza.leitura_csv'):
+                    bloco = next(leitor, None)
+                if bloco is None:
+                    break
+                bloco.columns = bloco.columns.str.strip()
+                bloco_limpo = limpar_dataframe(bloco, mapa_cidades, mapa_estados, metricas=metricas)
+                with cronometrar(metricas, 'limpeza.gravacao'):
+                    if em_parquet:
+                        saida.escrever(bloco_limpo)
+                    else:
+                        bloco_limpo.to_csv(saida, sep=';', index=False, header=blocos == 0)
+                colunas = list(bloco_limpo.columns)
+                linhas += len(bloco_limpo)
+                blocos += 1
+                if ao_progredir:
+                    ao_progredir(linhas, min(1.0, entrada.tell() / total_bytes) if total_bytes else 1.0)
+    finally:
+        if deve_fechar:
+            entrada.close()
+    return {
+        'linhas': linhas,
+        'blocos': blocos,
+        'colunas': colunas,
+        'separador': separador,
+        'codificacao': codificacao,
+        'segundos': time.perf_counter() - inicio,
+        'bytes_entrada': total_bytes,
+        'bytes_saida': os.path.getsize(destino),
+    }
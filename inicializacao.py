@@ -0,0 +1,107 @@
+# Partida rápida: os módulos pesados (cliente da IA, requests) e as tabelas de consulta (localidades do IBGE)
+# não são carregados no import das páginas, e sim no primeiro uso ou por uma thread de aquecimento
+# iniciada na primeira renderização de qualquer página do servidor.
+import importlib
+import os
+import threading
+import time
+
+# Ordem de aquecimento: o que a primeira página provavelmente usa vem antes
+MODULOS_AQUECIMENTO = ('pandas', 'requests', 'google.generativeai')
+VARIAVEL_SEM_AQUECIMENTO = 'AGENTE_LDR_SEM_AQUECIMENTO'  # '1' desliga a thread (benchmarks de partida)
+
+
+class ModuloSobDemanda:
+    """Representa um módulo que só é importado no primeiro acesso a um atributo.
+
+    Atribuições são repassadas ao módulo real, então substituições como `genai.GenerativeModel = ...`
+    (ver `ia_simulada`) continuam valendo para quem usa o módulo por aqui.
+    """
+
+    def __init__(self, nome):
+        object.__setattr__(self, '_nome', nome)
+
+    def _modulo(self):
+        return importlib.import_module(self._nome)  # o próprio `sys.modules` guarda o módulo depois do primeiro import
+
+    def __getattr__(self, atributo):
+        return getattr(self._modulo(), atributo)
+
+    def __setattr__(self, atributo, valor):
+        setattr(self._modulo(), atributo, valor)
+
+    def __delattr__(self, atributo):
+        delattr(self._modulo(), atributo)
+
+    def __repr__(self):
+        return f"<módulo sob demanda '{self._nome}'>"
+
+
+def sob_demanda(nome):
+    return ModuloSobDemanda(nome)
+
+
+class RecursoSobDemanda:
+    """Valor caro de construir, criado uma única vez por processo: no primeiro `obter()` ou no aquecimento."""
+
+    def __init__(self, nome, construir):
+        self.nome = nome
+        self._construir = construir
+        self._trava = threading.Lock()
+        self._pronto = threading.Event()
+        self._valor = None
+
+    def obter(self):
+        if not self._pronto.is_set():
+            with self._trava:  # quem chega durante a construção espera por ela em vez de construir de novo
+                if not self._pronto.is_set():
+                    self._valor = self._construir()
+                    self._pronto.set()
+        return self._valor
+
+    def pronto(self):
+        return self._pronto.is_set()
+
+
+def _carregar_localidades():
+    from localidades import carregar_localidades
+    return carregar_localidades()
+
+
+LOCALIDADES = RecursoSobDemanda('localidades', _carregar_localidades)
+RECURSOS_AQUECIMENTO = (LOCALIDADES,)
+
+_tempos_aquecimento = {}
+_thread_aquecimento = None
+_trava_aquecimento = threading.Lock()
+
+
+def _aquecer(modulos, recursos):
+    for nome in modulos:
+        inicio = time.perf_counter()
+        try:
+            importlib.import_module(nome)
+        except ImportError:
+            continue  # o erro aparece de novo, com contexto, no primeiro uso real
+        _tempos_aquecimento[nome] = time.perf_counter() - inicio
+    for recurso in recursos:
+        inicio = time.perf_counter()
+        recurso.obter()
+        _tempos_aquecimento[recurso.nome] = time.perf_counter() - inicio
+
+
+def iniciar_aquecimento(modulos=MODULOS_AQUECIMENTO, recursos=RECURSOS_AQUECIMENTO):
+    """Inicia (uma vez por processo) a thread que importa `modulos` e constrói `recursos` em segundo plano."""
+    global _thread_aquecimento
+    if os.environ.get(VARIAVEL_SEM_AQUECIMENTO) == '1':
+        return None
+    with _trava_aquecimento:
+        if _thread_aquecimento is None:
+            _thread_aquecimento = threading.Thread(target=_aquecer, args=(modulos, recursos), name='aquecimento', daemon=True)
+            _thread_aquecimento.start()
+    return _thread_aquecimento
+
+
+def tempos_aquecimento():
+    """Segundos gastos em cada módulo e recurso já aquecidos (o que já estava carregado conta ~0)."""
+    return dict(_tempos_aquecimento)
@@ -0,0 +1,460 @@
+# --- MOTOR DE LIMPEZA DA ESTAÇÃO 1 ---
+# Funções de padronização (versão por valor) e o motor vetorizado que as aplica a colunas inteiras.
+import multiprocessing
+import os
+import re
+import sys
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from busca_aproximada import MapaAproximado
+from dados_traducao import DICIONARIO_SEGMENTOS
+from metricas import cronometrar
+
+MAPA_COLUNAS = {
+    'First Name': 'Nome_Lead', 'Last Name': 'Sobrenome_Lead', 'Title': 'Cargo',
+    'Company': 'Nome_Empresa', 'Email': 'Email_Lead', 'Corporate Phone': 'Telefone_Original',
+    'Industry': 'Segmento_Original', 'City': 'Cidade_Contato', 'State': 'Estado_Contato',
+    'Country': 'Pais_Contato', 'Company City': 'Cidade_Empresa', 'Company State': 'Estado_Empresa',
+    'Company Country': 'Pais_Empresa', 'Website': 'Site_Original', '# Employees': 'Numero_Funcionarios',
+    'Person Linkedin Url': 'Linkedin_Contato', 'Company Linkedin Url': 'LinkedIn_Empresa',
+    'Facebook Url': 'Facebook_Empresa'
+}
+
+ORDEM_FINAL_DESEJADA = [
+    'Nome_Completo', 'Cargo', 'Email_Lead', 'Nome_Empresa', 'Site_Original',
+    'Telefone_Original', 'Cidade_Contato', 'Estado_Contato', 'Pais_Contato',
+    'Segmento_Original', 'Cidade_Empresa', 'Estado_Empresa', 'Pais_Empresa',
+    'Numero_Funcionarios', 'Linkedin_Contato', 'LinkedIn_Empresa', 'Facebook_Empresa'
+]
+
+CONECTIVOS_NOME = ['de', 'da', 'do', 'dos', 'das']
+# Aplicadas em sequência (e não como uma única alternância) para manter o resultado idêntico
+# nos casos em que a remoção de uma sigla expõe outra.
+SIGLAS_EMPRESA = tuple(
+    re.compile(sigla, flags=re.IGNORECASE)
+    for sigla in [r'\sS/A', r'\sS\.A', r'\sSA\b', r'\sLTDA', r'\sLtda', r'\sME\b', r'\sEIRELI', r'\sEPP', r'\sMEI\b']
+)
+PADRAO_PROTOCOLO = re.compile(r'^(https?://)?')
+PADRAO_NAO_DIGITO = re.compile(r'\D')
+PADRAO_STATE_OF = re.compile(r'state of ')
+MAPA_PAISES = {'br': 'Brasil', 'bra': 'Brasil', 'brazil': 'Brasil'}
+PADRAO_E_COMERCIAL = re.compile(r'\s*&\s*')
+
+
+def preparar_segmento(chave):
+    """Trata 'information technology & services' e '... and services' como a mesma chave."""
+    return ' '.join(PADRAO_E_COMERCIAL.sub(' and ', chave).split())
+
+
+DICIONARIO_SEGMENTOS_APROXIMADO = MapaAproximado(DICIONARIO_SEGMENTOS, preparar=preparar_segmento)
+
+
+# --- FUNÇÃO DE APOIO PARA NORMALIZAÇÃO ---
+def normalizar_texto_para_comparacao(texto):
+    """Remove acentos e converte para minúsculo para comparações internas."""
+    if pd.isna(texto): return ""
+    s = str(texto).lower().strip()
+    return ''.join(c for c in unicodedata.normalize('NFD', s) if unicodedata.category(c) != 'Mn')
+
+
+# --- FUNÇÕES DE PADRONIZAÇÃO (UM VALOR POR VEZ) ---
+
+def title_case_com_excecoes(s, excecoes):
+    palavras = str(s).split()
+    if not palavras:
+        return ""
+    resultado = [palavras[0].capitalize()]
+    for palavra in palavras[1:]:
+        if palavra.lower() in excecoes:
+            resultado.append(palavra.lower())
+        else:
+            resultado.append(palavra.capitalize())
+    return ' '.join(resultado)
+
+def padronizar_nome_contato(row, df_columns):
+    nome_col = next((col for col in df_columns if 'first name' in col.lower() or 'nome_lead' in col.lower()), None)
+    sobrenome_col = next((col for col in df_columns if 'last name' in col.lower() or 'sobrenome_lead' in col.lower()), None)
+    if not nome_col or pd.isna(row.get(nome_col)): return ''
+    primeiro_nome = str(row[nome_col]).split()[0]
+    sobrenome_completo = str(row.get(sobrenome_col, ''))
+    conectivos = CONECTIVOS_NOME
+    partes_sobrenome = [p for p in sobrenome_completo.split() if p.lower() not in conectivos]
+    ultimo_sobrenome = partes_sobrenome[-1] if partes_sobrenome else ''
+    nome_final = f"{primeiro_nome} {ultimo_sobrenome}".strip()
+    return nome_final.title()
+
+def padronizar_nome_empresa(nome_empresa):
+    if pd.isna(nome_empresa): return ''
+    nome_limpo = str(nome_empresa)
+    for sigla in SIGLAS_EMPRESA:
+        nome_limpo = sigla.sub('', nome_limpo)
+    return title_case_com_excecoes(nome_limpo.strip(), ['de', 'da', 'do', 'dos', 'das', 'e'])
+
+def cidade_no_brasil(pais):
+    """País (bruto ou já padronizado) vazio ou Brasil: só nesses casos a cidade é buscada nos municípios do IBGE."""
+    if pd.isna(pais) or str(pais).strip() in ('', 'nan'):
+        return True
+    chave = normalizar_texto_para_comparacao(str(pais))
+    return chave == 'brasil' or MAPA_PAISES.get(chave) == 'Brasil'
+
+def padronizar_localidade_geral(valor, tipo, mapa_cidades=None, mapa_estados=None):
+    if pd.isna(valor): return ''
+
+    chave_busca = normalizar_texto_para_comparacao(str(valor))
+
+    if tipo == 'cidade':
+        return (mapa_cidades or {}).get(chave_busca, title_case_com_excecoes(str(valor), ['de', 'da', 'do', 'dos', 'das']))
+    elif tipo == 'estado':
+        chave_busca_estado = PADRAO_STATE_OF.sub('', chave_busca).strip()
+        return (mapa_estados or {}).get(chave_busca_estado, title_case_com_excecoes(str(valor), ['de', 'do']))
+    elif tipo == 'pais':
+        return MAPA_PAISES.get(chave_busca, str(valor).capitalize())
+    return valor
+
+def padronizar_site(site):
+    if pd.isna(site) or str(site).strip() == '': return ''
+    site_limpo = str(site).strip()
+    site_limpo = PADRAO_PROTOCOLO.sub('', site_limpo)
+    site_limpo = site_limpo.rstrip('/')
+    if not site_limpo.lower().startswith('www.'):
+        site_limpo = 'www.' + site_limpo
+    return site_limpo
+
+def padronizar_telefone(telefone):
+    """Filtra e formata um número de telefone para o padrão brasileiro, removendo 0800 e internacionais."""
+    if pd.isna(telefone):
+        return ''
+
+    tel_str = str(telefone).strip()
+
+    # 1. Filtro inicial para números internacionais que começam com '+'
+    if tel_str.startswith('+') and not tel_str.startswith('+55'):
+        return ''
+
+    # 2. Limpa o número para ter apenas os dígitos
+    apenas_digitos = PADRAO_NAO_DIGITO.sub('', tel_str)
+
+    # 3. Normalização: Remove o código do país (55) se ele estiver presente no início
+    if apenas_digitos.startswith('55'):
+        apenas_digitos = apenas_digitos[2:]
+
+    # 4. REGRA DE REMOÇÃO 1: Ignora números 0800 (após normalização)
+    if apenas_digitos.startswith('0800'):
+        return ''
+
+    # 5. Normalização: Remove o '0' inicial de DDD, se houver
+    if len(apenas_digitos) == 11 and apenas_digitos.startswith('0'):
+        apenas_digitos = apenas_digitos[1:]
+
+    # 6. Validação final de tamanho: Se não for um número brasileiro válido, remove
+    if len(apenas_digitos) not in [10, 11]:
+        return ''
+
+    # 7. Formatação para o padrão brasileiro
+    if len(apenas_digitos) == 11:
+        return f"({apenas_digitos[:2]}) {apenas_digitos[2:7]}-{apenas_digitos[7:]}"
+    elif len(apenas_digitos) == 10:
+        # Check for 800 one last time, as some systems might omit the leading 0
+        if apenas_digitos.startswith('800'):
+            return ''
+        return f"({apenas_digitos[:2]}) {apenas_digitos[2:6]}-{apenas_digitos[6:]}"
+
+    return '' # Caso de segurança, retorna vazio se nada acima funcionar
+
+def padronizar_segmento(segmento):
+    """Traduz o segmento usando o dicionário interno."""
+    if pd.isna(segmento): return ''
+    segmento_norm = str(segmento).lower().strip()
+    return DICIONARIO_SEGMENTOS_APROXIMADO.get(segmento_norm, title_case_com_excecoes(segmento, []))
+
+
+# --- VERSÕES VETORIZADAS (UMA COLUNA INTEIRA POR VEZ) ---
+# Cada coluna é transformada só nos seus valores distintos e o resultado é redistribuído às linhas.
+# Valores ASCII passam por operações `.str` sobre strings Arrow; os demais usam a função por valor,
+# pois as regex do Arrow (RE2) não seguem a semântica Unicode do `re` em `\s`, `\D` e IGNORECASE.
+
+ESPACOS_ASCII = '\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f '  # o que `str.strip()` e `\s` removem em ASCII
+_CLASSE_ESPACOS_ASCII = r'[\t\n\x0b\x0c\r\x1c-\x1f ]'
+SIGLAS_EMPRESA_ASCII = tuple('(?i)' + sigla.pattern.replace(r'\s', _CLASSE_ESPACOS_ASCII) for sigla in SIGLAS_EMPRESA)
+
+def aplicar_por_valores_unicos(serie, func):
+    """Aplica `func` uma vez por valor distinto (incluindo nulos) e mapeia o resultado para todas as linhas."""
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=False)
+    transformados = func(pd.Series(np.asarray(unicos, dtype=object), dtype=object))
+    return pd.Series(np.asarray(transformados, dtype=object)[codigos], index=serie.index, dtype=object)
+
+def _por_valor(func):
+    return lambda unicos: [func(valor) for valor in unicos]
+
+def _vetorizado_ascii(func_arrow, func_valor):
+    """Combina o caminho Arrow (valores ASCII não nulos) com `func_valor` para o restante."""
+    def aplicar(unicos):
+        valores = unicos.to_numpy(dtype=object)
+        rapidos = np.fromiter((isinstance(v, str) and v.isascii() for v in valores), dtype=bool, count=len(valores))
+        resultado = np.empty(len(valores), dtype=object)
+        if rapidos.any():
+            resultado[rapidos] = func_arrow(pd.Series(valores[rapidos], dtype='string[pyarrow]')).to_numpy(dtype=object)
+        resultado[~rapidos] = [func_valor(v) for v in valores[~rapidos]]
+        return resultado
+    return aplicar
+
+def _site_arrow(texto):
+    texto = texto.str.strip(ESPACOS_ASCII)
+    vazios = texto == ''
+    texto = texto.str.replace(PADRAO_PROTOCOLO.pattern, '', regex=True).str.rstrip('/')
+    texto = texto.where(texto.str.lower().str.startswith('www.'), 'www.' + texto)
+    return texto.where(~vazios, '')
+
+def _telefone_arrow(texto):
+    texto = texto.str.strip(ESPACOS_ASCII)
+    internacional = texto.str.startswith('+') & ~texto.str.startswith('+55')
+    digitos = texto.str.replace(r'[^0-9]', '', regex=True)
+    digitos = digitos.where(~digitos.str.startswith('55'), digitos.str.slice(2))
+    numero_0800 = digitos.str.startswith('0800')
+    digitos = digitos.where(~((digitos.str.len() == 11) & digitos.str.startswith('0')), digitos.str.slice(1))
+    tamanho = digitos.str.len()
+    ddd = '(' + digitos.str.slice(0, 2) + ') '
+    onze = ddd + digitos.str.slice(2, 7) + '-' + digitos.str.slice(7)
+    dez = ddd + digitos.str.slice(2, 6) + '-' + digitos.str.slice(6)
+    formatado = onze.where(tamanho == 11, dez.where((tamanho == 10) & ~digitos.str.startswith('800'), ''))
+    return formatado.where(~(internacional | numero_0800), '')
+
+def _nome_empresa_arrow(texto):
+    for sigla in SIGLAS_EMPRESA_ASCII:
+        texto = texto.str.replace(sigla, '', regex=True)
+    excecoes = ['de', 'da', 'do', 'dos', 'das', 'e']
+    return pd.Series([title_case_com_excecoes(s.strip(), excecoes) for s in texto], dtype=object)
+
+_site_vetorizado = _vetorizado_ascii(_site_arrow, padronizar_site)
+_telefone_vetorizado = _vetorizado_ascii(_telefone_arrow, padronizar_telefone)
+_nome_empresa_vetorizado = _vetorizado_ascii(_nome_empresa_arrow, padronizar_nome_empresa)
+
+def padronizar_coluna(serie, func_vetorizada):
+    """Reproduz `serie.astype(str).apply(func)` transformando cada valor distinto uma única vez."""
+    return aplicar_por_valores_unicos(serie.astype(str), func_vetorizada)
+
+def padronizar_nome_contato_vetorizado(df):
+    """Equivalente a `df.apply(lambda row: padronizar_nome_contato(row, df.columns), axis=1)`."""
+    df_columns = list(df.columns)
+    nome_col = next((col for col in df_columns if 'first name' in col.lower() or 'nome_lead' in col.lower()), None)
+    sobrenome_col = next((col for col in df_columns if 'last name' in col.lower() or 'sobrenome_lead' in col.lower()), None)
+    if not nome_col:
+        return pd.Series('', index=df.index, dtype=object)
+    nomes = df[nome_col].astype(object)
+    nulos = nomes.isna()
+    primeiros = aplicar_por_valores_unicos(nomes[~nulos], _por_valor(lambda v: str(v).split()[0]))
+    if sobrenome_col is None:
+        ultimos = pd.Series('', index=primeiros.index, dtype=object)
+    else:
+        def ultimo_sobrenome(sobrenome):
+            partes = [p for p in str(sobrenome).split() if p.lower() not in CONECTIVOS_NOME]
+            return partes[-1] if partes else ''
+        sobrenomes = df.loc[~nulos, sobrenome_col].astype(object)
+        sobrenomes_nulos = sobrenomes.isna()
+        if sobrenomes_nulos.any():
+            # Como o `str(row.get(...))` original: None vira 'None' e NaN vira 'nan' (o factorize juntaria os dois)
+            sobrenomes[sobrenomes_nulos] = [str(v) for v in sobrenomes[sobrenomes_nulos]]
+        ultimos = aplicar_por_valores_unicos(sobrenomes, _por_valor(ultimo_sobrenome))
+    completos = aplicar_por_valores_unicos(primeiros + ' ' + ultimos, _por_valor(lambda v: v.strip().title()))
+    return completos.reindex(df.index, fill_value='')
+
+
+# Cada coluna de cidade e o país da mesma linha: cidades de outros países não passam pelo mapa do IBGE
+PAIS_DA_CIDADE = {'Cidade_Contato': 'Pais_Contato', 'Cidade_Empresa': 'Pais_Empresa'}
+_cidade_sem_mapa = _por_valor(lambda x: padronizar_localidade_geral(x, 'cidade'))
+
+def padronizar_cidades(df, col, func):
+    """`padronizar_coluna` da cidade `col`, sem o mapa do IBGE nas linhas em que o país não é Brasil nem vazio."""
+    coluna_pais = PAIS_DA_CIDADE.get(col)
+    if coluna_pais not in df.columns:
+        return padronizar_coluna(df[col], func)
+    no_brasil = aplicar_por_valores_unicos(df[coluna_pais].astype(object), _por_valor(cidade_no_brasil)).astype(bool)
+    if no_brasil.all():
+        return padronizar_coluna(df[col], func)
+    resultado = padronizar_coluna(df[col], _cidade_sem_mapa).astype(object)
+    if no_brasil.any():
+        resultado[no_brasil] = padronizar_coluna(df.loc[no_brasil, col], func).astype(object)
+    return resultado
+
+def funcoes_padronizacao(mapa_cidades=None, mapa_estados=None):
+    """Função vetorizada (para `padronizar_coluna`) de cada coluna padronizada por `limpar_dataframe`.
+
+    As colunas de cidade passam por `padronizar_cidades`, que consulta o país da linha.
+    """
+    cidade = _por_valor(lambda x: padronizar_localidade_geral(x, 'cidade', mapa_cidades, mapa_estados))
+    estado = _por_valor(lambda x: padronizar_localidade_geral(x, 'estado', mapa_cidades, mapa_estados))
+    pais = _por_valor(lambda x: padronizar_localidade_geral(x, 'pais'))
+    return {
+        'Nome_Empresa': _nome_empresa_vetorizado,
+        'Site_Original': _site_vetorizado,
+        'Telefone_Original': _telefone_vetorizado,
+        'Segmento_Original': _por_valor(padronizar_segmento),
+        'Cidade_Contato': cidade,
+        'Estado_Contato': estado,
+        'Pais_Contato': pais,
+        'Cidade_Empresa': cidade,
+        'Estado_Empresa': estado,
+        'Pais_Empresa': pais,
+    }
+
+
+# --- PIPELINE COMPLETO ---
+
+def limpar_dataframe(df, mapa_cidades=None, mapa_estados=None, compactar=False, metricas=None):
+    """Renomeia, padroniza e reordena um export bruto do Apollo, devolvendo o DataFrame limpo.
+
+    Todas as colunas saem como texto, com '' no lugar de nulos. Com `compactar=True` elas usam
+    `category` ou strings Arrow em vez de objetos Python (ver `_coluna_texto`). Com `metricas`
+    (um `metricas.Metricas`), o tempo de cada etapa e de cada coluna padronizada é registrado.
+    """
+    with cronometrar(metricas, 'limpeza.renomear'):
+        colunas_para_renomear = {k: v for k, v in MAPA_COLUNAS.items() if k in df.columns}
+        df_limpo = df.rename(columns=colunas_para_renomear)
+
+        colunas_finais = list(colunas_para_renomear.values())
+        df_limpo = df_limpo[[col for col in colunas_finais if col in df_limpo.columns]].copy()
+
+    if 'Nome_Lead' in df_limpo.columns and 'Sobrenome_Lead' in df_limpo.columns:
+        with cronometrar(metricas, 'limpeza.padronizar.Nome_Completo'):
+            df_limpo['Nome_Completo'] = padronizar_nome_contato_vetorizado(df_limpo)
+            df_limpo = df_limpo.drop(columns=['Nome_Lead', 'Sobrenome_Lead'])
+
+    for col, func in funcoes_padronizacao(mapa_cidades, mapa_estados).items():
+        if col in df_limpo.columns:
+            with cronometrar(metricas, f'limpeza.padronizar.{col}'):
+                df_limpo[col] = padronizar_cidades(df_limpo, col, func) if col in PAIS_DA_CIDADE else padronizar_coluna(df_limpo[col], func)
+
+    # Reordenar colunas para a sequência final desejada, sem perder as não especificadas
+    with cronometrar(metricas, 'limpeza.reordenar'):
+        colunas_existentes_na_ordem = [col for col in ORDEM_FINAL_DESEJADA if col in df_limpo.columns]
+        outras_colunas = [col for col in df_limpo.columns if col not in colunas_existentes_na_ordem]
+        df_limpo = df_limpo[colunas_existentes_na_ordem + outras_colunas]
+    with cronometrar(metricas, 'limpeza.texto_final'):
+        return colunas_como_texto(df_limpo, compactar)
+
+
+# --- REPRESENTAÇÃO COMPACTA ---
+# O DataFrame limpo fica em `st.session_state` durante toda a sessão; colunas de texto como objetos
+# Python custam ~50 bytes de cabeçalho por célula. Colunas repetitivas (estado, país, segmento) viram
+# `category` e as demais strings Arrow, com os mesmos valores.
+
+LIMITE_CARDINALIDADE_CATEGORIA = 0.5  # fração máxima de valores distintos para usar `category`
+
+def _texto_final(valor):
+    # Mesmo resultado de `astype(object).fillna('').astype(str).replace('nan', '')`
+    if pd.isna(valor):
+        return ''
+    texto = str(valor)
+    return '' if texto == 'nan' else texto
+
+def _coluna_texto(serie, compactar=False, limite_cardinalidade=LIMITE_CARDINALIDADE_CATEGORIA):
+    """Converte a coluna em texto (nulos viram '') processando só os valores distintos."""
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=False)
+    # Nulo e 'nan' viram ambos '': refatora os textos para que as categorias continuem únicas
+    codigos_texto, categorias = pd.factorize(np.asarray([_texto_final(v) for v in unicos], dtype=object))
+    codigos = codigos_texto[codigos]
+    if compactar and len(categorias) <= limite_cardinalidade * len(serie):
+        return pd.Series(pd.Categorical.from_codes(codigos, categories=categorias), index=serie.index)
+    valores = np.asarray(categorias, dtype=object)[codigos]
+    return pd.Series(valores, index=serie.index, dtype='string[pyarrow]' if compactar else str)
+
+def colunas_como_texto(df, compactar=False):
+    """Aplica `_coluna_texto` a todas as colunas de `df` (alterando-o) e o devolve."""
+    for col in df.columns:
+        df[col] = _coluna_texto(df[col], compactar)
+    return df
+
+def uso_memoria(df):
+    """Bytes ocupados pelo DataFrame, contando o conteúdo das strings."""
+    return int(df.memory_usage(deep=True, index=False).sum())
+
+def estimar_memoria_objeto(df):
+    """Estimativa dos bytes que o mesmo DataFrame ocuparia com todas as colunas como `str` do Python."""
+    total = 0
+    for col in df.columns:
+        serie = df[col]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            tamanhos = np.array([sys.getsizeof(c) for c in serie.cat.categories], dtype=np.int64)
+            contagens = np.bincount(serie.cat.codes[serie.cat.codes >= 0], minlength=len(tamanhos))
+            total += 8 * len(serie) + int(tamanhos @ contagens)
+        elif pd.api.types.is_string_dtype(serie.dtype) and serie.dtype != object:
+            # 8 bytes de ponteiro + ~49 bytes de cabeçalho de cada `str` + o conteúdo
+            total += 57 * len(serie) + int(serie.str.len().sum())
+        else:
+            total += int(serie.memory_usage(deep=True, index=False))
+    return total
+
+
+# --- LIMPEZA EM PARALELO (PROCESSOS) ---
+# A limpeza de uma linha não depende das demais: o DataFrame é dividido em fatias contíguas,
+# limpas em processos separados e concatenadas na ordem original. Os mapas de cidades e estados
+# vão para cada processo uma única vez (no `initializer`); o dicionário de segmentos já é
+# carregado pela importação deste módulo.
+
+LINHAS_MINIMAS_POR_FATIA = 20_000
+_mapas_do_processo = (None, None)
+
+def _inicializar_processo(mapa_cidades, mapa_estados):
+    global _mapas_do_processo
+    _mapas_do_processo = (mapa_cidades, mapa_estados)
+
+def _limpar_fatia(fatia):
+    return limpar_dataframe(fatia, *_mapas_do_processo)
+
+def processos_disponiveis():
+    """Núcleos que este processo pode usar."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def limpar_dataframe_em_paralelo(df, mapa_cidades=None, mapa_estados=None, processos=None, compactar=False, metricas=None):
+    """Mesmo resultado de `limpar_dataframe`, distribuindo fatias de linhas entre `processos` (padrão: todos os núcleos).
+
+    Arquivos pequenos demais para compensar a criação dos processos são limpos no próprio processo.
+    Nos processos separados as etapas não são medidas uma a uma: `metricas` recebe só o tempo das
+    fatias ('limpeza.processos') e o da compactação.
+    """
+    processos = processos or processos_disponiveis()
+    quantidade_fatias = min(2 * processos, len(df) // LINHAS_MINIMAS_POR_FATIA)
+    if processos <= 1 or quantidade_fatias <= 1:
+        return limpar_dataframe(df, mapa_cidades, mapa_estados, compactar, metricas)
+
+    # Só as colunas que a limpeza pode manter são enviadas aos processos
+    colunas = [col for col in df.columns if col in MAPA_COLUNAS or col in MAPA_COLUNAS.values()]
+    limites = np.linspace(0, len(df), quantidade_fatias + 1).astype(int)
+    fatias = (df.iloc[inicio:fim][colunas] for inicio, fim in zip(limites[:-1], limites[1:]))
+    # 'spawn' em vez de 'fork': o processo do Streamlit tem várias threads ativas
+    with cronometrar(metricas, 'limpeza.processos'), ProcessPoolExecutor(
+        max_workers=min(processos, quantidade_fatias), mp_context=multiprocessing.get_context('spawn'),
+        initializer=_inicializar_processo, initargs=(mapa_cidades, mapa_estados),
+    ) as executor:
+        df_limpo = pd.concat(list(executor.map(_limpar_fatia, fatias)))
+    if compactar:
+        with cronometrar(metricas, 'limpeza.texto_final'):
+            colunas_como_texto(df_limpo, compactar=True)
+    return df_limpo
+
+def medir_aceleracao(df, mapa_cidades=None, mapa_estados=None, contagens_processos=None):
+    """Tempo da limpeza com 1, 2, 4... processos (até o número de núcleos), com aceleração e eficiência relativas à primeira contagem."""
+    if contagens_processos is None:
+        maximo = processos_disponiveis()
+        contagens_processos = sorted({2 ** i for i in range(maximo.bit_length()) if 2 ** i <= maximo} | {maximo})
+    medicoes = []
+    for processos in contagens_processos:
+        inicio = time.perf_counter()
+        limpar_dataframe_em_paralelo(df, mapa_cidades, mapa_estados, processos)
+        segundos = time.perf_counter() - inicio
+        base = medicoes[0]['segundos'] if medicoes else segundos
+        medicoes.append({
+            'processos': processos,
+            'segundos': round(segundos, 3),
+            'aceleracao': round(base / segundos, 2),
+            'eficiencia': round(base / segundos / processos, 2),
+        })
+    return medicoes
@@ -0,0 +1,135 @@
+# Índice de localidades do IBGE embarcado com o app: a Estação 1 inicia sem acessar a rede.
+# Para regenerar o arquivo a partir da API do IBGE:  python localidades.py --atualizar
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from datetime import date
+
+from busca_aproximada import MapaAproximado
+from inicializacao import sob_demanda
+from limpeza import normalizar_texto_para_comparacao
+
+requests = sob_demanda('requests')  # só o `--atualizar` acessa a rede
+
+CAMINHO_INDICE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dados', 'localidades_ibge.json.gz')
+URL_MUNICIPIOS = "https://servicodados.ibge.gov.br/api/v1/localidades/municipios"
+SIGLAS_UF = {
+    'ac', 'al', 'ap', 'am', 'ba', 'ce', 'df', 'es', 'go', 'ma', 'mt', 'ms', 'mg', 'pa',
+    'pb', 'pr', 'pe', 'pi', 'rj', 'rn', 'rs', 'ro', 'rr', 'sc', 'sp', 'se', 'to',
+}
+PADRAO_SUFIXO_UF = re.compile(r'^(.+?)[\s,/()-]+([a-z]{2})\)?$')
+LIMIAR_CIDADES_CURTAS = 0.9  # 'atlanta', 'san jose' e 'valencia' ficam a uma letra de municípios brasileiros
+
+
+def _tamanho_profundo(mapa):
+    return sys.getsizeof(mapa) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in mapa.items())
+
+
+def carregar_indice(caminho=CAMINHO_INDICE):
+    """Lê o índice compacto (JSON compactado com gzip) de municípios e UFs."""
+    with gzip.open(caminho, 'rt', encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+def versao_indice(ufs, municipios):
+    """Versão do índice derivada do conteúdo: os mesmos municípios e UFs dão a mesma versão, em qualquer data.
+
+    Entra no sal das linhas guardadas pela limpeza incremental (`deduplicacao`).
+    """
+    conteudo = json.dumps([ufs, municipios], ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha256(conteudo).hexdigest()[:12]
+
+
+def remover_sufixo_uf(chave):
+    """'sao paulo - sp', 'belo horizonte mg' e 'curitiba/pr' viram só o nome da cidade."""
+    encontrado = PADRAO_SUFIXO_UF.match(chave)
+    if encontrado and encontrado.group(2) in SIGLAS_UF:
+        return encontrado.group(1).strip()
+    return chave
+
+
+def montar_mapas(indice):
+    """Monta os mapas usados na padronização: {nome normalizado: nome oficial} para cidades e estados.
+
+    Os mapas são `MapaAproximado`: chaves com erros de digitação ou sufixo de UF
+    também são resolvidas, por busca em índice de trigramas (mais exigente em nomes curtos de cidade).
+    A limpeza só usa o mapa de cidades nas linhas com país Brasil ou vazio.
+    """
+    mapa_cidades = {normalizar_texto_para_comparacao(nome): nome for _, nome, _ in indice['municipios']}
+    mapa_estados = {}
+    for sigla, nome in indice['ufs']:
+        mapa_estados[sigla.lower()] = nome
+        mapa_estados[normalizar_texto_para_comparacao(nome)] = nome
+    return (MapaAproximado(mapa_cidades, preparar=remover_sufixo_uf, limiar_chaves_curtas=LIMIAR_CIDADES_CURTAS),
+            MapaAproximado(mapa_estados))
+
+
+def carregar_localidades(caminho=CAMINHO_INDICE):
+    """Carrega os mapas de cidades e estados do índice embarcado.
+
+    Retorna `(mapa_cidades, mapa_estados, relatorio)`, em que o relatório traz versão,
+    quantidade de municípios, tempo de carga e memória aproximada ocupada pelos mapas.
+    """
+    inicio = time.perf_counter()
+    indice = carregar_indice(caminho)
+    mapa_cidades, mapa_estados = montar_mapas(indice)
+    relatorio = {
+        'versao': indice['versao'],
+        'gerado_em': indice['gerado_em'],
+        'municipios': len(indice['municipios']),
+        'segundos': time.perf_counter() - inicio,
+        'bytes_memoria': _tamanho_profundo(mapa_cidades) + _tamanho_profundo(mapa_estados),
+        'bytes_arquivo': os.path.getsize(caminho),
+    }
+    return mapa_cidades, mapa_estados, relatorio
+
+
+def baixar_indice_ibge(timeout=60):
+    """Baixa os municípios da API do IBGE e monta um novo índice compacto."""
+    response = requests.get(URL_MUNICIPIOS, timeout=timeout)
+    response.raise_for_status()
+    municipios = []
+    ufs = {}
+    for m in response.json():
+        try:
+            uf_data = (m.get('microrregiao') or {}).get('mesorregiao', {}).get('UF') or m['regiao-imediata']['regiao-intermediaria']['UF']
+        except (KeyError, TypeError, AttributeError):
+            continue
+        municipios.append([m['id'], m['nome'], uf_data['sigla']])
+        ufs[uf_data['sigla']] = uf_data['nome']
+    ufs, municipios = sorted([sigla, nome] for sigla, nome in ufs.items()), sorted(municipios)
+    return {
+        'versao': versao_indice(ufs, municipios),
+        'fonte': "IBGE - API de localidades (municípios e UFs)",
+        'gerado_em': date.today().isoformat(),
+        'ufs': ufs,
+        'municipios': municipios,
+    }
+
+
+def salvar_indice(indice, caminho=CAMINHO_INDICE):
+    """Grava o índice de forma determinística (mesmo conteúdo gera o mesmo arquivo)."""
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    conteudo = json.dumps(indice, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    with gzip.GzipFile(caminho, 'wb', mtime=0) as arquivo:
+        arquivo.write(conteudo)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Índice de localidades do IBGE embarcado no Agente LDR.")
+    parser.add_argument('--atualizar', action='store_true', help="baixa a lista atual da API do IBGE e regrava o índice")
+    parser.add_argument('--caminho', default=CAMINHO_INDICE, help="arquivo do índice (padrão: %(default)s)")
+    args = parser.parse_args()
+
+    if args.atualizar:
+        novo_indice = baixar_indice_ibge()
+        salvar_indice(novo_indice, args.caminho)
+        print(f"Índice {novo_indice['versao']} gravado com {len(novo_indice['municipios'])} municípios em {args.caminho}")
+
+    _, _, relatorio = carregar_localidades(args.caminho)
+    print(json.dumps(relatorio, ensure_ascii=False))
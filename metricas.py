@@ -0,0 +1,234 @@
+# Métricas leves de desempenho: durações por etapa (com percentis), contadores e vazão, coletadas de
+# várias threads e exportadas em JSON ou CSV; e um perfil opcional com cProfile.
+import contextlib
+import cProfile
+import io
+import json
+import marshal
+import pstats
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+PERCENTIS = (50, 90, 95, 99)
+MAX_AMOSTRAS_POR_ETAPA = 200_000  # acima disso as amostras mais antigas são descartadas
+JANELA_VAZAO_SEGUNDOS = 60
+CARACTERES_POR_TOKEN = 4  # estimativa usada quando a API não informa a contagem
+
+
+def _resumir(valores):
+    valores = np.array(valores, dtype=float)
+    return {
+        'n': len(valores),
+        'total': float(valores.sum()),
+        'media': float(valores.mean()),
+        **{f'p{p}': float(v) for p, v in zip(PERCENTIS, np.percentile(valores, PERCENTIS))},
+        'max': float(valores.max()),
+    }
+
+
+class Metricas:
+    """Coletor thread-safe de durações (`registrar` / `cronometrar`), contadores (`contar`) e quantidades
+    por item (`registrar_quantidade`, ex.: tokens de cada empresa).
+
+    Os nomes usam pontos para agrupar: 'limpeza.padronizar.Site_Original', 'ia.generate_content', ...
+    """
+
+    def __init__(self):
+        self.inicio = time.time()
+        self._amostras = defaultdict(list)  # nome -> [(momento, segundos)]
+        self._quantidades = defaultdict(list)  # nome -> [(momento, valor)]
+        self._contadores = defaultdict(float)
+        self._trava = threading.Lock()
+
+    def registrar(self, nome, segundos):
+        momento = time.time()
+        with self._trava:
+            amostras = self._amostras[nome]
+            amostras.append((momento, segundos))
+            if len(amostras) > MAX_AMOSTRAS_POR_ETAPA:
+                del amostras[:len(amostras) - MAX_AMOSTRAS_POR_ETAPA]
+
+    def registrar_quantidade(self, nome, valor):
+        momento = time.time()
+        with self._trava:
+            valores = self._quantidades[nome]
+            valores.append((momento, valor))
+            if len(valores) > MAX_AMOSTRAS_POR_ETAPA:
+                del valores[:len(valores) - MAX_AMOSTRAS_POR_ETAPA]
+
+    @contextlib.contextmanager
+    def cronometrar(self, nome):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(nome, time.perf_counter() - inicio)
+
+    def contar(self, nome, quantidade=1):
+        with self._trava:
+            self._contadores[nome] += quantidade
+
+    def contadores(self):
+        with self._trava:
+            return {nome: (int(valor) if float(valor).is_integer() else valor) for nome, valor in sorted(self._contadores.items())}
+
+    def _copiar_amostras(self):
+        with self._trava:
+            return {nome: list(amostras) for nome, amostras in self._amostras.items()}
+
+    def estatisticas(self, nome=None):
+        """{nome: {n, total, media, p50, p90, p95, p99, max}} em segundos (ou só a etapa `nome`)."""
+        amostras = self._copiar_amostras()
+        if nome is not None:
+            amostras = {nome: amostras.get(nome, [])}
+        return {etapa: _resumir([s for _, s in valores]) for etapa, valores in sorted(amostras.items()) if valores}
+
+    def quantidades(self, nome=None):
+        """{nome: {n, total, media, p50, p90, p95, p99, max}} das quantidades registradas (ou só de `nome`)."""
+        with self._trava:
+            registros = {nome: list(valores) for nome, valores in self._quantidades.items()}
+        if nome is not None:
+            registros = {nome: registros.get(nome, [])}
+        return {chave: _resumir([v for _, v in valores]) for chave, valores in sorted(registros.items()) if valores}
+
+    def vazao_por_minuto(self, nome, janela_segundos=JANELA_VAZAO_SEGUNDOS):
+        """Amostras de `nome` por minuto na última janela (ou desde o início, se mais recente)."""
+        with self._trava:
+            momentos = [m for m, _ in self._amostras.get(nome, ())]
+        if not momentos:
+            return 0.0
+        agora = time.time()
+        inicio_janela = max(agora - janela_segundos, self.inicio)
+        recentes = sum(1 for m in momentos if m >= inicio_janela)
+        return 60 * recentes / max(agora - inicio_janela, 1e-9)
+
+    def como_dataframe(self):
+        """Uma linha por etapa (tempos em ms), uma por quantidade (a média em `valor`) e uma por contador, com a coluna `tipo`."""
+        linhas = [{'tipo': 'etapa', 'nome': nome, 'n': e['n'], 'total_s': round(e['total'], 4),
+                   **{chave: round(e[chave] * 1000, 2) for chave in ('media', *(f'p{p}' for p in PERCENTIS), 'max')}}
+                  for nome, e in self.estatisticas().items()]
+        linhas += [{'tipo': 'quantidade', 'nome': nome, 'n': q['n'], 'valor': round(q['media'], 2)} for nome, q in self.quantidades().items()]
+        linhas += [{'tipo': 'contador', 'nome': nome, 'valor': valor} for nome, valor in self.contadores().items()]
+        colunas = ['tipo', 'nome', 'n', 'total_s', 'media', *(f'p{p}' for p in PERCENTIS), 'max', 'valor']
+        return pd.DataFrame(linhas, columns=colunas).rename(columns={c: f'{c}_ms' for c in ('media', *(f'p{p}' for p in PERCENTIS), 'max')})
+
+    def como_json(self, incluir_amostras=False):
+        dados = {'inicio': self.inicio, 'segundos_decorridos': round(time.time() - self.inicio, 3),
+                 'etapas': self.estatisticas(), 'quantidades': self.quantidades(), 'contadores': self.contadores()}
+        if incluir_amostras:
+            dados['amostras'] = {nome: [[round(m, 3), round(s, 6)] for m, s in valores] for nome, valores in self._copiar_amostras().items()}
+            with self._trava:
+                dados['amostras_quantidades'] = {nome: [[round(m, 3), v] for m, v in valores] for nome, valores in self._quantidades.items()}
+        return json.dumps(dados, ensure_ascii=False, indent=2)
+
+    def como_csv(self):
+        return self.como_dataframe().to_csv(index=False)
+
+    def exportar(self, caminho):
+        """Grava em JSON ou, para qualquer outra extensão, em CSV."""
+        conteudo = self.como_json(incluir_amostras=True) if caminho.lower().endswith('.json') else self.como_csv()
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(conteudo)
+
+
+class MetricasCombinadas:
+    """Repassa cada registro a vários coletores (ex.: as métricas gerais e as de uma camada do roteamento)."""
+
+    def __init__(self, *coletores):
+        self.coletores = [c for c in coletores if c is not None]
+
+    def registrar(self, nome, segundos):
+        for coletor in self.coletores:
+            coletor.registrar(nome, segundos)
+
+    def registrar_quantidade(self, nome, valor):
+        for coletor in self.coletores:
+            coletor.registrar_quantidade(nome, valor)
+
+    @contextlib.contextmanager
+    def cronometrar(self, nome):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(nome, time.perf_counter() - inicio)
+
+    def contar(self, nome, quantidade=1):
+        for coletor in self.coletores:
+            coletor.contar(nome, quantidade)
+
+
+@contextlib.contextmanager
+def cronometrar(metricas, nome):
+    """`metricas.cronometrar(nome)` quando há coletor; sem ele, não mede nada."""
+    if metricas is None:
+        yield
+    else:
+        with metricas.cronometrar(nome):
+            yield
+
+
+def contar(metricas, nome, quantidade=1):
+    if metricas is not None:
+        metricas.contar(nome, quantidade)
+
+
+def registrar_tokens(metricas, prompt, resposta, empresas=1):
+    """Soma os tokens de entrada e saída de uma chamada; sem `usage_metadata`, estima por 4 caracteres/token.
+
+    Cada uma das `empresas` da chamada registra sua parte em 'tokens.prompt_por_empresa' e 'tokens.resposta_por_empresa'.
+    """
+    if metricas is None:
+        return
+    uso = getattr(resposta, 'usage_metadata', None)
+    entrada = getattr(uso, 'prompt_token_count', None)
+    saida = getattr(uso, 'candidates_token_count', None)
+    if entrada is None or saida is None:
+        entrada, saida = len(prompt) // CARACTERES_POR_TOKEN, len(getattr(resposta, 'text', '') or '') // CARACTERES_POR_TOKEN
+        metricas.contar('tokens.estimados')
+    metricas.contar('tokens.prompt', entrada)
+    metricas.contar('tokens.resposta', saida)
+    metricas.contar('tokens.empresas', empresas)
+    for _ in range(empresas):
+        metricas.registrar_quantidade('tokens.prompt_por_empresa', entrada / empresas)
+        metricas.registrar_quantidade('tokens.resposta_por_empresa', saida / empresas)
+
+
+# --- PERFIL (cProfile) ---
+
+class Perfil:
+    """Resultado de `perfilar`: texto com as funções mais custosas e o arquivo .prof para snakeviz / pstats."""
+
+    def __init__(self, profiler):
+        self._profiler = profiler
+
+    def texto(self, linhas=30, ordem='cumulative'):
+        saida = io.StringIO()
+        pstats.Stats(self._profiler, stream=saida).sort_stats(ordem).print_stats(linhas)
+        return saida.getvalue()
+
+    def como_bytes(self):
+        self._profiler.create_stats()
+        return marshal.dumps(self._profiler.stats)  # mesmo formato de `pstats.Stats.dump_stats`
+
+    def gravar(self, caminho):
+        pstats.Stats(self._profiler).dump_stats(caminho)
+
+
+@contextlib.contextmanager
+def perfilar(ativo=True):
+    """Executa o bloco sob cProfile (só a thread atual) e devolve o `Perfil`; com `ativo=False`, devolve None."""
+    if not ativo:
+        yield None
+        return
+    profiler = cProfile.Profile()
+    perfil = Perfil(profiler)
+    profiler.enable()
+    try:
+        yield perfil
+    finally:
+        profiler.disable()
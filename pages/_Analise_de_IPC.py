@@ -1,12 +1,21 @@
 # pages/2_Analise_de_ICP.py
 import streamlit as st
 import pandas as pd
-import io
-import json
-import re
-import unicodedata
-import time
-import google.generativeai as genai
+import os
+import uuid
+# pandas e pyarrow entram já no import (o registro de análises e os modelos do formulário dependem deles);
+# só o cliente da IA, o mais lento, fica sob demanda
+from execucoes import CheckpointExecucao, caminho_execucao, gerar_id_execucao, montar_resultado_parcial
+from roteamento import CONFIANCA_MINIMA_PADRAO, MODELO_FORTE, MODELO_RAPIDO, camadas_padrao
+from trabalhos import RegistroTrabalhos
+from filtros_icp import compilar_filtro_icp, compilar_preclassificador
+from formatos import FORMATOS_EXPORTACAO, MAX_LINHAS_EXCEL, amostra_parquet, exportador
+from ingestao import ler_leads
+from inicializacao import iniciar_aquecimento, sob_demanda
+
+# O cliente da IA (~1s de import) só é carregado ao iniciar uma análise ou pela thread de aquecimento
+genai = sob_demanda('google.generativeai')
+iniciar_aquecimento()
 
 st.set_page_config(layout="wide", page_title="Estação 2: Análise")
 
@@ -14,58 +23,20 @@ st.set_page_config(layout="wide", page_title="Estação 2: Análise")
 
 def ler_csv_flexivel(arquivo_upado):
     try:
-        arquivo_upado.seek(0)
-        df = pd.read_csv(arquivo_upado, sep=';', encoding='utf-8', on_bad_lines='skip', low_memory=False)
-        return df
+        return ler_leads(arquivo_upado)
     except Exception as e:
-        st.error(f"Erro ao ler o arquivo CSV: {e}")
+        st.error(f"Erro ao ler o arquivo: {e}")
         return None
 
-def analisar_icp_com_ia(texto_ou_url, icp_resumido, is_url=True):
-    model = genai.GenerativeModel('gemini-1.5-flash-latest')
-    parte_analise = f"Visite a URL {texto_ou_url} e analise seu conteúdo." if is_url else f"Analise o seguinte resumo de negócio: '{texto_ou_url}'."
-    prompt = f"""
-    Analise o seguinte material: "{texto_ou_url}".
-    Compare com este resumo do meu Perfil de Cliente Ideal (ICP): "{icp_resumido}"
-    Responda APENAS com um JSON com as chaves: "is_segmento_correto" (boolean) e "motivo_segmento" (string).
-    """
-    try:
-        time.sleep(1.2)
-        response = model.generate_content(prompt, request_options={"timeout": 90 if is_url else 30})
-        return json.loads(response.text.replace('```json', '').replace('```', '').strip())
-    except Exception as e: return {"error": f"Falha: {e}"}
-
-def resumir_icp_com_ia(criterios_icp_texto):
-    st.info("Otimizando ICP para análise...")
-    model = genai.GenerativeModel('gemini-1.5-flash-latest')
-    prompt = f"Crie um resumo conciso e otimizado deste ICP em formato de texto para ser usado em futuros prompts: {criterios_icp_texto}"
-    try:
-        time.sleep(1.2)
-        response = model.generate_content(prompt)
-        return response.text.strip()
-    except Exception as e:
-        st.error(f"Falha ao criar o resumo do ICP: {e}")
-        return None
+@st.cache_resource
+def obter_registro_trabalhos():
+    """Registro único no servidor: as análises continuam entre reruns e sessões e dividem a cota da IA."""
+    return RegistroTrabalhos()
 
-def verificar_funcionarios(funcionarios_lead, faixa_icp_str):
-    if pd.isna(faixa_icp_str) or str(faixa_icp_str).strip() == '': return True
-    if pd.isna(funcionarios_lead): return False
-    try:
-        funcionarios_str = str(funcionarios_lead).strip().lower().replace('.', '').replace(',', '')
-        if 'k' in funcionarios_str:
-            funcionarios_num = float(funcionarios_str.replace('k', '')) * 1000
-        else:
-            funcionarios_num = pd.to_numeric(funcionarios_str)
-        if pd.isna(funcionarios_num): return False
-    except (ValueError, TypeError): return False
-    faixa_str = str(faixa_icp_str).lower()
-    numeros = [int(s) for s in re.findall(r'\d+', faixa_str)]
-    if not numeros: return False
-    if "acima" in faixa_str or "maior" in faixa_str: return funcionarios_num > numeros[0]
-    elif "abaixo" in faixa_str or "menor" in faixa_str: return funcionarios_num < numeros[0]
-    elif "-" in faixa_str and len(numeros) == 2: return numeros[0] <= funcionarios_num <= numeros[1]
-    elif len(numeros) == 1: return funcionarios_num >= numeros[0]
-    return False
+registro_trabalhos = obter_registro_trabalhos()
+# Sessões que enviam o mesmo arquivo e ICP dividem um trabalho; cancelar só desliga a própria sessão dele
+id_sessao = st.session_state.setdefault('id_sessao_icp', uuid.uuid4().hex)
+INTERVALO_ATUALIZACAO_SEGUNDOS = 2
 
 # --- INTERFACE DA ESTAÇÃO 2 ---
 st.title("🔬 Estação 2: Análise de ICP")
@@ -78,75 +49,248 @@ with st.form("icp_form"):
     segmentos = st.text_area("Segmentos Desejados (palavras-chave separadas por vírgula)", "Serviços financeiros, Saúde, Varejo, E-commerce, Logística, Tecnologia, BPO")
     funcionarios = st.text_input("Número de Funcionários (Ex: acima de 50, 100-500)", "acima de 50")
     observacoes = st.text_area("Outras Observações Importantes (Ex: concorrentes)", "Não pode ser do setor governamental")
+    col_paises, col_estados = st.columns(2)
+    paises = col_paises.text_input("Países permitidos (separados por vírgula; vazio = todos)", "")
+    estados = col_estados.text_input("Estados permitidos (nomes ou siglas; vazio = todos)", "")
+
+    col_concorrencia, col_lote = st.columns(2)
+    max_concorrencia = col_concorrencia.number_input("Análises simultâneas", min_value=1, max_value=64, value=8)
+    tamanho_lote = col_lote.number_input("Empresas por chamada à IA (lote)", min_value=1, max_value=50, value=10)
+    tokens_servidor = f"{registro_trabalhos.tokens_por_minuto:,} tokens".replace(',', '.') if registro_trabalhos.tokens_por_minuto else "sem limite de tokens"
+    st.caption(f"Cota da IA do servidor, dividida entre todas as análises: {registro_trabalhos.requisicoes_por_minuto} requisições "
+               f"e {tokens_servidor} por minuto (AGENTE_LDR_REQUISICOES_POR_MINUTO / AGENTE_LDR_TOKENS_POR_MINUTO).")
+    usar_cache = st.checkbox("Reaproveitar análises anteriores (cache local)", value=True)
+    preclassificar = st.checkbox("Decidir localmente os casos óbvios (segmento, nome ou domínio), sem chamar a IA", value=True)
+    coletar_sites = st.checkbox("Ler o site de cada empresa antes da IA (envia o texto da página em vez da URL)", value=True)
+    perfilar = st.checkbox("Gerar perfil de execução (cProfile) para diagnóstico", value=False)
+    col_camadas, col_confianca = st.columns(2)
+    classificar_em_camadas = col_camadas.checkbox(
+        f"Classificação em camadas: {MODELO_RAPIDO} primeiro, e só os casos incertos vão ao {MODELO_FORTE}", value=False,
+        help="O modelo rápido informa a confiança de cada veredicto; respostas abaixo do limite ou malformadas são refeitas pelo modelo forte, com o texto do site."
+    )
+    confianca_minima = col_confianca.number_input("Confiança mínima para aceitar o modelo rápido", min_value=0.5, max_value=0.99,
+                                                  value=CONFIANCA_MINIMA_PADRAO, step=0.05)
     
     submitted_icp = st.form_submit_button("Salvar ICP e Iniciar Análise")
 
+icp_formulario = {
+    'segmentos': segmentos, 'funcionarios': funcionarios, 'observacoes': observacoes,
+    'paises': paises, 'estados': estados,
+}
+
 st.header("2. Arquivo e Resultados")
 
 leads_df = None
 if 'df_limpo' in st.session_state:
     st.success("Arquivo de leads limpo recebido da Estação 1!")
     leads_df = st.session_state['df_limpo']
+elif 'caminho_df_limpo' in st.session_state and not os.path.exists(st.session_state['caminho_df_limpo']):
+    st.warning("O arquivo limpo em blocos não está mais no servidor; limpe a lista de novo na Estação 1.")
+elif 'caminho_df_limpo' in st.session_state:
+    st.success("Arquivo de leads limpo (modo em blocos) recebido da Estação 1!")
+    caminho_limpo = st.session_state['caminho_df_limpo']
+    st.dataframe(amostra_parquet(caminho_limpo))
+    # O Parquet é lido uma vez por versão do arquivo, e não a cada rerun da página
+    chave_leads = (caminho_limpo, os.path.getmtime(caminho_limpo))
+    if st.session_state.get('chave_leads_em_blocos') != chave_leads:
+        st.session_state['leads_em_blocos'] = ler_csv_flexivel(caminho_limpo)
+        st.session_state['chave_leads_em_blocos'] = chave_leads
+    leads_df = st.session_state['leads_em_blocos']
 else:
     st.write("Suba o arquivo de leads limpo para iniciar.")
-    uploaded_file = st.file_uploader("Selecione o arquivo de DADOS limpo (.csv)", type="csv")
+    uploaded_file = st.file_uploader("Selecione o arquivo de DADOS limpo (.csv ou .parquet)", type=["csv", "parquet"])
     if uploaded_file:
         leads_df = ler_csv_flexivel(uploaded_file)
 
+def botoes_download(rotulo, obter_df, linhas, versao, nome_arquivo):
+    """Um botão por formato; o arquivo só é gerado no clique e fica guardado pela `versao` do resultado."""
+    formatos_download = ['csv', 'parquet'] + (['excel'] if linhas <= MAX_LINHAS_EXCEL else [])
+    for coluna, formato in zip(st.columns(len(formatos_download)), formatos_download):
+        extensao, mime = FORMATOS_EXPORTACAO[formato]
+        coluna.download_button(label=f"⬇️ {rotulo} ({extensao.upper()})", data=exportador(obter_df, formato, versao),
+                               file_name=f'{nome_arquivo}.{extensao}', mime=mime, on_click='ignore')
+
+def formatar_duracao(segundos):
+    minutos, segundos = divmod(int(segundos), 60)
+    horas, minutos = divmod(minutos, 60)
+    return f"{horas}h{minutos:02d}m" if horas else f"{minutos}m{segundos:02d}s"
+
+def mostrar_andamento(trabalho):
+    estado = trabalho.snapshot()
+    descricao_etapa = {'resumo_icp': "Resumindo o ICP", 'filtro': "Aplicando o filtro do ICP", 'ia': "Analisando empresas via IA"}
+    if estado['estado'] == 'na_fila':
+        st.info("Análise na fila: começa assim que outra análise do servidor terminar.")
+    else:
+        st.progress(estado['progresso'], text=f"{descricao_etapa.get(estado['etapa'], 'Finalizando')}: "
+                                              f"{estado['concluidas']} de {estado['total']} empresas")
+    col_vazao, col_eta, col_tempo = st.columns(3)
+    col_vazao.metric("Empresas por minuto", f"{estado['empresas_por_minuto']:.1f}" if estado['empresas_por_minuto'] else "-")
+    col_eta.metric("Tempo restante estimado", formatar_duracao(estado['eta_segundos']) if estado['eta_segundos'] is not None else "-")
+    col_tempo.metric("Tempo decorrido", formatar_duracao(estado['segundos_decorridos']))
+    mostrar_metricas(trabalho, ao_vivo=True)
+    if st.button("⏹️ Cancelar análise"):
+        if not registro_trabalhos.cancelar(trabalho.id, id_sessao):
+            # Outra sessão acompanha a mesma análise: ela continua, mas sai da lista desta sessão
+            st.session_state['trabalhos_icp'].remove(trabalho.id)
+            st.session_state.pop('trabalho_icp', None)
+            st.rerun()
+
+def mostrar_metricas(trabalho, ao_vivo=False):
+    metricas = trabalho.metricas
+    with st.expander("Métricas de desempenho", expanded=ao_vivo):
+        contadores = metricas.contadores()
+        col_leads, col_p50, col_p95, col_tokens = st.columns(4)
+        latencia = metricas.estatisticas('ia.generate_content').get('ia.generate_content')
+        col_leads.metric("Leads por minuto (último minuto)", f"{metricas.vazao_por_minuto('ia.empresa'):.1f}")
+        col_p50.metric("Latência da IA (p50)", f"{latencia['p50']:.2f}s" if latencia else "-")
+        col_p95.metric("Latência da IA (p95)", f"{latencia['p95']:.2f}s" if latencia else "-")
+        por_empresa = metricas.quantidades()
+        ajuda_tokens = None
+        if 'tokens.prompt_por_empresa' in por_empresa:
+            ajuda_tokens = (f"Média por empresa: {por_empresa['tokens.prompt_por_empresa']['media']:.0f} / "
+                            f"{por_empresa['tokens.resposta_por_empresa']['media']:.0f}")
+        col_tokens.metric("Tokens (prompt / resposta)", f"{contadores.get('tokens.prompt', 0)} / {contadores.get('tokens.resposta', 0)}", help=ajuda_tokens)
+        st.dataframe(metricas.como_dataframe(), hide_index=True)
+        if ao_vivo:
+            return
+        col_json, col_csv = st.columns(2)
+        col_json.download_button("⬇️ Métricas (JSON)", data=lambda: metricas.como_json(incluir_amostras=True), on_click='ignore',
+                                 file_name=f'metricas_{trabalho.id}.json', mime='application/json')
+        col_csv.download_button("⬇️ Métricas (CSV)", data=metricas.como_csv, on_click='ignore',
+                                file_name=f'metricas_{trabalho.id}.csv', mime='text/csv')
+        if trabalho.perfil is not None:
+            st.text(trabalho.perfil.texto(linhas=25))
+            st.download_button("⬇️ Perfil (.prof, para pstats ou snakeviz)", data=trabalho.perfil.como_bytes, on_click='ignore',
+                               file_name=f'perfil_{trabalho.id}.prof', mime='application/octet-stream')
+
+@st.fragment(run_every=INTERVALO_ATUALIZACAO_SEGUNDOS)
+def acompanhar_trabalho(id_trabalho):
+    # Só este trecho é reexecutado a cada intervalo; ao terminar, a página inteira é redesenhada com o resultado
+    trabalho = registro_trabalhos.obter(id_trabalho)
+    if trabalho is None:
+        return
+    mostrar_andamento(trabalho)
+    if not trabalho.ativo:
+        st.rerun()
+
+def mostrar_resultado(trabalho):
+    if trabalho.estado == 'erro':
+        st.error(f"Falha na análise: {trabalho.erro}")
+    elif trabalho.estado == 'cancelado':
+        st.warning("Análise cancelada. Os veredictos já recebidos foram salvos; envie o formulário de novo para continuar.")
+    if trabalho.icp_resumido:
+        st.success(f"Resumo do ICP para análise: **{trabalho.icp_resumido}**")
+    plano = trabalho.plano
+    if plano is not None:
+        sites_por_empresa = plano['sites_por_empresa']
+        with st.expander(f"Filtro do ICP: {plano['removidos']} de {len(trabalho.leads_df)} leads removidos antes da IA"):
+            st.dataframe(pd.Series(plano['remocoes_por_regra'], name="linhas removidas").rename_axis("regra"))
+        col_leads, col_empresas, col_reducao = st.columns(3)
+        col_leads.metric("Leads para análise por IA", plano['leads_para_ia'])
+        col_empresas.metric("Empresas únicas", len(sites_por_empresa))
+        col_reducao.metric("Redução de chamadas", f"{plano['leads_para_ia'] / len(sites_por_empresa):.1f}x" if sites_por_empresa else "-")
+        if trabalho.preclassificador is not None:
+            st.caption(f"Regra local: {plano['chamadas_evitadas']} empresas decididas sem a IA "
+                       f"({plano['fracao_chamadas_evitadas']:.0%} das chamadas evitadas).")
+    if trabalho.estado != 'concluido':
+        if trabalho.plano is not None:
+            # A versão muda a cada veredicto: o arquivo guardado vale enquanto nenhuma empresa nova for concluída
+            botoes_download("Baixar Resultado Parcial", trabalho.resultado_parcial, len(trabalho.leads_df),
+                            f"{trabalho.id}:parcial:{trabalho.concluidas}", f'leads_analisados_parcial_{trabalho.id}')
+        if not trabalho.ativo:
+            mostrar_metricas(trabalho)
+        return
+
+    st.success("Análise completa!")
+    if trabalho.usar_cache:
+        col_acertos, col_falhas = st.columns(2)
+        col_acertos.metric("Acertos no cache", trabalho.acertos_cache)
+        col_falhas.metric("Falhas no cache (chamadas à IA)", trabalho.falhas_cache)
+    if trabalho.coleta:
+        coleta = trabalho.coleta
+        st.caption(f"Sites lidos: {coleta['rede']} baixados, {coleta['cache'] + coleta['revalidado']} do cache, "
+                   f"{coleta['falha']} inacessíveis e {coleta['robots']} bloqueados pelo robots.txt (estes seguem com a URL).")
+    with st.expander("Desempenho por tamanho de lote"):
+        st.dataframe(trabalho.estatisticas.como_dataframe())
+    if trabalho.roteamento is not None:
+        with st.expander(f"Classificação em camadas: custo estimado US$ {trabalho.roteamento.custo_total():.4f}"):
+            st.dataframe(trabalho.roteamento.como_dataframe(), hide_index=True)
+    mostrar_metricas(trabalho)
+    st.dataframe(trabalho.resultado.astype(str))
+    botoes_download("Baixar Resultado Final", trabalho.resultado, len(trabalho.resultado), f"{trabalho.id}:final", 'leads_analisados_final')
+
 if submitted_icp and leads_df is not None:
     try:
         genai.configure(api_key=st.secrets["GOOGLE_API_KEY"])
     except (KeyError, AttributeError):
         st.error("Chave de API do Google não configurada.")
         st.stop()
-    
-    criterios_icp_texto = f"Segmentos: {segmentos}. Observações: {observacoes}"
-    icp_resumido = resumir_icp_com_ia(criterios_icp_texto)
-    
-    if icp_resumido:
-        st.success(f"Resumo do ICP para análise: **{icp_resumido}**")
-        
-        # Inicializa colunas de resultado se não existirem
-        for col in ['classificacao_icp', 'motivo_classificacao']:
-            if col not in leads_df.columns:
-                leads_df[col] = ''
-
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-
-        total_leads = len(leads_df)
-        for index, lead in leads_df.iterrows():
-            status_text.text(f"Analisando: {lead.get('Nome_Empresa', f'Linha {index+2}')}...")
-            
-            if not verificar_funcionarios(lead.get('Numero_Funcionarios'), funcionarios):
-                leads_df.at[index, 'classificacao_icp'] = 'Fora do ICP'
-                leads_df.at[index, 'motivo_classificacao'] = 'Porte da empresa fora do perfil'
-            else:
-                site_url = lead.get('Site_Original')
-                analise = None
-                if pd.notna(site_url) and str(site_url).strip() != '':
-                    analise = analisar_icp_com_ia(site_url, icp_resumido)
-                else:
-                    analise = {"error": "Site não informado"}
-                
-                if "error" not in analise:
-                    if analise.get('is_segmento_correto'):
-                        leads_df.at[index, 'classificacao_icp'] = 'Dentro do ICP'
-                        leads_df.at[index, 'motivo_classificacao'] = analise.get('motivo_segmento')
-                    else:
-                        leads_df.at[index, 'classificacao_icp'] = 'Fora do ICP'
-                        leads_df.at[index, 'motivo_classificacao'] = analise.get('motivo_segmento')
-                else:
-                    leads_df.at[index, 'classificacao_icp'] = 'Erro na Análise'
-                    leads_df.at[index, 'motivo_classificacao'] = analise.get('details', 'Site não informado ou inacessível')
-            
-            progress_bar.progress((index + 1) / total_leads)
-            
-        st.success("Análise completa!")
-        st.dataframe(leads_df.astype(str))
-        
-        csv = leads_df.to_csv(sep=';', index=False, encoding='utf-8-sig').encode('utf-8-sig')
-        st.download_button(label="⬇️ Baixar Resultado Final", data=csv, file_name='leads_analisados_final.csv', mime='text/csv')
+
+    # O mesmo arquivo com o mesmo ICP gera o mesmo id: reenviar acompanha a análise em andamento
+    # ou retoma a execução salva (checkpoint) de onde parou
+    opcoes = {
+        'max_concorrencia': max_concorrencia, 'tamanho_lote': tamanho_lote, 'usar_cache': usar_cache,
+        'coletar_sites': coletar_sites, 'preclassificar': preclassificar, 'perfil': perfilar,
+    }
+    camadas = camadas_padrao(confianca_minima) if classificar_em_camadas else None
+    trabalho = registro_trabalhos.submeter(
+        gerar_id_execucao(leads_df, icp_formulario, camadas), leads_df, icp_formulario, sessao=id_sessao, camadas=camadas, **opcoes,
+    )
+    rotulos_opcoes = {
+        'max_concorrencia': "análises simultâneas", 'tamanho_lote': "empresas por lote", 'usar_cache': "cache local",
+        'coletar_sites': "leitura dos sites", 'preclassificar': "decisão local", 'perfil': "perfil de execução",
+    }
+    opcoes_ignoradas = [rotulos_opcoes[nome] for nome, valor in opcoes.items() if trabalho.opcoes.get(nome) != valor]
+    if opcoes_ignoradas:
+        st.warning(f"Esta análise já estava em andamento e segue com as opções do primeiro envio; não foram aplicadas: "
+                   f"{', '.join(opcoes_ignoradas)}. Para usar as novas opções, cancele-a e envie o formulário de novo "
+                   "(se outra sessão também a acompanha, ela segue com as opções originais).")
+    # A sessão só enxerga e acompanha as análises que ela mesma enviou
+    st.session_state.setdefault('trabalhos_icp', [])
+    if trabalho.id not in st.session_state['trabalhos_icp']:
+        st.session_state['trabalhos_icp'].append(trabalho.id)
+    st.session_state['trabalho_icp'] = trabalho.id
 
 elif submitted_icp and leads_df is None:
-    st.warning("Por favor, suba um arquivo de leads para analisar.")
\ No newline at end of file
+    st.warning("Por favor, suba um arquivo de leads para analisar.")
+
+trabalho_atual = registro_trabalhos.obter(st.session_state.get('trabalho_icp'))
+if trabalho_atual is not None:
+    st.caption(f"Análise {trabalho_atual.id}: você pode sair desta página e voltar depois; ela continua no servidor.")
+    if trabalho_atual.ativo:
+        acompanhar_trabalho(trabalho_atual.id)
+        if st.button("Preparar resultado parcial"):
+            mostrar_resultado(trabalho_atual)
+    else:
+        mostrar_resultado(trabalho_atual)
+
+with st.expander("Suas análises no servidor"):
+    analises = registro_trabalhos.listar(st.session_state.get('trabalhos_icp', []))
+    if not analises:
+        st.write("Nenhuma análise recente.")
+    else:
+        st.dataframe(pd.DataFrame(analises)[['id', 'estado', 'linhas', 'concluidas', 'total', 'empresas_por_minuto']], hide_index=True)
+        id_escolhido = st.selectbox("Acompanhar a análise", [a['id'] for a in analises])
+        if st.button("Acompanhar"):
+            st.session_state['trabalho_icp'] = id_escolhido
+            st.rerun()
+
+# --- Resultados parciais (execução interrompida por refresh, erro ou queda) ---
+if leads_df is not None and not submitted_icp:
+    with st.expander("Resultados parciais de uma execução anterior"):
+        st.caption("Usa o arquivo carregado e os critérios atuais do formulário para localizar a execução salva.")
+        if st.button("Procurar execução salva"):
+            id_execucao = gerar_id_execucao(leads_df, icp_formulario, camadas_padrao(confianca_minima) if classificar_em_camadas else None)
+            if not os.path.exists(caminho_execucao(id_execucao)):
+                st.write("Nenhuma execução salva para este arquivo e ICP.")
+            else:
+                checkpoint_salvo = CheckpointExecucao(id_execucao)
+                checkpoint_salvo.fechar()
+                filtro_icp = compilar_filtro_icp(funcionarios, observacoes, paises, estados)
+                preclassificador = compilar_preclassificador(segmentos, observacoes) if preclassificar else None
+                analisadas = len(checkpoint_salvo.concluidas())
+                st.write(f"Execução {id_execucao}: {analisadas} empresas já analisadas. "
+                         "Envie o formulário de novo para continuar de onde parou.")
+                botoes_download("Baixar Resultado Parcial",
+                                lambda: montar_resultado_parcial(leads_df, filtro_icp, checkpoint_salvo, preclassificador),
+                                len(leads_df), f"{id_execucao}:parcial:{analisadas}", f'leads_analisados_parcial_{id_execucao}')
\ No newline at end of file
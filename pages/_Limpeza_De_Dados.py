@@ -1,263 +1,222 @@
 # --- ESTAÇÃO 1: LIMPEZA E PADRONIZAÇÃO DE DADOS (VERSÃO PADRÃO OURO) ---
 import streamlit as st
-import pandas as pd
-import io
-import re
-import unicodedata
-import requests
-from dados_traducao import DICIONARIO_SEGMENTOS
+import os
+import tempfile
+import uuid
+# pandas e pyarrow entram já no import (via deduplicacao, formatos, limpeza e ingestao): os controles da página
+# usam constantes desses módulos. O que é lento e nem sempre usado (mapas do IBGE, cliente da IA) fica sob demanda
+from deduplicacao import REGRAS_SOBREVIVENCIA, IndiceLeads, limpar_com_indice
+from formatos import FORMATOS_EXPORTACAO, MAX_LINHAS_EXCEL, amostra_parquet, eh_parquet, exportador, exportar_parquet_como_csv
+from limpeza import limpar_dataframe_em_paralelo, processos_disponiveis, uso_memoria, estimar_memoria_objeto
+from ingestao import ler_leads, limpar_csv_em_blocos, LINHAS_POR_BLOCO
+from inicializacao import LOCALIDADES, iniciar_aquecimento
+from metricas import Metricas, perfilar
+
+# --- CARREGAMENTO DOS DADOS DE MUNICÍPIOS (ÍNDICE EMBARCADO, SEM REDE) ---
+# Os mapas não são montados na renderização da página: a thread de aquecimento os prepara em segundo
+# plano e a limpeza espera por eles só se ainda não estiverem prontos
+iniciar_aquecimento()
 
-# --- FUNÇÃO DE APOIO PARA NORMALIZAÇÃO ---
-def normalizar_texto_para_comparacao(texto):
-    """Remove acentos e converte para minúsculo para comparações internas."""
-    if pd.isna(texto): return ""
-    s = str(texto).lower().strip()
-    return ''.join(c for c in unicodedata.normalize('NFD', s) if unicodedata.category(c) != 'Mn')
-
-# --- CARREGAMENTO DOS DADOS DE MUNICÍPIOS (FEITO UMA SÓ VEZ) ---
-@st.cache_data
 def carregar_dados_ibge():
-    """Carrega e prepara mapas otimizados de cidades e estados da API do IBGE."""
-    try:
-        st.info("Carregando lista oficial de localidades do IBGE... (só na primeira vez)")
-        url_municipios = "https://servicodados.ibge.gov.br/api/v1/localidades/municipios"
-        response_municipios = requests.get(url_municipios)
-        response_municipios.raise_for_status()
-        municipios_json = response_municipios.json()
-        
-        mapa_cidades = {
-            normalizar_texto_para_comparacao(m['nome']): m['nome']
-            for m in municipios_json if 'nome' in m
-        }
-        
-        mapa_estados = {}
-        for m in municipios_json:
-            try:
-                uf_data = m['microrregiao']['mesorregiao']['UF']
-                sigla = uf_data['sigla'].lower()
-                nome = uf_data['nome']
-                mapa_estados[sigla] = nome
-                mapa_estados[normalizar_texto_para_comparacao(nome)] = nome
-            except (KeyError, TypeError):
-                continue
+    """Mapas de cidades e estados do índice do IBGE que acompanha o app (montados uma vez por processo)."""
+    return LOCALIDADES.obter()
 
-        return mapa_cidades, mapa_estados
-    except Exception as e:
-        st.error(f"Não foi possível carregar a lista de localidades do IBGE: {e}")
-        return {}, {}
-
-MAPA_CIDADES, MAPA_ESTADOS = carregar_dados_ibge()
+@st.cache_resource
+def carregar_indice_leads():
+    """Índice local compartilhado pelas sessões (a trava do índice serializa os envios)."""
+    return IndiceLeads()
 
 
-# --- DEMAIS FUNÇÕES DE PADRONIZAÇÃO ---
+# --- LEITURA DO ARQUIVO ---
 
 def ler_csv_flexivel(arquivo_upado):
+    # Parquet é reconhecido pela assinatura; no CSV, separador (',' ';' tab '|') e codificação são detectados
+    # nos primeiros KB. O arquivo é lido uma única vez
     try:
-        arquivo_upado.seek(0)
-        df = pd.read_csv(arquivo_upado, sep=',', encoding='utf-8', on_bad_lines='skip', low_memory=False)
-        if df.shape[1] <= 1:
-            arquivo_upado.seek(0)
-            df = pd.read_csv(arquivo_upado, sep=';', encoding='utf-8', on_bad_lines='skip', low_memory=False)
-        df.columns = df.columns.str.strip()
-        return df
+        return ler_leads(arquivo_upado)
     except Exception as e:
-        st.error(f"Erro crítico ao ler o arquivo CSV: {e}")
+        st.error(f"Erro crítico ao ler o arquivo: {e}")
         return None
 
-def title_case_com_excecoes(s, excecoes):
-    palavras = str(s).split()
-    if not palavras:
-        return ""
-    resultado = [palavras[0].capitalize()]
-    for palavra in palavras[1:]:
-        if palavra.lower() in excecoes:
-            resultado.append(palavra.lower())
-        else:
-            resultado.append(palavra.capitalize())
-    return ' '.join(resultado)
-
-def padronizar_nome_contato(row, df_columns):
-    nome_col = next((col for col in df_columns if 'first name' in col.lower() or 'nome_lead' in col.lower()), None)
-    sobrenome_col = next((col for col in df_columns if 'last name' in col.lower() or 'sobrenome_lead' in col.lower()), None)
-    if not nome_col or pd.isna(row.get(nome_col)): return ''
-    primeiro_nome = str(row[nome_col]).split()[0]
-    sobrenome_completo = str(row.get(sobrenome_col, ''))
-    conectivos = ['de', 'da', 'do', 'dos', 'das']
-    partes_sobrenome = [p for p in sobrenome_completo.split() if p.lower() not in conectivos]
-    ultimo_sobrenome = partes_sobrenome[-1] if partes_sobrenome else ''
-    nome_final = f"{primeiro_nome} {ultimo_sobrenome}".strip()
-    return nome_final.title()
-
-def padronizar_nome_empresa(nome_empresa):
-    if pd.isna(nome_empresa): return ''
-    nome_limpo = str(nome_empresa)
-    siglas = [r'\sS/A', r'\sS\.A', r'\sSA\b', r'\sLTDA', r'\sLtda', r'\sME\b', r'\sEIRELI', r'\sEPP', r'\sMEI\b']
-    for sigla in siglas:
-        nome_limpo = re.sub(sigla, '', nome_limpo, flags=re.IGNORECASE)
-    return title_case_com_excecoes(nome_limpo.strip(), ['de', 'da', 'do', 'dos', 'das', 'e'])
-
-def padronizar_localidade_geral(valor, tipo):
-    if pd.isna(valor): return ''
-    mapa_paises = { 'br': 'Brasil', 'bra': 'Brasil', 'brazil': 'Brasil' }
-    
-    chave_busca = normalizar_texto_para_comparacao(str(valor))
-    
-    if tipo == 'cidade':
-        return MAPA_CIDADES.get(chave_busca, title_case_com_excecoes(str(valor), ['de', 'da', 'do', 'dos', 'das']))
-    elif tipo == 'estado':
-        chave_busca_estado = re.sub(r'state of ', '', chave_busca).strip()
-        return MAPA_ESTADOS.get(chave_busca_estado, title_case_com_excecoes(str(valor), ['de', 'do']))
-    elif tipo == 'pais':
-        return mapa_paises.get(chave_busca, str(valor).capitalize())
-    return valor
-
-def padronizar_site(site):
-    if pd.isna(site) or str(site).strip() == '': return ''
-    site_limpo = str(site).strip()
-    site_limpo = re.sub(r'^(https?://)?', '', site_limpo)
-    site_limpo = site_limpo.rstrip('/')
-    if not site_limpo.lower().startswith('www.'):
-        site_limpo = 'www.' + site_limpo
-    return site_limpo
-
-def padronizar_telefone(telefone):
-    """Filtra e formata um número de telefone para o padrão brasileiro, removendo 0800 e internacionais."""
-    if pd.isna(telefone):
-        return ''
-    
-    tel_str = str(telefone).strip()
-    
-    # 1. Filtro inicial para números internacionais que começam com '+'
-    if tel_str.startswith('+') and not tel_str.startswith('+55'):
-        return ''
-
-    # 2. Limpa o número para ter apenas os dígitos
-    apenas_digitos = re.sub(r'\D', '', tel_str)
-    
-    # 3. Normalização: Remove o código do país (55) se ele estiver presente no início
-    if apenas_digitos.startswith('55'):
-        apenas_digitos = apenas_digitos[2:]
-
-    # 4. REGRA DE REMOÇÃO 1: Ignora números 0800 (após normalização)
-    if apenas_digitos.startswith('0800'):
-        return ''
-        
-    # 5. Normalização: Remove o '0' inicial de DDD, se houver
-    if len(apenas_digitos) == 11 and apenas_digitos.startswith('0'):
-        apenas_digitos = apenas_digitos[1:]
-
-    # 6. Validação final de tamanho: Se não for um número brasileiro válido, remove
-    if len(apenas_digitos) not in [10, 11]:
-        return ''
-
-    # 7. Formatação para o padrão brasileiro
-    if len(apenas_digitos) == 11:
-        return f"({apenas_digitos[:2]}) {apenas_digitos[2:7]}-{apenas_digitos[7:]}"
-    elif len(apenas_digitos) == 10:
-        # Check for 800 one last time, as some systems might omit the leading 0
-        if apenas_digitos.startswith('800'):
-            return ''
-        return f"({apenas_digitos[:2]}) {apenas_digitos[2:6]}-{apenas_digitos[6:]}"
-    
-    return '' # Caso de segurança, retorna vazio se nada acima funcionar
-
-def padronizar_segmento(segmento):
-    """Traduz o segmento usando o dicionário interno."""
-    if pd.isna(segmento): return ''
-    segmento_norm = str(segmento).lower().strip()
-    return DICIONARIO_SEGMENTOS.get(segmento_norm, title_case_com_excecoes(segmento, []))
-
 # --- INTERFACE DA ESTAÇÃO 1 ---
 st.set_page_config(layout="wide", page_title="Estação 1: Limpeza")
 st.title("⚙️ Estação 1: Limpeza e Preparação de Dados")
 st.write("Faça o upload do seu arquivo de leads (exportado do Apollo ou similar) para limpá-lo e padronizá-lo.")
 
-uploaded_file = st.file_uploader("1. Selecione o arquivo de DADOS brutos (.csv)", type="csv")
+if LOCALIDADES.pronto():
+    _, _, relatorio_localidades = carregar_dados_ibge()
+    st.caption(
+        f"Localidades IBGE de {relatorio_localidades['gerado_em']} (versão {relatorio_localidades['versao']}): "
+        f"{relatorio_localidades['municipios']} municípios, "
+        f"carregadas em {relatorio_localidades['segundos'] * 1000:.0f} ms, "
+        f"~{relatorio_localidades['bytes_memoria'] / 1024 ** 2:.1f} MB em memória."
+    )
+else:
+    st.caption("Localidades IBGE: carregando em segundo plano.")
+
+uploaded_file = st.file_uploader("1. Selecione o arquivo de DADOS brutos (.csv ou .parquet)", type=["csv", "parquet"])
+
+modo_blocos = st.checkbox(
+    "Processar em blocos (arquivos grandes)",
+    help="Lê e limpa o arquivo CSV em partes, gravando o resultado direto em disco (Parquet). A memória usada não cresce com o tamanho do arquivo."
+)
+linhas_por_bloco = st.number_input("Linhas por bloco", min_value=1000, max_value=1_000_000, value=LINHAS_POR_BLOCO, step=10_000, disabled=not modo_blocos)
+usar_todos_nucleos = st.checkbox(
+    f"Limpeza paralela ({processos_disponiveis()} núcleos disponíveis)", disabled=modo_blocos,
+    help="Divide as linhas entre processos. Vale a pena a partir de centenas de milhares de linhas."
+)
+usar_indice = st.checkbox(
+    "Reaproveitar linhas já limpas e remover contatos repetidos (índice local)", value=True, disabled=modo_blocos,
+    help="Linhas idênticas às de envios anteriores voltam do índice sem nova limpeza, e cada contato (e-mail, ou nome + empresa) sai uma única vez."
+)
+regra_sobrevivencia = st.selectbox(
+    "Registro que prevalece entre contatos repetidos", list(REGRAS_SOBREVIVENCIA),
+    format_func=REGRAS_SOBREVIVENCIA.get, disabled=modo_blocos or not usar_indice
+)
+apenas_novos = st.checkbox(
+    "Manter só contatos novos ou alterados desde os envios anteriores", value=False, disabled=modo_blocos or not usar_indice
+)
+perfilar_limpeza = st.checkbox("Gerar perfil de execução (cProfile) para diagnóstico", value=False)
+
+def mostrar_metricas(metricas, perfil, linhas):
+    """Tempo de cada etapa da limpeza, com exportação em JSON/CSV e o perfil cProfile quando gerado."""
+    with st.expander("Métricas de desempenho"):
+        estatisticas = metricas.estatisticas()
+        if 'indice.limpeza_incremental' in estatisticas:  # as etapas 'limpeza.*' das linhas novas estão dentro dela
+            total = sum(estatisticas[nome]['total'] for nome in ('limpeza.localidades', 'limpeza.leitura_csv', 'indice.limpeza_incremental', 'indice.deduplicacao') if nome in estatisticas)
+        else:
+            total = sum(e['total'] for nome, e in estatisticas.items() if nome.startswith('limpeza.'))
+        col_total, col_vazao = st.columns(2)
+        col_total.metric("Tempo total da limpeza", f"{total:.2f}s")
+        col_vazao.metric("Linhas por segundo", f"{linhas / total:,.0f}".replace(',', '.') if total else "-")
+        tabela = metricas.como_dataframe()
+        st.dataframe(tabela[tabela['tipo'] == 'etapa'].drop(columns=['tipo', 'valor']), hide_index=True)
+        col_json, col_csv = st.columns(2)
+        col_json.download_button("⬇️ Métricas (JSON)", data=metricas.como_json(), file_name='metricas_limpeza.json', mime='application/json')
+        col_csv.download_button("⬇️ Métricas (CSV)", data=metricas.como_csv(), file_name='metricas_limpeza.csv', mime='text/csv')
+        if perfil is not None:
+            st.text(perfil.texto(linhas=25))
+            st.download_button("⬇️ Perfil (.prof, para pstats ou snakeviz)", data=perfil.como_bytes(),
+                               file_name='perfil_limpeza.prof', mime='application/octet-stream')
+
+def descartar_resultado_em_blocos():
+    """Apaga o Parquet (e o CSV gerado ao lado dele) da limpeza em blocos anterior desta sessão."""
+    caminho = st.session_state.pop('caminho_df_limpo', None)
+    for chave in ('leads_em_blocos', 'chave_leads_em_blocos'):  # cópia lida pela Estação 2
+        st.session_state.pop(chave, None)
+    if caminho:
+        for arquivo in (caminho, os.path.splitext(caminho)[0] + '.csv'):
+            try:
+                os.remove(arquivo)
+            except OSError:
+                pass
+
 
 if st.button("🧹 Iniciar Limpeza e Padronização"):
-    if uploaded_file is not None:
+    metricas = Metricas()
+    with metricas.cronometrar('limpeza.localidades'):
+        mapa_cidades, mapa_estados, relatorio_localidades = carregar_dados_ibge()
+    # Parquet já chega tipado e colunar: é limpo em memória mesmo com o modo em blocos marcado
+    if uploaded_file is not None and modo_blocos and not eh_parquet(uploaded_file):
+        barra_progresso = st.progress(0, text="Iniciando leitura em blocos...")
+
+        def mostrar_progresso(linhas, fracao_lida):
+            barra_progresso.progress(fracao_lida, text=f"{linhas:,} linhas limpas ({fracao_lida:.0%} do arquivo lido)".replace(',', '.'))
+
+        # Um arquivo por limpeza: sessões limpando ao mesmo tempo não podem gravar no mesmo caminho temporário
+        descritor, destino = tempfile.mkstemp(prefix='leads_limpos_', suffix='.parquet')
+        os.close(descritor)
+        try:
+            with perfilar(perfilar_limpeza) as perfil:
+                resumo = limpar_csv_em_blocos(
+                    uploaded_file, destino, mapa_cidades, mapa_estados,
+                    linhas_por_bloco=int(linhas_por_bloco), ao_progredir=mostrar_progresso, metricas=metricas,
+                )
+        except Exception as e:
+            st.error(f"Erro crítico ao processar o arquivo CSV: {e}")
+            os.remove(destino)
+        else:
+            barra_progresso.progress(1.0, text="Concluído!")
+            st.success(
+                f"{resumo['linhas']:,} linhas limpas em {resumo['blocos']} blocos em {resumo['segundos']:.1f}s "
+                f"(separador '{resumo['separador']}', codificação {resumo['codificacao']})."
+            )
+            st.dataframe(amostra_parquet(destino))
+            mostrar_metricas(metricas, perfil, resumo['linhas'])
+            st.session_state.pop('df_limpo', None)
+            descartar_resultado_em_blocos()
+            st.session_state['caminho_df_limpo'] = destino
+            st.session_state['versao_df_limpo'] = uuid.uuid4().hex
+    elif uploaded_file is not None:
         with st.spinner('Lendo e processando o arquivo... Por favor, aguarde.'):
-            df = ler_csv_flexivel(uploaded_file)
+            with metricas.cronometrar('limpeza.leitura_csv'):
+                df = ler_csv_flexivel(uploaded_file)
             
             if df is not None:
-                mapa_colunas = {
-                    'First Name': 'Nome_Lead', 'Last Name': 'Sobrenome_Lead', 'Title': 'Cargo', 
-                    'Company': 'Nome_Empresa', 'Email': 'Email_Lead', 'Corporate Phone': 'Telefone_Original',
-                    'Industry': 'Segmento_Original', 'City': 'Cidade_Contato', 'State': 'Estado_Contato', 
-                    'Country': 'Pais_Contato', 'Company City': 'Cidade_Empresa', 'Company State': 'Estado_Empresa',
-                    'Company Country': 'Pais_Empresa', 'Website': 'Site_Original', '# Employees': 'Numero_Funcionarios',
-                    'Person Linkedin Url': 'Linkedin_Contato', 'Company Linkedin Url': 'LinkedIn_Empresa', 
-                    'Facebook Url': 'Facebook_Empresa'
-                }
-                
-                colunas_para_renomear = {k: v for k, v in mapa_colunas.items() if k in df.columns}
-                df_limpo = df.rename(columns=colunas_para_renomear)
-                
-                colunas_finais = list(colunas_para_renomear.values())
-                df_limpo = df_limpo[[col for col in colunas_finais if col in df_limpo.columns]].copy()
-
-                df_cols = list(df_limpo.columns)
-                if 'Nome_Lead' in df_cols and 'Sobrenome_Lead' in df_cols:
-                    df_limpo['Nome_Completo'] = df_limpo.apply(lambda row: padronizar_nome_contato(row, df_cols), axis=1)
-                    # --- ALTERAÇÃO REALIZADA AQUI ---
-                    # Adicionado para remover as colunas originais após criar a Nome_Completo
-                    df_limpo = df_limpo.drop(columns=['Nome_Lead', 'Sobrenome_Lead'])
-                
-                colunas_para_padronizar = {
-                    'Nome_Empresa': padronizar_nome_empresa, 
-                    'Site_Original': padronizar_site,
-                    'Telefone_Original': padronizar_telefone,
-                    'Segmento_Original': padronizar_segmento, 
-                    'Cidade_Contato': lambda x: padronizar_localidade_geral(x, 'cidade'),
-                    'Estado_Contato': lambda x: padronizar_localidade_geral(x, 'estado'),
-                    'Pais_Contato': lambda x: padronizar_localidade_geral(x, 'pais'),
-                    'Cidade_Empresa': lambda x: padronizar_localidade_geral(x, 'cidade'),
-                    'Estado_Empresa': lambda x: padronizar_localidade_geral(x, 'estado'),
-                    'Pais_Empresa': lambda x: padronizar_localidade_geral(x, 'pais'),
-                }
-                
-                for col, func in colunas_para_padronizar.items():
-                    if col in df_limpo.columns:
-                        df_limpo[col] = df_limpo[col].astype(str).apply(func)
-                
-                # Reordenar colunas para a sequência final desejada
-                ordem_final_desejada = [
-                    'Nome_Completo', 'Cargo', 'Email_Lead', 'Nome_Empresa', 'Site_Original',
-                    'Telefone_Original', 'Cidade_Contato', 'Estado_Contato', 'Pais_Contato',
-                    'Segmento_Original', 'Cidade_Empresa', 'Estado_Empresa', 'Pais_Empresa',
-                    'Numero_Funcionarios', 'Linkedin_Contato', 'LinkedIn_Empresa', 'Facebook_Empresa'
-                ]
-
-                # Filtra a lista de ordem para conter apenas as colunas que realmente existem no DataFrame
-                colunas_existentes_na_ordem = [col for col in ordem_final_desejada if col in df_limpo.columns]
-                
-                # Pega quaisquer outras colunas que não foram especificadas para não perdê-las
-                outras_colunas = [col for col in df_limpo.columns if col not in colunas_existentes_na_ordem]
-
-                # Aplica a ordem final
-                df_limpo = df_limpo[colunas_existentes_na_ordem + outras_colunas]
-                df_limpo.fillna('', inplace=True)
-                for col in df_limpo.columns:
-                    df_limpo[col] = df_limpo[col].astype(str).replace('nan', '')
+                # Forma compacta (category / strings Arrow): é ela que fica na sessão do usuário
+                processos = None if usar_todos_nucleos else 1
+                resumo_indice = None
+                with perfilar(perfilar_limpeza) as perfil:
+                    if usar_indice:
+                        df_limpo, resumo_indice = limpar_com_indice(
+                            df, carregar_indice_leads(), mapa_cidades, mapa_estados, regra_sobrevivencia,
+                            relatorio_localidades['versao'], processos, compactar=True, apenas_novos=apenas_novos, metricas=metricas
+                        )
+                    else:
+                        df_limpo = limpar_dataframe_em_paralelo(df, mapa_cidades, mapa_estados, processos, compactar=True, metricas=metricas)
+                del df
 
                 st.success("Arquivo limpo e padronizado com sucesso!")
+                if resumo_indice:
+                    col_novos, col_alterados, col_repetidos, col_duplicados, col_reaproveitadas = st.columns(5)
+                    col_novos.metric("Contatos novos", resumo_indice['novo'])
+                    col_alterados.metric("Alterados", resumo_indice['alterado'])
+                    col_repetidos.metric("Já enviados antes", resumo_indice['repetido'])
+                    col_duplicados.metric("Duplicados no arquivo", resumo_indice['duplicados_no_envio'])
+                    col_reaproveitadas.metric("Linhas reaproveitadas", f"{resumo_indice['linhas_reaproveitadas']}/{resumo_indice['linhas']}")
+                bytes_objeto, bytes_compacto = estimar_memoria_objeto(df_limpo), uso_memoria(df_limpo)
+                st.caption(
+                    f"Memória do arquivo limpo: ~{bytes_objeto / 1024 ** 2:.1f} MB como texto Python, "
+                    f"{bytes_compacto / 1024 ** 2:.1f} MB na forma compacta "
+                    f"({(df_limpo.dtypes == 'category').sum()} de {df_limpo.shape[1]} colunas como categoria)."
+                )
                 st.dataframe(df_limpo.head(10))
+                mostrar_metricas(metricas, perfil, resumo_indice['linhas'] if resumo_indice else len(df_limpo))
 
+                descartar_resultado_em_blocos()
                 st.session_state['df_limpo'] = df_limpo
+                st.session_state['versao_df_limpo'] = uuid.uuid4().hex
     else:
         st.warning("Por favor, faça o upload de um arquivo para começar.")
 
-if 'df_limpo' in st.session_state:
+if 'df_limpo' in st.session_state or 'caminho_df_limpo' in st.session_state:
     st.write("---")
     st.header("Próximo Passo")
     col1, col2 = st.columns(2)
     
     with col1:
-        csv = st.session_state['df_limpo'].to_csv(sep=';', index=False, encoding='utf-8-sig').encode('utf-8-sig')
-        st.download_button(
-            label="⬇️ Baixar CSV Limpo", data=csv, file_name='leads_limpos.csv', 
-            mime='text/csv', use_container_width=True
-        )
+        # Os arquivos só são gerados no clique (e guardados pela versão do resultado), não a cada rerun
+        if 'df_limpo' in st.session_state:
+            df_limpo = st.session_state['df_limpo']
+            formatos_download = ['csv', 'parquet'] + (['excel'] if len(df_limpo) <= MAX_LINHAS_EXCEL else [])
+            for formato in formatos_download:
+                extensao, mime = FORMATOS_EXPORTACAO[formato]
+                st.download_button(
+                    label=f"⬇️ Baixar Limpo ({extensao.upper()})", data=exportador(df_limpo, formato, st.session_state.get('versao_df_limpo')),
+                    file_name=f'leads_limpos.{extensao}', mime=mime, on_click='ignore', use_container_width=True
+                )
+        else:
+            # Modo em blocos: o Parquet em disco é entregue como está e o CSV é convertido bloco a bloco;
+            # o botão recebe o arquivo aberto, lido pelo Streamlit só no clique
+            caminho_limpo = st.session_state['caminho_df_limpo']
+            st.download_button(
+                label="⬇️ Baixar Limpo (CSV)", data=lambda: open(exportar_parquet_como_csv(caminho_limpo), 'rb'),
+                file_name='leads_limpos.csv', mime='text/csv', on_click='ignore', use_container_width=True
+            )
+            st.download_button(
+                label="⬇️ Baixar Limpo (PARQUET)", data=lambda: open(caminho_limpo, 'rb'),
+                file_name='leads_limpos.parquet', mime=FORMATOS_EXPORTACAO['parquet'][1], on_click='ignore', use_container_width=True
+            )
         
     with col2:
         if st.button("➡️ Enviar para Análise (Estação 2)", use_container_width=True):
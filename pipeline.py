@@ -0,0 +1,255 @@
+# Execução das duas estações sem a interface, para rotinas agendadas e processamento em lote:
+#   python pipeline.py leads.csv --icp icp.json --saida leads_qualificados.csv
+# O progresso sai em stdout como uma linha JSON por evento.
+import argparse
+import json
+import os
+import sys
+import time
+
+from cache_icp import CacheICP
+from coleta_sites import CacheHTTP, ColetorSites
+from deduplicacao import REGRAS_SOBREVIVENCIA, IndiceLeads, limpar_com_indice
+from execucoes import CheckpointExecucao, gerar_id_execucao
+from filtros_icp import compilar_filtro_icp, compilar_preclassificador
+from formatos import exportar
+from inicializacao import sob_demanda
+from ingestao import ler_leads
+from limpeza import limpar_dataframe_em_paralelo, medir_aceleracao
+from localidades import carregar_localidades
+from metricas import Metricas, perfilar
+from qualificacao import EstatisticasLotes, montar_criterios_icp, qualificar_dataframe, resumir_icp_com_ia
+from roteamento import CONFIANCA_MINIMA_PADRAO, MODELO_FORTE, MODELO_RAPIDO, Roteador, camadas_padrao
+
+# Mesmos campos e valores iniciais do formulário de ICP da Estação 2
+ICP_PADRAO = {
+    'segmentos': "Serviços financeiros, Saúde, Varejo, E-commerce, Logística, Tecnologia, BPO",
+    'funcionarios': "acima de 50",
+    'observacoes': "Não pode ser do setor governamental",
+    'paises': "",
+    'estados': "",
+}
+INTERVALO_PROGRESSO_SEGUNDOS = 1.0
+
+genai = sob_demanda('google.generativeai')  # --apenas-limpeza não carrega o cliente da IA
+
+
+def emitir_json(evento, **dados):
+    """Escreve um evento como uma linha JSON em stdout."""
+    print(json.dumps({'evento': evento, 'momento': round(time.time(), 3), **dados}, ensure_ascii=False, default=str), flush=True)
+
+
+def carregar_icp(caminho):
+    """Lê a definição do ICP (JSON com as chaves de `ICP_PADRAO`); chaves ausentes usam o padrão."""
+    with open(caminho, encoding='utf-8') as arquivo:
+        icp = json.load(arquivo)
+    desconhecidas = set(icp) - set(ICP_PADRAO)
+    if desconhecidas:
+        raise ValueError(f"Chaves desconhecidas no ICP: {', '.join(sorted(desconhecidas))}")
+    return {**ICP_PADRAO, **icp}
+
+
+def ler_entrada(caminho):
+    """Lê um arquivo de leads em CSV (separador e codificação detectados) ou Parquet."""
+    return ler_leads(caminho)
+
+
+def gravar_saida(df, caminho):
+    """Grava em Parquet (tipos e categorias preservados), Excel ('.xlsx') ou, para qualquer outra extensão,
+    em CSV no formato das estações (';', UTF-8 com BOM)."""
+    extensao = os.path.splitext(caminho)[1].lower()
+    formato = {'.parquet': 'parquet', '.xlsx': 'excel'}.get(extensao, 'csv')
+    with open(caminho, 'wb') as arquivo:
+        arquivo.write(exportar(df, formato))
+
+
+def executar(entrada, saida, icp=None, limpar=True, qualificar=True, usar_cache=True, max_concorrencia=8,
+             requisicoes_por_minuto=60, tokens_por_minuto=None, tamanho_lote=10, processos=1, medir_processos=False, retomar=True,
+             coletar_sites=True, preclassificar=True, deduplicar=False, regra='mais_completo', apenas_novos=False,
+             camadas=None, metricas=None, emitir=emitir_json):
+    """Lê `entrada`, limpa (Estação 1), qualifica (Estação 2) e grava `saida`.
+
+    A limpeza usa `processos` processos (None = todos os núcleos); com `medir_processos`, a aceleração
+    por número de processos é medida antes e emitida como eventos `aceleracao`.
+    Com `retomar`, a qualificação grava um checkpoint e continua uma execução anterior do mesmo arquivo e ICP.
+    Com `coletar_sites`, a página inicial de cada empresa é baixada e a IA recebe o texto em vez da URL.
+    Com `preclassificar`, as empresas de veredicto evidente pelo segmento, nome ou domínio são decididas sem a IA.
+    Com `deduplicar`, a limpeza usa o índice local de leads: linhas já vistas não são limpas de novo e cada
+    contato sai uma única vez, escolhido por `regra`; com `apenas_novos`, só os contatos novos ou alterados.
+    Com `camadas` (lista de `roteamento.Camada`), a IA classifica em camadas e o resumo traz os números de cada uma.
+    Com `tokens_por_minuto`, as chamadas à IA respeitam também a cota de tokens de entrada por minuto.
+    `emitir(evento, **dados)` recebe o início e o fim de cada etapa e o progresso da IA.
+    Com `metricas` (um `metricas.Metricas`), também são registrados os tempos internos da limpeza e de cada chamada à IA.
+    Retorna o resumo da execução, com o tempo de cada etapa em `segundos_por_etapa`.
+    """
+    tempos = {}
+
+    def etapa(nome, funcao):
+        emitir('etapa_iniciada', etapa=nome)
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos[nome] = round(time.perf_counter() - inicio, 3)
+        if metricas:
+            metricas.registrar(f'etapa.{nome}', time.perf_counter() - inicio)
+        emitir('etapa_concluida', etapa=nome, segundos=tempos[nome])
+        return resultado
+
+    resumo = {'entrada': entrada, 'saida': saida}
+    df = etapa('leitura', lambda: ler_entrada(entrada))
+    resumo['linhas_entrada'] = len(df)
+
+    if limpar:
+        mapa_cidades, mapa_estados, relatorio_localidades = carregar_localidades()
+        if medir_processos:
+            for medicao in etapa('medicao_processos', lambda: medir_aceleracao(df, mapa_cidades, mapa_estados)):
+                emitir('aceleracao', **medicao)
+        if deduplicar:
+            df, resumo['deduplicacao'] = etapa('limpeza', lambda: limpar_com_indice(
+                df, IndiceLeads(), mapa_cidades, mapa_estados, regra, relatorio_localidades['versao'],
+                processos, compactar=True, apenas_novos=apenas_novos, metricas=metricas))
+        else:
+            df = etapa('limpeza', lambda: limpar_dataframe_em_paralelo(df, mapa_cidades, mapa_estados, processos, compactar=True, metricas=metricas))
+
+    if qualificar:
+        icp = icp or ICP_PADRAO
+        cache = CacheICP() if usar_cache else None
+        coletor = ColetorSites(CacheHTTP() if usar_cache else None, max_concorrencia=2 * max_concorrencia) if coletar_sites else None
+        checkpoint = CheckpointExecucao(gerar_id_execucao(df, icp, camadas)) if retomar else None
+        roteador = None
+        if camadas:
+            coletor_camadas = coletor
+            if coletor_camadas is None and any(camada.coletar_texto for camada in camadas):
+                coletor_camadas = ColetorSites(CacheHTTP() if usar_cache else None, max_concorrencia=2 * max_concorrencia)
+            roteador = Roteador(camadas, coletor_camadas)
+        try:
+            if checkpoint:
+                resumo['id_execucao'] = checkpoint.id_execucao
+                emitir('execucao', id_execucao=checkpoint.id_execucao, empresas_ja_analisadas=len(checkpoint.concluidas()))
+            if checkpoint and checkpoint.icp_resumido:
+                icp_resumido = checkpoint.icp_resumido
+            else:
+                criterios_icp_texto = montar_criterios_icp(icp['segmentos'], icp['observacoes'])
+                icp_resumido = etapa('resumo_icp', lambda: resumir_icp_com_ia(criterios_icp_texto, cache))
+                if checkpoint:
+                    checkpoint.iniciar(icp_resumido)
+            filtro_icp = compilar_filtro_icp(icp['funcionarios'], icp['observacoes'], icp['paises'], icp['estados'])
+            preclassificador = compilar_preclassificador(icp['segmentos'], icp['observacoes']) if preclassificar else None
+            estatisticas_lotes = EstatisticasLotes()
+            plano_parcial = {}  # preenchido por `ao_planejar`, antes da primeira chamada à IA
+            ultimo_aviso = [0.0]
+            inicio_ia = time.perf_counter()
+
+            def ao_concluir(empresa, analise, concluidas):
+                agora = time.perf_counter()
+                total = len(plano_parcial['sites_por_empresa'])
+                if agora - ultimo_aviso[0] >= INTERVALO_PROGRESSO_SEGUNDOS or concluidas == total:
+                    ultimo_aviso[0] = agora
+                    emitir('progresso', etapa='qualificacao', concluidas=concluidas, total=total,
+                           empresas_por_minuto=round(60 * concluidas / max(agora - inicio_ia, 1e-9), 1))
+
+            plano = etapa('qualificacao', lambda: qualificar_dataframe(
+                df, icp_resumido, filtro_icp, ao_concluir=ao_concluir,
+                max_concorrencia=max_concorrencia, requisicoes_por_minuto=requisicoes_por_minuto,
+                tokens_por_minuto=tokens_por_minuto, cache=cache, tamanho_lote=tamanho_lote, estatisticas=estatisticas_lotes,
+                checkpoint=checkpoint, ao_planejar=plano_parcial.update, coletor=coletor,
+                preclassificador=preclassificador, metricas=metricas, roteador=roteador,
+            ))
+        finally:
+            if cache:
+                cache.fechar()
+            if coletor:
+                coletor.fechar()
+            if roteador and roteador.coletor is not None and roteador.coletor is not coletor:
+                roteador.coletor.fechar()
+            if checkpoint:
+                checkpoint.fechar()
+        resumo.update({
+            'removidos_pelo_filtro': plano['removidos'],
+            'remocoes_por_regra': plano['remocoes_por_regra'],
+            'leads_para_ia': plano['leads_para_ia'],
+            'empresas_unicas': len(plano['sites_por_empresa']) + plano['chamadas_evitadas'],
+            'empresas_para_ia': len(plano['sites_por_empresa']),
+            'chamadas_evitadas_regra_local': plano['chamadas_evitadas'],
+            'fracao_chamadas_evitadas': round(plano['fracao_chamadas_evitadas'], 4),
+            'classificacoes': {str(k): int(v) for k, v in df['classificacao_icp'].value_counts().items() if v},
+        })
+        if cache:
+            resumo['cache'] = {'acertos': cache.acertos, 'falhas': cache.falhas}
+        if coletor:
+            resumo['coleta_sites'] = dict(coletor.contagens)
+        if roteador:
+            resumo['camadas'] = roteador.estatisticas.resumo()
+            resumo['custo_estimado_usd'] = round(roteador.estatisticas.custo_total(), 6)
+
+    etapa('gravacao', lambda: gravar_saida(df, saida))
+    resumo['linhas_saida'] = len(df)
+    resumo['segundos_por_etapa'] = tempos
+    resumo['segundos_total'] = round(sum(tempos.values()), 3)
+    return resumo
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Limpeza e qualificação de leads do Agente LDR, sem a interface.")
+    parser.add_argument('entrada', help="arquivo de leads (.csv ou .parquet)")
+    parser.add_argument('--saida', required=True, help="arquivo de resultado (.csv, .parquet ou .xlsx)")
+    parser.add_argument('--icp', help="JSON com segmentos, funcionarios, observacoes, paises e estados")
+    parser.add_argument('--sem-limpeza', action='store_true', help="a entrada já foi limpa pela Estação 1")
+    parser.add_argument('--apenas-limpeza', action='store_true', help="não executa a qualificação por IA")
+    parser.add_argument('--sem-cache', action='store_true', help="não reaproveita análises anteriores")
+    parser.add_argument('--sem-checkpoint', action='store_true', help="não grava nem retoma o checkpoint da execução")
+    parser.add_argument('--concorrencia', type=int, default=8, help="análises simultâneas (padrão: %(default)s)")
+    parser.add_argument('--rpm', type=int, default=60, help="limite de requisições por minuto (padrão: %(default)s)")
+    parser.add_argument('--tpm', type=int, help="limite de tokens de entrada por minuto da cota da API (padrão: sem limite)")
+    parser.add_argument('--processos', type=int, default=1, help="processos na limpeza; 0 = todos os núcleos (padrão: %(default)s)")
+    parser.add_argument('--medir-processos', action='store_true', help="mede a aceleração da limpeza com 1, 2, 4... processos")
+    parser.add_argument('--sem-preclassificacao', action='store_true', help="envia todas as empresas à IA, sem a regra local")
+    parser.add_argument('--sem-coleta', action='store_true', help="envia a URL à IA em vez do texto baixado do site")
+    parser.add_argument('--lote', type=int, default=10, help="empresas por chamada à IA (padrão: %(default)s)")
+    parser.add_argument('--camadas', action='store_true', help="classificação em camadas: modelo rápido primeiro, forte só nos casos incertos")
+    parser.add_argument('--confianca-minima', type=float, default=CONFIANCA_MINIMA_PADRAO,
+                        help="com --camadas, confiança para aceitar o modelo rápido (padrão: %(default)s)")
+    parser.add_argument('--modelo-rapido', default=MODELO_RAPIDO, help="com --camadas, primeira camada (padrão: %(default)s)")
+    parser.add_argument('--modelo-forte', default=MODELO_FORTE, help="com --camadas, camada dos casos incertos (padrão: %(default)s)")
+    parser.add_argument('--deduplicar', action='store_true', help="reaproveita linhas já limpas e remove contatos repetidos (índice local)")
+    parser.add_argument('--regra', choices=list(REGRAS_SOBREVIVENCIA), default='mais_completo',
+                        help="registro que prevalece entre contatos repetidos (padrão: %(default)s)")
+    parser.add_argument('--apenas-novos', action='store_true', help="com --deduplicar, mantém só os contatos novos ou alterados")
+    parser.add_argument('--metricas', metavar='ARQUIVO', help="grava as métricas de desempenho (.json ou .csv)")
+    parser.add_argument('--perfil', metavar='ARQUIVO', help="grava o perfil cProfile da execução (.prof)")
+    args = parser.parse_args(argv)
+
+    qualificar = not args.apenas_limpeza
+    if qualificar:
+        if not os.environ.get('GOOGLE_API_KEY'):
+            emitir_json('erro', mensagem="Defina a variável de ambiente GOOGLE_API_KEY.")
+            return 2
+        genai.configure(api_key=os.environ['GOOGLE_API_KEY'])
+
+    metricas = Metricas() if args.metricas else None
+    try:
+        with perfilar(bool(args.perfil)) as perfil:
+            resumo = executar(
+                args.entrada, args.saida,
+                icp=carregar_icp(args.icp) if args.icp else None,
+                limpar=not args.sem_limpeza, qualificar=qualificar, usar_cache=not args.sem_cache,
+                max_concorrencia=args.concorrencia, requisicoes_por_minuto=args.rpm, tokens_por_minuto=args.tpm, tamanho_lote=args.lote,
+                processos=args.processos or None, medir_processos=args.medir_processos, retomar=not args.sem_checkpoint,
+                coletar_sites=not args.sem_coleta, preclassificar=not args.sem_preclassificacao,
+                deduplicar=args.deduplicar, regra=args.regra, apenas_novos=args.apenas_novos,
+                camadas=camadas_padrao(args.confianca_minima, args.modelo_rapido, args.modelo_forte) if args.camadas else None,
+                metricas=metricas,
+            )
+    except Exception as e:
+        emitir_json('erro', mensagem=str(e), tipo=type(e).__name__)
+        return 1
+    finally:
+        if metricas:
+            metricas.exportar(args.metricas)
+        if perfil:
+            perfil.gravar(args.perfil)
+    emitir_json('concluido', **resumo)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
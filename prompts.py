@@ -0,0 +1,154 @@
+# Montagem dos prompts da Estação 2 com orçamento de tokens: o resumo do ICP entra numa forma canônica compacta
+# (a mesma em todos os prompts da execução), o material de cada empresa é cortado no seu orçamento, cada prompt
+# tem teto de tokens de entrada e a resposta tem `max_output_tokens`. O cache de contexto do lado do modelo
+# exige dezenas de milhares de tokens, muito acima de um resumo de ICP; por isso o contexto vai compactado.
+import functools
+import json
+import re
+
+from metricas import CARACTERES_POR_TOKEN, contar
+
+MAX_TOKENS_PROMPT = 4000
+MAX_TOKENS_MATERIAL = 350  # ~1400 caracteres: título, descrição e começo do texto do site
+MIN_TOKENS_MATERIAL = 40  # piso quando o lote é grande demais para o teto do prompt
+MAX_TOKENS_ICP = 200
+MAX_TOKENS_RESPOSTA_POR_EMPRESA = 120
+FOLGA_TOKENS_RESPOSTA = 32  # colchetes, cercas de código e espaços da resposta
+FATOR_TETO_REPETICAO = 2  # uma resposta cortada no teto é pedida de novo, uma vez, com o teto multiplicado
+MAX_PALAVRAS_RESUMO_ICP = 80
+MAX_TOKENS_RESUMO_ICP = 200
+
+PADRAO_MARCACAO = re.compile(r'\*\*|__|`|^\s*#+\s*|^\s*(?:[-*•]|\d+[.)])\s+', re.MULTILINE)
+
+
+class OrcamentoPrompt:
+    """Tetos de tokens de uma chamada de classificação; None = sem teto.
+
+    - `max_tokens_prompt`: entrada total (num lote, o material de cada empresa encolhe para caber);
+    - `max_tokens_material`: texto do site (ou URL) de cada empresa;
+    - `max_tokens_icp`: resumo do ICP na forma compacta (None = texto original, sem compactar);
+    - `max_tokens_resposta_por_empresa`: vira o `max_output_tokens` da chamada, com `FOLGA_TOKENS_RESPOSTA`
+      (multiplicado por `FATOR_TETO_REPETICAO` quando a resposta é pedida de novo por ter sido cortada).
+    """
+
+    def __init__(self, max_tokens_prompt=MAX_TOKENS_PROMPT, max_tokens_material=MAX_TOKENS_MATERIAL,
+                 max_tokens_icp=MAX_TOKENS_ICP, max_tokens_resposta_por_empresa=MAX_TOKENS_RESPOSTA_POR_EMPRESA):
+        self.max_tokens_prompt = max_tokens_prompt
+        self.max_tokens_material = max_tokens_material
+        self.max_tokens_icp = max_tokens_icp
+        self.max_tokens_resposta_por_empresa = max_tokens_resposta_por_empresa
+
+    def config_geracao(self, empresas=1, repeticao=False):
+        """`generation_config` da chamada, ou None sem teto de resposta; com `repeticao`, o teto maior da nova tentativa."""
+        if self.max_tokens_resposta_por_empresa is None:
+            return None
+        teto = FOLGA_TOKENS_RESPOSTA + empresas * self.max_tokens_resposta_por_empresa
+        return {'max_output_tokens': teto * FATOR_TETO_REPETICAO if repeticao else teto}
+
+
+ORCAMENTO_PADRAO = OrcamentoPrompt()
+SEM_ORCAMENTO = OrcamentoPrompt(None, None, None, None)  # prompts como antes do orçamento, para comparação
+
+
+def estimar_tokens(texto):
+    return -(-len(texto) // CARACTERES_POR_TOKEN)
+
+
+def truncar(texto, max_tokens):
+    """Corta `texto` no fim da última palavra que cabe em `max_tokens` (None = sem corte)."""
+    if max_tokens is None or estimar_tokens(texto) <= max_tokens:
+        return texto
+    corte = texto[:max(1, max_tokens * CARACTERES_POR_TOKEN - 1)]
+    if ' ' in corte:
+        corte = corte.rsplit(' ', 1)[0]
+    return corte + '…'
+
+
+@functools.lru_cache(maxsize=32)
+def compactar_icp(icp_resumido, max_tokens=MAX_TOKENS_ICP):
+    """Forma canônica do resumo do ICP: sem marcação, com espaços normalizados e sem linhas repetidas.
+
+    Calculada uma vez por resumo; todos os prompts da execução recebem o mesmo texto.
+    """
+    partes, vistas = [], set()
+    for linha in PADRAO_MARCACAO.sub('', str(icp_resumido)).replace('"', "'").splitlines():
+        linha = ' '.join(linha.split())
+        if linha and linha.casefold() not in vistas:
+            vistas.add(linha.casefold())
+            partes.append(linha)
+    texto = ''.join(parte + ('' if i == len(partes) - 1 else ' ' if parte[-1] in '.:;,!?' else '; ') for i, parte in enumerate(partes))
+    return truncar(texto, max_tokens)
+
+
+def _contexto_icp(icp_resumido, orcamento):
+    return str(icp_resumido) if orcamento.max_tokens_icp is None else compactar_icp(icp_resumido, orcamento.max_tokens_icp)
+
+
+def _material(texto, max_tokens, metricas):
+    texto = ' '.join(str(texto).split()).replace('"', "'")
+    cortado = truncar(texto, max_tokens)
+    if cortado is not texto:
+        contar(metricas, 'prompt.materiais_cortados')
+    return cortado
+
+
+def _limite_material(orcamento, tokens_fixos, empresas_com_material):
+    """Tokens de material por empresa: o orçamento dela, reduzido para o prompt caber no teto."""
+    limite = orcamento.max_tokens_material
+    if orcamento.max_tokens_prompt is not None and empresas_com_material:
+        disponivel = max(MIN_TOKENS_MATERIAL, (orcamento.max_tokens_prompt - tokens_fixos) // empresas_com_material)
+        limite = disponivel if limite is None else min(limite, disponivel)
+    return limite
+
+
+def _conferir_teto(prompt, orcamento, metricas):
+    if orcamento.max_tokens_prompt is not None and estimar_tokens(prompt) > orcamento.max_tokens_prompt:
+        contar(metricas, 'prompt.acima_do_teto')
+    return prompt
+
+
+def chaves_resposta(pedir_confianca):
+    chaves = '"is_segmento_correto" (boolean) e "motivo_segmento" (string curta, até 20 palavras)'
+    if pedir_confianca:
+        chaves = ('"is_segmento_correto" (boolean), "motivo_segmento" (string curta, até 20 palavras) '
+                  'e "confianca" (número de 0 a 1: sua certeza no veredicto)')
+    return chaves
+
+
+def montar_prompt_empresa(material, icp_resumido, pedir_confianca=False, orcamento=ORCAMENTO_PADRAO, metricas=None):
+    """Prompt de uma empresa; `material` é o texto do site ou a URL."""
+    modelo = ('Analise o seguinte material: "{material}".\n'
+              'Compare com este resumo do meu Perfil de Cliente Ideal (ICP): "{icp}"\n'
+              'Responda APENAS com um JSON com as chaves: {chaves}.')
+    icp = _contexto_icp(icp_resumido, orcamento)
+    chaves = chaves_resposta(pedir_confianca)
+    limite = _limite_material(orcamento, estimar_tokens(modelo.format(material='', icp=icp, chaves=chaves)), 1)
+    prompt = modelo.format(material=_material(material, limite, metricas), icp=icp, chaves=chaves)
+    return _conferir_teto(prompt, orcamento, metricas)
+
+
+def montar_prompt_lote(itens, icp_resumido, pedir_confianca=False, orcamento=ORCAMENTO_PADRAO, metricas=None):
+    """Prompt de várias empresas, uma linha JSON por (id, site, texto do site ou None)."""
+    icp = _contexto_icp(icp_resumido, orcamento)
+    cabecalho = ('Para cada empresa abaixo, analise o texto extraído do site (campo "texto"; sem ele, visite o site) '
+                 f'e compare com este resumo do meu Perfil de Cliente Ideal (ICP): "{icp}"\n'
+                 'Empresas (uma por linha, em JSON):\n')
+    rodape = ('\nResponda APENAS com um array JSON contendo um objeto por empresa, com as chaves: '
+              f'"id" (o mesmo id recebido), {chaves_resposta(pedir_confianca)}.')
+    linhas_sem_texto = [json.dumps({"id": str(id_item), "site": str(site)}, ensure_ascii=False) for id_item, site, _ in itens]
+    com_texto = sum(1 for _, _, texto in itens if texto)
+    fixos = estimar_tokens(cabecalho + rodape + '\n'.join(linhas_sem_texto)) + com_texto * estimar_tokens(', "texto": ""')
+    limite = _limite_material(orcamento, fixos, com_texto)
+    empresas = "\n".join(
+        json.dumps({"id": str(id_item), "site": str(site), **({"texto": _material(texto, limite, metricas)} if texto else {})}, ensure_ascii=False)
+        for id_item, site, texto in itens
+    )
+    return _conferir_teto(cabecalho + empresas + rodape, orcamento, metricas)
+
+
+def montar_prompt_resumo_icp(criterios_icp_texto):
+    return (f"Crie um resumo conciso e otimizado deste ICP em formato de texto para ser usado em futuros prompts, "
+            f"em até {MAX_PALAVRAS_RESUMO_ICP} palavras e sem formatação: {criterios_icp_texto}")
+
+
+CONFIG_RESUMO_ICP = {'max_output_tokens': MAX_TOKENS_RESUMO_ICP}
@@ -0,0 +1,664 @@
+# Motor de qualificação de ICP: chamadas à IA com concorrência limitada e controle de taxa.
+import functools
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from inicializacao import sob_demanda
+from metricas import contar, cronometrar, registrar_tokens
+from prompts import CONFIG_RESUMO_ICP, ORCAMENTO_PADRAO, estimar_tokens, montar_prompt_empresa, montar_prompt_lote, montar_prompt_resumo_icp
+
+genai = sob_demanda('google.generativeai')  # ~1s de import: só na primeira chamada à IA
+
+MODELO_PADRAO = 'gemini-1.5-flash-latest'
+CLASSIFICACOES_ICP = ['', 'Dentro do ICP', 'Fora do ICP', 'Erro na Análise']
+CODIGOS_TRANSITORIOS = {429, 500, 503, 504}
+
+
+# --- NORMALIZAÇÃO ---
+
+def normalizar_dominio(site):
+    """Reduz um site ao domínio em minúsculas, sem protocolo, 'www.', caminho ou porta."""
+    if site is None or str(site).strip().lower() in ('', 'nan'): return ''
+    dominio = re.sub(r'^[a-z][a-z0-9+.-]*://', '', str(site).strip().lower())
+    dominio = re.split(r'[/?#]', dominio, maxsplit=1)[0].split(':')[0].rstrip('.')
+    return dominio[4:] if dominio.startswith('www.') else dominio
+
+
+def _normalizar_url_perfil(url):
+    if url is None or str(url).strip().lower() in ('', 'nan'): return ''
+    url = re.sub(r'^[a-z][a-z0-9+.-]*://', '', str(url).strip().lower())
+    url = url[4:] if url.startswith('www.') else url
+    return url.split('?')[0].rstrip('/')
+
+
+def _normalizar_nome(nome):
+    if nome is None or str(nome).strip().lower() in ('', 'nan'): return ''
+    return ' '.join(str(nome).lower().split())
+
+
+# --- PLANEJAMENTO: UMA ANÁLISE POR EMPRESA ---
+
+def planejar_por_empresa(leads_df):
+    """Agrupa os leads por empresa antes da etapa de IA.
+
+    A chave é o domínio canônico do `Site_Original` (já padronizado por `padronizar_site`
+    na Estação 1); sem site, usa-se o `LinkedIn_Empresa` e depois o `Nome_Empresa`, herdando o
+    domínio de outro contato da mesma empresa quando houver.
+    Retorna `(empresa_por_indice, site_por_empresa)`: uma Series índice -> chave da empresa e
+    um dict chave -> site a analisar (só para empresas com site).
+    """
+    def coluna(nome, normalizar):
+        if nome not in leads_df.columns:
+            return pd.Series('', index=leads_df.index, dtype=object)
+        return leads_df[nome].astype(object).map(normalizar)
+
+    dominios = coluna('Site_Original', normalizar_dominio)
+    linkedins = coluna('LinkedIn_Empresa', _normalizar_url_perfil)
+    nomes = coluna('Nome_Empresa', _normalizar_nome)
+
+    com_dominio = dominios != ''
+    chaves = dominios.rename('empresa')
+    for alternativa in (linkedins, nomes):
+        conhecidos = alternativa[com_dominio & (alternativa != '')]
+        dominio_por_alternativa = dict(zip(conhecidos, dominios[conhecidos.index]))
+        sem_chave = (chaves == '') & (alternativa != '')
+        chaves[sem_chave] = alternativa[sem_chave].map(dominio_por_alternativa).fillna('')
+    for alternativa, prefixo in ((linkedins, 'linkedin:'), (nomes, 'nome:')):
+        sem_chave = (chaves == '') & (alternativa != '')
+        chaves[sem_chave] = prefixo + alternativa[sem_chave]
+    sem_chave = chaves == ''
+    chaves[sem_chave] = ['linha:' + str(indice) for indice in chaves.index[sem_chave]]
+
+    sites = leads_df.loc[com_dominio, 'Site_Original'] if com_dominio.any() else pd.Series(dtype=object)
+    site_por_empresa = {}
+    for dominio, site in zip(dominios[com_dominio], sites):
+        site_por_empresa.setdefault(dominio, site)
+    return chaves, site_por_empresa
+
+
+# --- CONTROLE DE TAXA E RETENTATIVAS ---
+
+class _CotaTokensIA:
+    """Saldo de tokens da IA por minuto (a cota TPM da API), usado sob a trava de um limitador.
+
+    O saldo acumula no máximo um segundo de cota; uma chamada maior que o saldo passa e o deixa
+    negativo, e as seguintes esperam a recarga. Sem `tokens_por_minuto`, não limita.
+    """
+
+    def __init__(self, tokens_por_minuto=None):
+        self.saldo = 0.0
+        self.definir(tokens_por_minuto)
+
+    def definir(self, tokens_por_minuto):
+        self.por_segundo = tokens_por_minuto / 60.0 if tokens_por_minuto else None
+        # Redefinir a cota não perdoa uma dívida nem passa do teto
+        self.saldo = min(self.saldo, self.por_segundo) if self.por_segundo else 0.0
+
+    def recarregar(self, decorrido):
+        if self.por_segundo:
+            self.saldo = min(self.por_segundo, self.saldo + decorrido * self.por_segundo)
+
+    def disponivel(self):
+        return not self.por_segundo or self.saldo >= 0
+
+    def consumir(self, tokens):
+        if self.por_segundo:
+            self.saldo -= tokens
+
+    def espera(self):
+        return 0.0 if self.disponivel() else -self.saldo / self.por_segundo
+
+
+class LimitadorTaxa:
+    """Token bucket thread-safe que limita o número de requisições por minuto e, com `tokens_por_minuto`,
+    os tokens de entrada enviados à IA por minuto."""
+
+    def __init__(self, requisicoes_por_minuto, capacidade=1, tokens_por_minuto=None):
+        self.taxa_por_segundo = requisicoes_por_minuto / 60.0
+        self.capacidade = capacidade
+        self._tokens = float(capacidade)
+        self._cota_ia = _CotaTokensIA(tokens_por_minuto)
+        self._ultima_recarga = time.monotonic()
+        self._trava = threading.Lock()
+
+    def adquirir(self, tokens_ia=0):
+        """Bloqueia até haver um token disponível (e saldo para `tokens_ia`) e retorna o tempo esperado (s)."""
+        inicio = time.monotonic()
+        while True:
+            with self._trava:
+                agora = time.monotonic()
+                decorrido = agora - self._ultima_recarga
+                self._tokens = min(self.capacidade, self._tokens + decorrido * self.taxa_por_segundo)
+                self._cota_ia.recarregar(decorrido)
+                self._ultima_recarga = agora
+                if self._tokens >= 1 and self._cota_ia.disponivel():
+                    self._tokens -= 1
+                    self._cota_ia.consumir(tokens_ia)
+                    return agora - inicio
+                espera = max((1 - self._tokens) / self.taxa_por_segundo if self._tokens < 1 else 0.0, self._cota_ia.espera())
+            time.sleep(espera)
+
+
+class LimitadorJusto:
+    """Cota de requisições por minuto compartilhada por várias execuções e distribuída em rodízio entre elas.
+
+    Cada execução usa o limitador devolvido por `participante(chave)`. Quando várias esperam ao mesmo
+    tempo, os tokens são entregues alternadamente entre as chaves, e não por ordem de chegada: uma
+    lista enorme não atrasa indefinidamente as listas pequenas de outros usuários.
+    Com `tokens_por_minuto`, a cota de tokens de entrada da IA também é respeitada (ver `LimitadorTaxa`).
+    """
+
+    def __init__(self, requisicoes_por_minuto, capacidade=1, tokens_por_minuto=None):
+        self.capacidade = capacidade
+        self._cota_ia = _CotaTokensIA()
+        self.definir_cota(requisicoes_por_minuto, tokens_por_minuto)
+        self._tokens = float(capacidade)
+        self._ultima_recarga = time.monotonic()
+        self._condicao = threading.Condition()
+        self._pendentes = {}  # chave -> pedidos aguardando token
+        self._rodizio = deque()  # chaves com pedidos pendentes, na ordem da vez
+
+    def definir_cota(self, requisicoes_por_minuto, tokens_por_minuto=None):
+        self.taxa_por_segundo = requisicoes_por_minuto / 60.0
+        self._cota_ia.definir(tokens_por_minuto)
+
+    def participante(self, chave):
+        """Limitador com a interface de `LimitadorTaxa` para uma execução."""
+        return _ParticipanteLimitador(self, chave)
+
+    def _sair_da_fila(self, chave):
+        self._pendentes[chave] -= 1
+        if self._rodizio and self._rodizio[0] == chave:
+            self._rodizio.popleft()
+        elif chave in self._rodizio and not self._pendentes[chave]:
+            self._rodizio.remove(chave)
+        if self._pendentes[chave]:
+            if chave not in self._rodizio:
+                self._rodizio.append(chave)
+        else:
+            del self._pendentes[chave]
+        self._condicao.notify_all()
+
+    def adquirir(self, chave, tokens_ia=0):
+        """Bloqueia até ser a vez de `chave` e haver token (e saldo para `tokens_ia`); retorna o tempo esperado (s)."""
+        inicio = time.monotonic()
+        with self._condicao:
+            self._pendentes[chave] = self._pendentes.get(chave, 0) + 1
+            if chave not in self._rodizio:
+                self._rodizio.append(chave)
+            try:
+                while True:
+                    agora = time.monotonic()
+                    self._tokens = min(self.capacidade, self._tokens + (agora - self._ultima_recarga) * self.taxa_por_segundo)
+                    self._cota_ia.recarregar(agora - self._ultima_recarga)
+                    self._ultima_recarga = agora
+                    if self._tokens >= 1 and self._cota_ia.disponivel() and self._rodizio[0] == chave:
+                        self._tokens -= 1
+                        self._cota_ia.consumir(tokens_ia)
+                        self._sair_da_fila(chave)
+                        return agora - inicio
+                    espera = max((1 - self._tokens) / self.taxa_por_segundo if self._tokens < 1 else 0.0, self._cota_ia.espera())
+                    self._condicao.wait(espera or None)
+            except BaseException:
+                # Quem desiste da espera não pode deixar a vez presa com ele
+                self._sair_da_fila(chave)
+                raise
+
+
+class _ParticipanteLimitador:
+    def __init__(self, limitador, chave):
+        self.limitador = limitador
+        self.chave = chave
+
+    def adquirir(self, tokens_ia=0):
+        return self.limitador.adquirir(self.chave, tokens_ia)
+
+
+def eh_erro_transitorio(erro):
+    """Indica se o erro (429, timeout, indisponibilidade) justifica uma nova tentativa."""
+    if isinstance(erro, (TimeoutError, ConnectionError)):
+        return True
+    try:
+        if int(getattr(erro, 'code', None)) in CODIGOS_TRANSITORIOS:
+            return True
+    except (TypeError, ValueError):
+        pass
+    texto = str(erro).lower()
+    return any(marca in texto for marca in ('429', 'resource exhausted', 'quota', 'timeout', 'timed out', 'deadline'))
+
+
+def chamar_com_retentativas(funcao, limitador=None, max_tentativas=4, espera_base=2.0, espera_maxima=60.0, metricas=None, tokens_ia=0):
+    """Executa `funcao` respeitando o limitador e refazendo erros transitórios com backoff exponencial e jitter.
+
+    `tokens_ia` (tokens estimados do prompt) é descontado da cota de tokens do limitador a cada tentativa.
+    Com `metricas`, registra a espera pelo limitador, a latência de cada tentativa e as retentativas.
+    """
+    for tentativa in range(1, max_tentativas + 1):
+        if limitador is not None:
+            with cronometrar(metricas, 'ia.espera_limite'):
+                limitador.adquirir(tokens_ia)
+        try:
+            with cronometrar(metricas, 'ia.generate_content'):
+                return funcao()
+        except Exception as e:
+            if tentativa == max_tentativas or not eh_erro_transitorio(e):
+                raise
+            contar(metricas, 'ia.retentativas')
+            if '429' in str(e) or getattr(e, 'code', None) == 429:
+                contar(metricas, 'ia.erros_429')
+            with cronometrar(metricas, 'ia.espera_backoff'):
+                time.sleep(random.uniform(0, min(espera_maxima, espera_base * 2 ** (tentativa - 1))))
+
+
+# --- CHAMADAS À IA ---
+
+def _extrair_json(texto, metricas=None):
+    with cronometrar(metricas, 'ia.parse_json'):
+        return json.loads(texto.replace('```json', '').replace('```', '').strip())
+
+
+def _resposta_cortada(response):
+    """Indica se a resposta parou no `max_output_tokens` (finish_reason MAX_TOKENS), e não no fim do texto."""
+    for candidato in getattr(response, 'candidates', None) or []:
+        motivo = getattr(candidato, 'finish_reason', None)
+        if getattr(motivo, 'name', motivo) == 'MAX_TOKENS':
+            return True
+    return False
+
+
+def _gerar(model, prompt, orcamento, empresas, timeout, limitador, metricas):
+    """Chama o modelo com o teto de resposta do `orcamento` e registra os tokens.
+
+    Uma resposta cortada no teto (JSON incompleto) é pedida de novo uma vez, com o teto maior, antes de
+    o lote ser dado como falho e dividido: a divisão custaria mais chamadas que a repetição.
+    """
+    def chamar(repeticao):
+        response = chamar_com_retentativas(
+            lambda: model.generate_content(prompt, generation_config=orcamento.config_geracao(empresas, repeticao),
+                                           request_options={"timeout": timeout}),
+            limitador, metricas=metricas, tokens_ia=estimar_tokens(prompt),
+        )
+        registrar_tokens(metricas, prompt, response, empresas)
+        return response
+
+    response = chamar(False)
+    if _resposta_cortada(response) and orcamento.config_geracao(empresas) is not None:
+        contar(metricas, 'ia.respostas_cortadas')
+        response = chamar(True)
+    return response
+
+
+def criar_modelo(modelo=MODELO_PADRAO, backend=None):
+    """Modelo com `generate_content(prompt, request_options=None)`; `backend(nome)` substitui o `genai.GenerativeModel`."""
+    return (backend or genai.GenerativeModel)(modelo)
+
+
+def _confianca(valor):
+    """Confiança informada pelo modelo como float entre 0 e 1, ou None se ausente ou inválida."""
+    if isinstance(valor, bool) or not isinstance(valor, (int, float)) or not 0 <= valor <= 1:
+        return None
+    return float(valor)
+
+
+def analisar_icp_com_ia(texto_ou_url, icp_resumido, is_url=True, limitador=None, metricas=None, modelo=MODELO_PADRAO,
+                        backend=None, escala_timeout=1.0, pedir_confianca=False, orcamento=None):
+    """Classifica uma empresa. Com `pedir_confianca`, a análise traz 'confianca' (None se o modelo não a informar).
+
+    O prompt respeita o `orcamento` (um `prompts.OrcamentoPrompt`; None = `ORCAMENTO_PADRAO`).
+    """
+    orcamento = orcamento or ORCAMENTO_PADRAO
+    model = criar_modelo(modelo, backend)
+    prompt = montar_prompt_empresa(texto_ou_url, icp_resumido, pedir_confianca, orcamento, metricas)
+    try:
+        response = _gerar(model, prompt, orcamento, 1, (90 if is_url else 30) * escala_timeout, limitador, metricas)
+        analise = _extrair_json(response.text, metricas)
+        if pedir_confianca and isinstance(analise, dict):
+            analise['confianca'] = _confianca(analise.get('confianca'))
+        return analise
+    except Exception as e:
+        contar(metricas, 'ia.erros')
+        return {"error": f"Falha: {e}"}
+
+
+def analisar_lote_com_ia(itens, icp_resumido, limitador=None, metricas=None, modelo=MODELO_PADRAO, backend=None,
+                         escala_timeout=1.0, pedir_confianca=False, orcamento=None):
+    """Classifica várias empresas num único prompt. `itens` é uma lista de (id, site, texto do site ou None).
+
+    Retorna {id: analise} apenas com os itens válidos e alinhados aos ids enviados;
+    levanta exceção se a chamada ou o JSON da resposta falharem por inteiro.
+    Com `pedir_confianca`, cada análise traz 'confianca' (None se o modelo não a informar).
+    O prompt respeita o `orcamento` (um `prompts.OrcamentoPrompt`; None = `ORCAMENTO_PADRAO`).
+    """
+    orcamento = orcamento or ORCAMENTO_PADRAO
+    model = criar_modelo(modelo, backend)
+    prompt = montar_prompt_lote(itens, icp_resumido, pedir_confianca, orcamento, metricas)
+    todos_com_texto = all(texto for _, _, texto in itens)
+    timeout = ((30 + 5 * len(itens)) if todos_com_texto else (90 + 15 * len(itens))) * escala_timeout
+    response = _gerar(model, prompt, orcamento, len(itens), timeout, limitador, metricas)
+    dados = _extrair_json(response.text, metricas)
+    if not isinstance(dados, list):
+        raise ValueError("A resposta do lote não é um array JSON")
+
+    ids_enviados = {str(id_item) for id_item, _, _ in itens}
+    validos = {}
+    for item in dados:
+        if not isinstance(item, dict): continue
+        id_item = str(item.get('id', ''))
+        if id_item not in ids_enviados or id_item in validos: continue
+        if not isinstance(item.get('is_segmento_correto'), bool) or not isinstance(item.get('motivo_segmento'), str): continue
+        validos[id_item] = {"is_segmento_correto": item['is_segmento_correto'], "motivo_segmento": item['motivo_segmento']}
+        if pedir_confianca:
+            validos[id_item]['confianca'] = _confianca(item.get('confianca'))
+    return validos
+
+
+class EstatisticasLotes:
+    """Acumula vazão e taxa de erro por tamanho de lote, para calibrar o tamanho ideal."""
+
+    def __init__(self):
+        self._por_tamanho = {}
+        self._trava = threading.Lock()
+
+    def registrar(self, tamanho, segundos, itens_validos, falhou):
+        with self._trava:
+            dados = self._por_tamanho.setdefault(tamanho, {"lotes": 0, "falhas": 0, "itens": 0, "itens_validos": 0, "segundos": 0.0})
+            dados["lotes"] += 1
+            dados["falhas"] += int(falhou)
+            dados["itens"] += tamanho
+            dados["itens_validos"] += itens_validos
+            dados["segundos"] += segundos
+
+    def como_dataframe(self):
+        with self._trava:
+            linhas = [{"tamanho_lote": tamanho, **dados} for tamanho, dados in sorted(self._por_tamanho.items())]
+        tabela = pd.DataFrame(linhas, columns=["tamanho_lote", "lotes", "falhas", "itens", "itens_validos", "segundos"])
+        tabela["taxa_erro"] = 1 - tabela["itens_validos"] / tabela["itens"]
+        tabela["itens_por_segundo"] = tabela["itens"] / tabela["segundos"]
+        return tabela
+
+
+def classificar_lote_com_divisao(itens, icp_resumido, limitador=None, estatisticas=None, metricas=None, **opcoes_modelo):
+    """Classifica um lote de (chave, site, texto do site ou None); itens ausentes ou malformados são refeitos em lotes menores.
+
+    Um lote que falhe é dividido ao meio recursivamente; um item isolado volta ao prompt individual,
+    com o texto já coletado quando houver e, sem ele, com a URL.
+    `opcoes_modelo` (modelo, backend, escala_timeout, pedir_confianca, orcamento) vão para as chamadas à IA.
+    """
+    if len(itens) == 1:
+        chave, site, texto = itens[0]
+        inicio = time.monotonic()
+        if texto:
+            analise = analisar_icp_com_ia(texto, icp_resumido, False, limitador, metricas, **opcoes_modelo)
+        else:
+            analise = analisar_icp_com_ia(site, icp_resumido, True, limitador, metricas, **opcoes_modelo)
+        if estatisticas:
+            estatisticas.registrar(1, time.monotonic() - inicio, int("error" not in analise), "error" in analise)
+        return {chave: analise}
+
+    ids_locais = {str(posicao): item for posicao, item in enumerate(itens, start=1)}
+    inicio = time.monotonic()
+    try:
+        validos = analisar_lote_com_ia([(id_local, site, texto) for id_local, (_, site, texto) in ids_locais.items()], icp_resumido, limitador, metricas, **opcoes_modelo)
+        falhou = False
+    except Exception:
+        validos, falhou = {}, True
+        contar(metricas, 'ia.erros_lote')
+    if estatisticas:
+        estatisticas.registrar(len(itens), time.monotonic() - inicio, len(validos), falhou)
+
+    resultados = {ids_locais[id_local][0]: analise for id_local, analise in validos.items()}
+    faltantes = [item for id_local, item in ids_locais.items() if id_local not in validos]
+    if faltantes:
+        contar(metricas, 'ia.lotes_divididos')
+        meio = (len(faltantes) + 1) // 2
+        for parte in (faltantes[:meio], faltantes[meio:]):
+            if parte:
+                if len(parte) == 1:
+                    contar(metricas, 'ia.fallback_individual')
+                resultados.update(classificar_lote_com_divisao(parte, icp_resumido, limitador, estatisticas, metricas, **opcoes_modelo))
+    return resultados
+
+
+# --- EXECUÇÃO CONCORRENTE ---
+
+def executar_em_paralelo(funcao, tarefas, max_concorrencia=8, ao_concluir=None):
+    """Executa `funcao(*args)` para cada item de `tarefas` ({chave: args}) num pool de threads limitado.
+
+    `ao_concluir(chave, resultado, concluidas)` é chamado na thread de quem invocou,
+    o que permite atualizar a interface do Streamlit com segurança.
+    """
+    resultados = {}
+    if not tarefas:
+        return resultados
+    with ThreadPoolExecutor(max_workers=max(1, int(max_concorrencia))) as executor:
+        futuros = {executor.submit(funcao, *args): chave for chave, args in tarefas.items()}
+        try:
+            for futuro in as_completed(futuros):
+                chave = futuros[futuro]
+                resultados[chave] = futuro.result()
+                if ao_concluir:
+                    ao_concluir(chave, resultados[chave], len(resultados))
+        except BaseException:
+            # Execução interrompida (ex.: rerun do Streamlit): tarefas ainda na fila não chegam a chamar a IA
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+    return resultados
+
+
+def qualificar_leads(sites_por_indice, icp_resumido, max_concorrencia=8, requisicoes_por_minuto=60, ao_concluir=None, cache=None,
+                     tamanho_lote=1, estatisticas=None, checkpoint=None, limitador=None, coletor=None, metricas=None, roteador=None,
+                     tokens_por_minuto=None, orcamento=None):
+    """Classifica os sites ({indice: site}) de forma concorrente, respeitando o limite de requisições por minuto
+    e, com `tokens_por_minuto`, a cota de tokens de entrada da IA.
+
+    Com `cache` (um `CacheICP`), veredictos já conhecidos para o mesmo domínio, ICP e modelo
+    são reaproveitados e os novos veredictos bem-sucedidos são gravados.
+    Com `checkpoint` (um `CheckpointExecucao`), os índices já concluídos numa execução anterior
+    são pulados e cada novo veredicto é gravado assim que chega.
+    `limitador` substitui o limite próprio de `requisicoes_por_minuto` (ex.: cota compartilhada de `LimitadorJusto`).
+    Com `tamanho_lote` > 1, as empresas são enviadas em prompts com vários leads
+    (ver `classificar_lote_com_divisao`); o desempenho por tamanho de lote vai para `estatisticas`.
+    Com `coletor` (um `ColetorSites`), os sites de cada lote são baixados na thread do lote, logo antes da IA,
+    e o modelo recebe o texto extraído; sites que não puderam ser lidos seguem com a URL.
+    Com `metricas` (um `metricas.Metricas`), cada empresa registra a espera na fila ('ia.espera_fila'), a coleta
+    e o tempo até o veredicto ('ia.empresa'), além das métricas das chamadas (limite, latência, JSON, tokens, erros).
+    Com `roteador` (um `roteamento.Roteador`), cada lote passa pelas camadas de modelos em vez do `MODELO_PADRAO`;
+    o cache separa os veredictos pela configuração das camadas.
+    `orcamento` (um `prompts.OrcamentoPrompt`) limita os tokens de cada prompt; com `roteador`, vale o de cada camada.
+    """
+    modelo_cache = roteador.identificador if roteador else MODELO_PADRAO
+    classificar = roteador.classificar if roteador else functools.partial(classificar_lote_com_divisao, orcamento=orcamento)
+    resultados = {}
+    pendentes = {}
+    concluidas = checkpoint.concluidas() if checkpoint else {}
+    for indice, site in sites_por_indice.items():
+        analise = concluidas.get(indice)
+        if analise is None and cache:
+            analise = cache.obter_veredito(normalizar_dominio(site), icp_resumido, modelo_cache)
+            if analise is not None and checkpoint:
+                checkpoint.registrar(indice, analise)
+        if analise is not None:
+            resultados[indice] = analise
+            contar(metricas, 'ia.empresas_reaproveitadas')
+            if ao_concluir:
+                ao_concluir(indice, analise, len(resultados))
+        else:
+            pendentes[indice] = site
+
+    def registrar(indice, analise):
+        resultados[indice] = analise
+        if cache and "error" not in analise:
+            cache.salvar_veredito(normalizar_dominio(pendentes[indice]), icp_resumido, modelo_cache, analise)
+        if ao_concluir:
+            ao_concluir(indice, analise, len(resultados))
+
+    limitador = limitador or LimitadorTaxa(requisicoes_por_minuto, tokens_por_minuto=tokens_por_minuto)
+    tamanho_lote = max(1, int(tamanho_lote))
+    itens = list(pendentes.items())
+    tarefas = {
+        inicio: (itens[inicio:inicio + tamanho_lote], icp_resumido, limitador, estatisticas, metricas)
+        for inicio in range(0, len(itens), tamanho_lote)
+    }
+
+    def registrar_lote(_, analises_do_lote, __):
+        for indice, analise in analises_do_lote.items():
+            registrar(indice, analise)
+
+    def classificar_e_gravar(itens_do_lote, *args):
+        # A coleta acontece por lote, em paralelo com a IA dos outros lotes, e o checkpoint é gravado
+        # na própria thread: lotes em andamento quando a execução é interrompida ainda são salvos
+        inicio = time.perf_counter()
+        if metricas:
+            for _ in itens_do_lote:
+                metricas.registrar('ia.espera_fila', inicio - enviado_em)
+        with cronometrar(metricas, 'coleta.lote'):
+            textos = coletor.textos(site for _, site in itens_do_lote) if coletor else {}
+        analises_do_lote = classificar([(indice, site, textos.get(site)) for indice, site in itens_do_lote], *args)
+        if checkpoint:
+            for indice, analise in analises_do_lote.items():
+                checkpoint.registrar(indice, analise)
+        if metricas:
+            for _ in analises_do_lote:
+                metricas.registrar('ia.empresa', time.perf_counter() - inicio)
+        return analises_do_lote
+
+    enviado_em = time.perf_counter()
+    executar_em_paralelo(classificar_e_gravar, tarefas, max_concorrencia, registrar_lote)
+    return resultados
+
+
+# --- RESUMO DO ICP ---
+
+def montar_criterios_icp(segmentos, observacoes):
+    """Texto dos critérios do ICP que a IA resume (mesmo formato usado pela Estação 2)."""
+    return f"Segmentos: {segmentos}. Observações: {observacoes}"
+
+
+def resumir_icp_com_ia(criterios_icp_texto, cache=None, ao_chamar_ia=None, modelo=MODELO_PADRAO, backend=None):
+    """Resume o ICP para uso nos prompts; se a IA falhar após as retentativas, a exceção é propagada.
+
+    `ao_chamar_ia()` é chamado só quando o resumo não está no cache e a IA vai ser consultada.
+    """
+    if cache:
+        resumo_em_cache = cache.obter_resumo(criterios_icp_texto)
+        if resumo_em_cache:
+            return resumo_em_cache
+    if ao_chamar_ia:
+        ao_chamar_ia()
+    model = criar_modelo(modelo, backend)
+    prompt = montar_prompt_resumo_icp(criterios_icp_texto)
+    response = chamar_com_retentativas(lambda: model.generate_content(prompt, generation_config=CONFIG_RESUMO_ICP))
+    resumo = response.text.strip()
+    if cache:
+        cache.salvar_resumo(criterios_icp_texto, resumo)
+    return resumo
+
+
+# --- QUALIFICAÇÃO DE UMA LISTA DE LEADS ---
+
+def aplicar_analise(leads_df, index, analise):
+    """Grava o veredicto de uma análise nas colunas de resultado da linha `index`."""
+    if "error" not in analise:
+        if analise.get('is_segmento_correto'):
+            leads_df.at[index, 'classificacao_icp'] = 'Dentro do ICP'
+            leads_df.at[index, 'motivo_classificacao'] = analise.get('motivo_segmento')
+        else:
+            leads_df.at[index, 'classificacao_icp'] = 'Fora do ICP'
+            leads_df.at[index, 'motivo_classificacao'] = analise.get('motivo_segmento')
+    else:
+        leads_df.at[index, 'classificacao_icp'] = 'Erro na Análise'
+        leads_df.at[index, 'motivo_classificacao'] = analise.get('details', 'Site não informado ou inacessível')
+
+
+def preclassificar_empresas(leads_df, empresa_por_indice, sites_por_empresa, preclassificador):
+    """Veredictos locais ({empresa: analise}) das empresas que o `PreClassificadorICP` decide sem a IA.
+
+    Cada empresa é avaliada pelo segmento e nome do seu primeiro contato e pelo domínio (a chave da empresa).
+    """
+    def valores(coluna, indices):
+        return leads_df.loc[indices, coluna].tolist() if coluna in leads_df.columns else [''] * len(indices)
+
+    primeiros = empresa_por_indice[empresa_por_indice.isin(list(sites_por_empresa))].drop_duplicates()
+    resultados = {}
+    for empresa, segmento, nome in zip(primeiros, valores('Segmento_Original', primeiros.index), valores('Nome_Empresa', primeiros.index)):
+        analise = preclassificador.classificar(segmento, nome, empresa)
+        if analise is not None:
+            resultados[empresa] = analise
+    return resultados
+
+
+def preparar_qualificacao(leads_df, filtro_icp, preclassificador=None):
+    """Etapas anteriores à IA, aplicadas em `leads_df`: colunas de resultado, filtro do ICP e agrupamento por empresa.
+
+    Linhas reprovadas pelo filtro e empresas sem site já saem classificadas; com `preclassificador`
+    (ver `compilar_preclassificador`), as empresas decididas por regra local também, e deixam de ir à IA.
+    Retorna o plano com `remocoes_por_regra`, `removidos`, `empresa_por_indice`, `sites_por_empresa`
+    (só as empresas que vão à IA), `resultados_locais`, `chamadas_evitadas` e `leads_para_ia`.
+    """
+    # A classificação tem só quatro valores possíveis
+    if 'classificacao_icp' not in leads_df.columns:
+        leads_df['classificacao_icp'] = pd.Categorical([''] * len(leads_df), categories=CLASSIFICACOES_ICP)
+    if 'motivo_classificacao' not in leads_df.columns:
+        leads_df['motivo_classificacao'] = ''
+
+    # Filtro determinístico: só as linhas aprovadas seguem para a etapa de IA
+    aprovados, motivos_filtro, remocoes_por_regra = filtro_icp.aplicar(leads_df)
+    leads_df.loc[~aprovados, 'classificacao_icp'] = 'Fora do ICP'
+    leads_df.loc[~aprovados, 'motivo_classificacao'] = motivos_filtro[~aprovados]
+
+    # Cada empresa é analisada uma única vez e o veredicto vale para todos os seus contatos
+    empresa_por_indice, sites_por_empresa = planejar_por_empresa(leads_df.loc[leads_df.index[aprovados]])
+    for index, empresa in empresa_por_indice.items():
+        if empresa not in sites_por_empresa:
+            aplicar_analise(leads_df, index, {"error": "Site não informado"})
+
+    # Casos óbvios decididos por regra local; só os ambíguos seguem para a IA
+    resultados_locais = {}
+    if preclassificador is not None:
+        resultados_locais = preclassificar_empresas(leads_df, empresa_por_indice, sites_por_empresa, preclassificador)
+        # Mesmo efeito de `aplicar_analise` linha a linha, gravado em bloco
+        analises = empresa_por_indice[empresa_por_indice.isin(list(resultados_locais))].map(resultados_locais)
+        leads_df.loc[analises.index, 'classificacao_icp'] = [
+            'Dentro do ICP' if analise['is_segmento_correto'] else 'Fora do ICP' for analise in analises
+        ]
+        leads_df.loc[analises.index, 'motivo_classificacao'] = [analise['motivo_segmento'] for analise in analises]
+        sites_por_empresa = {empresa: site for empresa, site in sites_por_empresa.items() if empresa not in resultados_locais}
+    empresas_com_site = len(sites_por_empresa) + len(resultados_locais)
+    return {
+        'remocoes_por_regra': remocoes_por_regra,
+        'removidos': int((~aprovados).sum()),
+        'empresa_por_indice': empresa_por_indice,
+        'sites_por_empresa': sites_por_empresa,
+        'resultados_locais': resultados_locais,
+        'chamadas_evitadas': len(resultados_locais),
+        'fracao_chamadas_evitadas': len(resultados_locais) / empresas_com_site if empresas_com_site else 0.0,
+        'leads_para_ia': int(empresa_por_indice.isin(list(sites_por_empresa)).sum()),
+    }
+
+
+def concluir_qualificacao(leads_df, plano, resultados):
+    """Distribui o veredicto de cada empresa para seus contatos, na ordem original das linhas."""
+    for index, empresa in plano['empresa_por_indice'].items():
+        if empresa in resultados:
+            aplicar_analise(leads_df, index, resultados[empresa])
+
+
+def qualificar_dataframe(leads_df, icp_resumido, filtro_icp, ao_concluir=None, ao_planejar=None, preclassificador=None, **opcoes):
+    """Filtro, agrupamento, pré-classificação local, IA e distribuição dos veredictos em sequência;
+    `opcoes` vão para `qualificar_leads`.
+
+    `ao_planejar(plano)` é chamado antes da etapa de IA. Retorna o plano de `preparar_qualificacao`.
+    """
+    plano = preparar_qualificacao(leads_df, filtro_icp, preclassificador)
+    if ao_planejar:
+        ao_planejar(plano)
+    resultados = qualificar_leads(plano['sites_por_empresa'], icp_resumido, ao_concluir=ao_concluir, **opcoes)
+    concluir_qualificacao(leads_df, plano, resultados)
+    return plano
@@ -0,0 +1,198 @@
+# Classificação em camadas: um modelo rápido e barato decide primeiro, com uma confiança por empresa, e só
+# as respostas de baixa confiança ou malformadas sobem para a camada seguinte (um modelo mais forte e,
+# se configurado, com o texto do site coletado). Latência, custo e concordância são medidos por camada.
+import threading
+import time
+
+import pandas as pd
+
+from metricas import Metricas, MetricasCombinadas, contar
+from qualificacao import classificar_lote_com_divisao
+
+MODELO_RAPIDO = 'gemini-1.5-flash-8b'
+MODELO_FORTE = 'gemini-1.5-pro'
+CONFIANCA_MINIMA_PADRAO = 0.75
+# Preço de referência em US$ por milhão de tokens (entrada, saída); ajuste conforme a tabela vigente da API
+PRECOS_POR_MILHAO = {
+    'gemini-1.5-flash-8b': (0.0375, 0.15),
+    'gemini-1.5-flash-latest': (0.075, 0.30),
+    'gemini-1.5-pro': (1.25, 5.00),
+}
+
+
+class Camada:
+    """Um nível do roteamento.
+
+    - `modelo` / `backend`: nome do modelo e fábrica `backend(nome)` do objeto com `generate_content`
+      (None = `genai.GenerativeModel`; ver `ia_simulada.BackendSimulado` para testes locais);
+    - `confianca_minima`: veredictos com confiança abaixo disso (ou sem confiança) sobem de camada;
+    - `escala_timeout`: multiplica os tempos limite padrão das chamadas;
+    - `coletar_texto`: empresas que chegam aqui sem texto do site têm o site coletado antes da IA;
+    - `preco_entrada` / `preco_saida`: US$ por milhão de tokens, para o custo estimado;
+    - `orcamento`: tetos de tokens dos prompts (`prompts.OrcamentoPrompt`; None = o padrão).
+    """
+
+    def __init__(self, nome, modelo, confianca_minima=CONFIANCA_MINIMA_PADRAO, escala_timeout=1.0, coletar_texto=False,
+                 backend=None, preco_entrada=None, preco_saida=None, orcamento=None):
+        self.nome = nome
+        self.modelo = modelo
+        self.confianca_minima = confianca_minima
+        self.escala_timeout = escala_timeout
+        self.coletar_texto = coletar_texto
+        self.backend = backend
+        preco_padrao = PRECOS_POR_MILHAO.get(modelo, (0.0, 0.0))
+        self.preco_entrada = preco_padrao[0] if preco_entrada is None else preco_entrada
+        self.preco_saida = preco_padrao[1] if preco_saida is None else preco_saida
+        self.orcamento = orcamento
+
+    def custo(self, tokens_entrada, tokens_saida):
+        return (tokens_entrada * self.preco_entrada + tokens_saida * self.preco_saida) / 1_000_000
+
+
+def camadas_padrao(confianca_minima=CONFIANCA_MINIMA_PADRAO, modelo_rapido=MODELO_RAPIDO, modelo_forte=MODELO_FORTE,
+                   backend_rapido=None, backend_forte=None):
+    """Modelo rápido com tempo limite curto e, para os casos incertos, o modelo forte com o texto do site."""
+    return [
+        Camada('rapida', modelo_rapido, confianca_minima, escala_timeout=0.5, backend=backend_rapido),
+        Camada('forte', modelo_forte, confianca_minima, escala_timeout=1.5, coletar_texto=True, backend=backend_forte),
+    ]
+
+
+def veredicto_valido(analise):
+    return "error" not in analise and isinstance(analise.get('is_segmento_correto'), bool)
+
+
+class EstatisticasCamadas:
+    """Por camada: empresas recebidas, aceitas e escaladas, respostas malformadas, latência e tokens das
+    chamadas (um `Metricas` por camada) e a concordância com a camada seguinte nas empresas escaladas."""
+
+    def __init__(self, camadas):
+        self.camadas = camadas
+        self.metricas = {camada.nome: Metricas() for camada in camadas}
+        self._contagens = {camada.nome: {'empresas': 0, 'aceitas': 0, 'escaladas': 0, 'malformadas': 0,
+                                         'comparadas': 0, 'concordantes': 0, 'segundos': 0.0} for camada in camadas}
+        self._trava = threading.Lock()
+
+    def registrar(self, nome, empresas=0, aceitas=0, escaladas=0, malformadas=0, segundos=0.0):
+        with self._trava:
+            contagens = self._contagens[nome]
+            contagens['empresas'] += empresas
+            contagens['aceitas'] += aceitas
+            contagens['escaladas'] += escaladas
+            contagens['malformadas'] += malformadas
+            contagens['segundos'] += segundos
+
+    def comparar(self, nome, concordou):
+        """Registra se o veredicto de baixa confiança da camada `nome` coincidiu com o da camada seguinte."""
+        with self._trava:
+            self._contagens[nome]['comparadas'] += 1
+            self._contagens[nome]['concordantes'] += int(concordou)
+
+    def resumo(self):
+        """Uma entrada por camada, com latência das chamadas (média e p95), tokens, custo estimado e concordância."""
+        with self._trava:
+            contagens = {nome: dict(valores) for nome, valores in self._contagens.items()}
+        linhas = []
+        for camada in self.camadas:
+            dados = contagens[camada.nome]
+            metricas = self.metricas[camada.nome]
+            chamadas = metricas.estatisticas('ia.generate_content').get('ia.generate_content', {})
+            contadores = metricas.contadores()
+            tokens_entrada, tokens_saida = contadores.get('tokens.prompt', 0), contadores.get('tokens.resposta', 0)
+            custo = camada.custo(tokens_entrada, tokens_saida)
+            linhas.append({
+                'camada': camada.nome,
+                'modelo': camada.modelo,
+                'empresas': dados['empresas'],
+                'aceitas': dados['aceitas'],
+                'escaladas': dados['escaladas'],
+                'malformadas': dados['malformadas'],
+                'chamadas': chamadas.get('n', 0),
+                'latencia_media_s': round(chamadas['media'], 4) if chamadas else None,
+                'latencia_p95_s': round(chamadas['p95'], 4) if chamadas else None,
+                'segundos_por_empresa': round(dados['segundos'] / dados['empresas'], 4) if dados['empresas'] else None,
+                'tokens_entrada': tokens_entrada,
+                'tokens_saida': tokens_saida,
+                'custo_usd': round(custo, 6),
+                'custo_por_empresa_usd': round(custo / dados['empresas'], 8) if dados['empresas'] else None,
+                'concordancia_com_seguinte': round(dados['concordantes'] / dados['comparadas'], 4) if dados['comparadas'] else None,
+            })
+        return linhas
+
+    def como_dataframe(self):
+        return pd.DataFrame(self.resumo())
+
+    def custo_total(self):
+        return sum(linha['custo_usd'] for linha in self.resumo())
+
+
+def identificador_camadas(camadas):
+    """Modelos e limites de confiança das camadas, em ordem: separa os veredictos e as execuções de cada configuração."""
+    return 'camadas:' + '>'.join(f"{camada.modelo}@{camada.confianca_minima:g}" for camada in camadas)
+
+
+class Roteador:
+    """Classifica lotes passando pelas `camadas` em ordem; substitui `classificar_lote_com_divisao` em `qualificar_leads`.
+
+    A última camada decide o que chegar até ela; se a resposta dela também falhar, vale o veredicto de
+    baixa confiança de uma camada anterior, quando houver. `coletor` (um `ColetorSites`) atende as camadas
+    com `coletar_texto`.
+    """
+
+    def __init__(self, camadas, coletor=None):
+        if not camadas:
+            raise ValueError("O roteamento precisa de pelo menos uma camada")
+        self.camadas = list(camadas)
+        self.coletor = coletor
+        self.estatisticas = EstatisticasCamadas(self.camadas)
+
+    @property
+    def identificador(self):
+        """Configuração das camadas, usada como 'modelo' no cache de veredictos."""
+        return identificador_camadas(self.camadas)
+
+    def classificar(self, itens, icp_resumido, limitador=None, estatisticas=None, metricas=None):
+        """Mesma assinatura de `classificar_lote_com_divisao`; cada análise ganha a chave 'camada'."""
+        resultados = {}
+        provisorios = {}  # chave -> (camada, veredicto válido de baixa confiança)
+        pendentes = list(itens)
+        for posicao, camada in enumerate(self.camadas):
+            if not pendentes:
+                break
+            ultima = posicao == len(self.camadas) - 1
+            if camada.coletar_texto and self.coletor is not None and any(not texto for _, _, texto in pendentes):
+                with self.estatisticas.metricas[camada.nome].cronometrar('coleta.lote'):
+                    textos = self.coletor.textos(site for _, site, texto in pendentes if not texto)
+                pendentes = [(chave, site, texto or textos.get(site)) for chave, site, texto in pendentes]
+
+            inicio = time.perf_counter()
+            analises = classificar_lote_com_divisao(
+                pendentes, icp_resumido, limitador, estatisticas, MetricasCombinadas(metricas, self.estatisticas.metricas[camada.nome]),
+                modelo=camada.modelo, backend=camada.backend, escala_timeout=camada.escala_timeout, pedir_confianca=True,
+                orcamento=camada.orcamento,
+            )
+            segundos = time.perf_counter() - inicio
+
+            escalados, aceitas, malformadas = [], 0, 0
+            for item in pendentes:
+                chave = item[0]
+                analise = analises.get(chave, {"error": "Sem resposta"})
+                valida = veredicto_valido(analise)
+                malformadas += int(not valida)
+                if chave in provisorios and valida:
+                    anterior_camada, anterior = provisorios[chave]
+                    self.estatisticas.comparar(anterior_camada, anterior['is_segmento_correto'] == analise['is_segmento_correto'])
+                confiante = valida and analise.get('confianca') is not None and analise['confianca'] >= camada.confianca_minima
+                if confiante or (ultima and (valida or chave not in provisorios)):
+                    resultados[chave] = {**analise, 'camada': camada.nome}
+                    aceitas += 1
+                elif ultima:
+                    resultados[chave] = {**provisorios[chave][1], 'camada': provisorios[chave][0]}
+                else:
+                    if valida:
+                        provisorios[chave] = (camada.nome, analise)
+                    escalados.append(item)
+            self.estatisticas.registrar(camada.nome, len(pendentes), aceitas, len(escalados), malformadas, segundos)
+            contar(metricas, f'roteamento.{camada.nome}.escaladas', len(escalados))
+            pendentes = escalados
+        return resultados
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Os módulos do app ficam na raiz do repositório
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('AGENTE_LDR_SEM_AQUECIMENTO', '1')
@@ -0,0 +1,117 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import coleta_sites
+from coleta_sites import ColetorSites
+
+ROBOTS = "User-agent: *\nDisallow: /privado\n"
+PAGINA = "<html><head><title>Acme</title></head><body><p>Software de logística</p></body></html>"
+
+
+class _Servidor(BaseHTTPRequestHandler):
+    def do_GET(self):
+        rotas = {
+            '/robots.txt': (200, 'text/plain', ROBOTS),
+            '/ok': (200, 'text/html; charset=utf-8', PAGINA),
+            '/privado': (200, 'text/html; charset=utf-8', PAGINA),
+        }
+        if self.path == '/para-privado':
+            self._redirecionar('/privado')
+        elif self.path == '/para-ok':
+            self._redirecionar('/ok')
+        elif self.path == '/para-localhost':
+            self._redirecionar(f'http://localhost:{self.server.server_port}/ok')
+        elif self.path == '/laco':
+            self._redirecionar('/laco')
+        elif self.path in rotas:
+            status, tipo, corpo = rotas[self.path]
+            dados = corpo.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', tipo)
+            self.send_header('Content-Length', str(len(dados)))
+            self.end_headers()
+            self.wfile.write(dados)
+        else:
+            self.send_error(404)
+
+    def _redirecionar(self, destino):
+        self.send_response(301)
+        self.send_header('Location', destino)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def servidor():
+    http = ThreadingHTTPServer(('127.0.0.1', 0), _Servidor)
+    threading.Thread(target=http.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{http.server_port}"
+    http.shutdown()
+
+
+@pytest.fixture
+def coletor():
+    # O servidor de teste é local: a recusa de hosts privados é testada à parte
+    coletor = ColetorSites(timeout=(1, 2), permitir_enderecos_privados=True)
+    yield coletor
+    coletor.fechar()
+
+
+def test_pagina_permitida_tem_texto(servidor, coletor):
+    resultado = coletor.coletar_um(servidor + '/ok')
+    assert resultado['origem'] == 'rede'
+    assert resultado['texto'] == 'Acme Software de logística'
+
+
+def test_redirecionamento_segue_e_guarda_url_final(servidor, coletor):
+    resultado = coletor.coletar_um(servidor + '/para-ok')
+    assert resultado['origem'] == 'rede' and resultado['url_final'] == servidor + '/ok'
+
+
+def test_redirecionamento_para_caminho_proibido_respeita_robots(servidor, coletor):
+    assert coletor.coletar_um(servidor + '/para-privado')['origem'] == 'robots'
+    assert coletor.contagens['robots'] == 1
+
+
+def test_recuo_para_http_confere_robots(servidor, coletor):
+    # Sem TLS no servidor, o https:// falha e a coleta recua para http://, que também passa pelo robots.txt
+    https = 'https://' + servidor[len('http://'):]
+    assert coletor.coletar_um(https + '/privado')['origem'] == 'robots'
+    assert coletor.coletar_um(https + '/ok')['origem'] == 'rede'
+
+
+def test_laco_de_redirecionamentos_falha(servidor, coletor):
+    resultado = coletor.coletar_um(servidor + '/laco')
+    assert resultado['origem'] == 'falha' and 'TooManyRedirects' in resultado['erro']
+
+
+def test_host_privado_e_recusado(servidor):
+    coletor = ColetorSites(timeout=(1, 2))
+    try:
+        resultado = coletor.coletar_um(servidor + '/ok')
+    finally:
+        coletor.fechar()
+    assert resultado['origem'] == 'falha' and 'EnderecoNaoPermitido' in resultado['erro']
+
+
+def test_redirecionamento_para_host_privado_e_recusado(servidor, monkeypatch):
+    monkeypatch.setattr(coleta_sites, 'host_publico', lambda host: host == '127.0.0.1')
+    coletor = ColetorSites(timeout=(1, 2))
+    try:
+        resultado = coletor.coletar_um(servidor + '/para-localhost')
+    finally:
+        coletor.fechar()
+    assert resultado['origem'] == 'falha' and 'localhost' in resultado['erro']
+
+
+@pytest.mark.parametrize('host, publico', [
+    ('127.0.0.1', False), ('10.1.2.3', False), ('192.168.0.10', False), ('169.254.169.254', False),
+    ('::1', False), ('::ffff:127.0.0.1', False), ('8.8.8.8', True),
+])
+def test_host_publico(host, publico):
+    assert coleta_sites.host_publico(host) is publico
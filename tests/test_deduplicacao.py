@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+
+from deduplicacao import IndiceLeads, limpar_com_indice
+
+
+def envio(cargo, cidade):
+    return pd.DataFrame({'First Name': ['Ana'], 'Last Name': ['Souza'], 'Title': [cargo], 'Company': ['Acme'],
+                         'Email': ['ana@acme.com'], 'City': [cidade], 'Country': ['Brazil']})
+
+
+def enviar(indice, df, regra, apenas_novos=False):
+    limpo, resumo = limpar_com_indice(df, indice, regra=regra, apenas_novos=apenas_novos)
+    status = next(s for s in ('novo', 'alterado', 'repetido') if resumo[s])
+    return limpo[['Cargo', 'Cidade_Contato']].values.tolist(), status
+
+
+@pytest.mark.parametrize('regra, sobrevivente', [
+    ('mais_antigo', ['CEO', 'São Paulo']),
+    ('mais_completo', ['CEO', 'São Paulo']),
+    ('mais_recente', ['CFO', '']),
+])
+def test_regra_vale_entre_envios(tmp_path, regra, sobrevivente):
+    indice = IndiceLeads(str(tmp_path))
+    completo, incompleto = envio('CEO', 'São Paulo'), envio('CFO', '')
+
+    assert enviar(indice, completo, regra) == ([['CEO', 'São Paulo']], 'novo')
+    assert enviar(indice, incompleto, regra) == ([sobrevivente], 'alterado')
+    assert enviar(indice, incompleto, regra) == ([sobrevivente], 'repetido')
+
+    guardado = indice.ler_contatos()
+    assert guardado[['Cargo', 'Cidade_Contato']].values.tolist() == [sobrevivente]
+    assert guardado['envios'].tolist() == [3]
+
+
+@pytest.mark.parametrize('regra', ['mais_antigo', 'mais_completo', 'mais_recente'])
+def test_apenas_novos_nao_repete_contato_ja_enviado(tmp_path, regra):
+    indice = IndiceLeads(str(tmp_path))
+    enviar(indice, envio('CEO', 'São Paulo'), regra)
+    enviar(indice, envio('CFO', ''), regra)
+    limpo, resumo = limpar_com_indice(envio('CFO', ''), indice, regra=regra, apenas_novos=True)
+    assert resumo['repetido'] == 1 and limpo.empty
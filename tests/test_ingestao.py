@@ -0,0 +1,27 @@
+import pandas as pd
+import pytest
+
+from dados_sinteticos import gerar_leads_apollo
+from ingestao import ler_csv, limpar_csv_em_blocos
+from limpeza import limpar_dataframe
+
+
+@pytest.fixture
+def csv_leads(tmp_path):
+    bruto = gerar_leads_apollo(300, semente=3)
+    # Coluna numérica com vazios: sem `dtype=str`, a leitura em memória a inferiria como float ('120.0')
+    bruto['# Employees'] = [None if i % 7 == 0 else str(120 + i % 5) for i in range(len(bruto))]
+    caminho = tmp_path / 'leads.csv'
+    bruto.to_csv(caminho, index=False)
+    return caminho
+
+
+@pytest.mark.parametrize('extensao', ['parquet', 'csv'])
+def test_limpeza_em_blocos_igual_a_em_memoria(tmp_path, csv_leads, extensao):
+    em_memoria = limpar_dataframe(ler_csv(csv_leads))
+    destino = str(tmp_path / f'limpo.{extensao}')
+    limpar_csv_em_blocos(csv_leads, destino, linhas_por_bloco=70)
+    em_blocos = pd.read_parquet(destino) if extensao == 'parquet' else pd.read_csv(destino, sep=';', dtype=str, keep_default_na=False)
+    assert list(em_blocos.columns) == list(em_memoria.columns)
+    assert em_blocos.astype(str).values.tolist() == em_memoria.astype(str).values.tolist()
+    assert '120.0' not in set(em_memoria['Numero_Funcionarios'])
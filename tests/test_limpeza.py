@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from limpeza import (
+    _nome_empresa_vetorizado, _site_vetorizado, _telefone_vetorizado, padronizar_coluna, padronizar_nome_contato,
+    padronizar_nome_contato_vetorizado, padronizar_nome_empresa, padronizar_site, padronizar_telefone,
+)
+
+VALORES_TEXTO = ['', '  ', None, np.nan, 'nan', 'Acme S/A', 'acme ltda', 'Café do Brasil EIRELI', 'https://www.acme.com/',
+                 'acme.com.br', 'HTTP://Example.org', '+55 (11) 98765-4321', '0800 123 4567', '(21) 3456-7890',
+                 '+1 415 555 0100', '11987654321', 'Ａｃｍｅ', 'loja\tsa']
+
+
+@pytest.mark.parametrize('vetorizada, por_linha', [
+    (_site_vetorizado, padronizar_site),
+    (_telefone_vetorizado, padronizar_telefone),
+    (_nome_empresa_vetorizado, padronizar_nome_empresa),
+])
+def test_coluna_vetorizada_igual_a_funcao_por_linha(vetorizada, por_linha):
+    serie = pd.Series(VALORES_TEXTO, dtype=object)
+    esperado = serie.astype(str).apply(por_linha)
+    assert padronizar_coluna(serie, vetorizada).tolist() == esperado.tolist()
+
+
+@pytest.mark.parametrize('nomes, sobrenomes', [
+    (['ana', 'Bruno Carlos', None, np.nan, 'eva'], ['souza', 'da Silva', 'Lima', 'Costa', 'de']),
+    (['Ana', 'Bia', 'Caio', 'Davi'], [None, np.nan, 'dos Santos', '']),
+    (['Ana', 'Ana'], [None, None]),
+])
+def test_nome_completo_vetorizado_igual_ao_por_linha(nomes, sobrenomes):
+    df = pd.DataFrame({'Nome_Lead': nomes, 'Sobrenome_Lead': sobrenomes}, dtype=object)
+    esperado = df.apply(lambda row: padronizar_nome_contato(row, df.columns), axis=1)
+    assert padronizar_nome_contato_vetorizado(df).tolist() == esperado.tolist()
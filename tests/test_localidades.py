@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+
+from limpeza import limpar_dataframe
+from localidades import carregar_indice, carregar_localidades, versao_indice
+
+
+@pytest.fixture(scope='module')
+def mapas():
+    mapa_cidades, mapa_estados, _ = carregar_localidades()
+    return mapa_cidades, mapa_estados
+
+
+def limpar_cidades(mapas, cidades, pais):
+    bruto = pd.DataFrame({'City': cidades, 'Country': [pais] * len(cidades),
+                          'Company City': cidades, 'Company Country': [pais] * len(cidades)})
+    limpo = limpar_dataframe(bruto, *mapas)
+    return limpo['Cidade_Contato'].tolist(), limpo['Cidade_Empresa'].tolist()
+
+
+@pytest.mark.parametrize('cidade, pais', [
+    ('Atlanta', 'United States'),
+    ('San Jose', 'Costa Rica'),
+    ('Valencia', 'Spain'),
+    ('Rosario', 'Argentina'),
+])
+def test_cidade_estrangeira_nao_vira_municipio_brasileiro(mapas, cidade, pais):
+    assert limpar_cidades(mapas, [cidade], pais) == ([cidade], [cidade])
+
+
+@pytest.mark.parametrize('cidade', ['Atlanta', 'San Jose', 'Valencia'])
+def test_nome_curto_sem_pais_exige_correspondencia_mais_proxima(mapas, cidade):
+    assert limpar_cidades(mapas, [cidade], '') == ([cidade], [cidade])
+
+
+@pytest.mark.parametrize('pais', ['', 'Brazil', 'Brasil', 'BR'])
+def test_cidade_brasileira_continua_corrigida(mapas, pais):
+    contato, empresa = limpar_cidades(mapas, ['sao paulo - sp', 'Florianopolis', 'Ribeirao Preto'], pais)
+    assert contato == empresa == ['São Paulo', 'Florianópolis', 'Ribeirão Preto']
+
+
+def test_paises_diferentes_no_mesmo_arquivo(mapas):
+    bruto = pd.DataFrame({'City': ['Valencia', 'Valença', 'Atlanta'], 'Country': ['Spain', 'Brazil', 'United States']})
+    limpo = limpar_dataframe(bruto, *mapas)
+    assert limpo['Cidade_Contato'].tolist() == ['Valencia', 'Valença', 'Atlanta']
+
+
+def test_versao_do_indice_embarcado_vem_do_conteudo():
+    indice = carregar_indice()
+    assert indice['versao'] == versao_indice(indice['ufs'], indice['municipios'])
@@ -0,0 +1,35 @@
+from ia_simulada import BackendSimulado
+from metricas import Metricas
+from prompts import OrcamentoPrompt
+from qualificacao import classificar_lote_com_divisao
+
+ITENS = [(f'e{i}', f'www.empresa{i}.com.br', None) for i in range(4)]
+
+
+def classificar(max_tokens_resposta_por_empresa):
+    backend, metricas = BackendSimulado(latencia=0), Metricas()
+    orcamento = OrcamentoPrompt(max_tokens_resposta_por_empresa=max_tokens_resposta_por_empresa)
+    resultados = classificar_lote_com_divisao(ITENS, "ICP de teste", metricas=metricas, backend=backend,
+                                              pedir_confianca=True, orcamento=orcamento)
+    return resultados, backend.configuracao.chamadas, metricas.contadores()
+
+
+def test_resposta_cortada_no_teto_e_pedida_de_novo_antes_de_dividir_o_lote():
+    resultados, chamadas, contadores = classificar(15)
+    assert chamadas == 2
+    assert contadores['ia.respostas_cortadas'] == 1
+    assert 'ia.lotes_divididos' not in contadores
+    assert all(isinstance(r['is_segmento_correto'], bool) for r in resultados.values())
+
+
+def test_resposta_dentro_do_teto_nao_repete():
+    resultados, chamadas, contadores = classificar(120)
+    assert chamadas == 1 and 'ia.respostas_cortadas' not in contadores
+    assert set(resultados) == {chave for chave, _, _ in ITENS}
+
+
+def test_resposta_cortada_mesmo_com_o_teto_maior_divide_o_lote():
+    resultados, chamadas, contadores = classificar(1)
+    assert contadores['ia.lotes_divididos'] >= 1
+    assert set(resultados) == {chave for chave, _, _ in ITENS}
+    assert chamadas == 2 * contadores['ia.respostas_cortadas']
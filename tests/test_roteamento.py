@@ -0,0 +1,91 @@
+import pandas as pd
+import pytest
+
+from cache_icp import CacheICP
+from execucoes import gerar_id_execucao
+from ia_simulada import BackendSimulado, modelo_simulado
+from qualificacao import MODELO_PADRAO, qualificar_leads
+from roteamento import Camada, Roteador, camadas_padrao, identificador_camadas, veredicto_valido
+
+ITENS = [(f'e{i}', f'www.empresa{i}.com.br', None) for i in range(6)]
+
+
+def camadas(rapido, forte, confianca_minima=0.75):
+    return [Camada('rapida', 'rapido', confianca_minima, backend=rapido), Camada('forte', 'forte', confianca_minima, backend=forte)]
+
+
+def classificar(rapido, forte):
+    roteador = Roteador(camadas(rapido, forte))
+    return roteador.classificar(ITENS, "ICP de teste"), roteador.estatisticas.resumo()
+
+
+def test_confianca_acima_do_limite_fica_na_primeira_camada():
+    rapido, forte = BackendSimulado(latencia=0, confianca_facil=0.9), BackendSimulado(latencia=0)
+    resultados, _ = classificar(rapido, forte)
+    assert {r['camada'] for r in resultados.values()} == {'rapida'}
+    assert all(veredicto_valido(r) for r in resultados.values())
+    assert forte.configuracao.chamadas == 0
+
+
+def test_confianca_abaixo_do_limite_sobe_de_camada():
+    rapido, forte = BackendSimulado(latencia=0, confianca_facil=0.5), BackendSimulado(latencia=0, confianca_facil=0.9)
+    resultados, resumo = classificar(rapido, forte)
+    assert {r['camada'] for r in resultados.values()} == {'forte'}
+    assert resumo[0]['escaladas'] == len(ITENS) and resumo[1]['aceitas'] == len(ITENS)
+    # Modelos que acertam tudo concordam entre si
+    assert resumo[0]['concordancia_com_seguinte'] == 1.0
+
+
+def test_resposta_malformada_sobe_de_camada():
+    rapido, forte = BackendSimulado(latencia=0, taxa_malformada=1.0), BackendSimulado(latencia=0, confianca_facil=0.9)
+    resultados, resumo = classificar(rapido, forte)
+    assert {r['camada'] for r in resultados.values()} == {'forte'}
+    assert resumo[0]['malformadas'] == len(ITENS)
+
+
+def test_ultima_camada_falhando_mantem_veredicto_provisorio():
+    rapido = BackendSimulado(latencia=0, confianca_facil=0.5)
+    forte = BackendSimulado(latencia=0, taxa_malformada=1.0)
+    resultados, _ = classificar(rapido, forte)
+    assert {r['camada'] for r in resultados.values()} == {'rapida'}
+    assert all(veredicto_valido(r) and r['confianca'] == 0.5 for r in resultados.values())
+
+
+def test_ultima_camada_decide_mesmo_com_baixa_confianca():
+    rapido, forte = BackendSimulado(latencia=0, taxa_malformada=1.0), BackendSimulado(latencia=0, confianca_facil=0.5)
+    resultados, _ = classificar(rapido, forte)
+    assert {r['camada'] for r in resultados.values()} == {'forte'}
+    assert all(veredicto_valido(r) for r in resultados.values())
+
+
+def test_identificador_separa_configuracoes():
+    padrao = identificador_camadas(camadas_padrao())
+    assert padrao != MODELO_PADRAO
+    assert padrao != identificador_camadas(camadas_padrao(confianca_minima=0.9))
+    assert padrao != identificador_camadas(camadas_padrao(modelo_forte='outro-modelo'))
+    assert Roteador(camadas_padrao()).identificador == padrao
+
+
+def test_id_da_execucao_separa_camadas():
+    leads = pd.DataFrame({'Nome_Empresa': ['Acme'], 'Site_Original': ['www.acme.com.br']})
+    icp = {'segmentos': 'Tecnologia', 'funcionarios': '', 'observacoes': '', 'paises': '', 'estados': ''}
+    ids = {gerar_id_execucao(leads, icp), gerar_id_execucao(leads, icp, camadas_padrao()),
+           gerar_id_execucao(leads, icp, camadas_padrao(confianca_minima=0.9))}
+    assert len(ids) == 3
+    assert gerar_id_execucao(leads, icp, camadas_padrao()) == gerar_id_execucao(leads, icp, camadas_padrao())
+
+
+def test_cache_de_veredictos_separa_modelo_unico_e_camadas(tmp_path):
+    cache = CacheICP(str(tmp_path / 'cache.sqlite3'))
+    sites = {i: site for i, (_, site, _) in enumerate(ITENS)}
+    try:
+        with modelo_simulado(latencia=0):
+            qualificar_leads(sites, "ICP de teste", requisicoes_por_minuto=60_000, cache=cache)
+        rapido, forte = BackendSimulado(latencia=0, confianca_facil=0.9), BackendSimulado(latencia=0)
+        resultados = qualificar_leads(sites, "ICP de teste", requisicoes_por_minuto=60_000, cache=cache,
+                                      roteador=Roteador(camadas(rapido, forte)))
+        # Os veredictos do modelo único não valem para as camadas: todas as empresas vão ao modelo rápido
+        assert rapido.configuracao.itens == len(ITENS)
+        assert {r['camada'] for r in resultados.values()} == {'rapida'}
+    finally:
+        cache.fechar()
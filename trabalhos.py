@@ -0,0 +1,269 @@
+# Análises de ICP em segundo plano: um registro por servidor guarda os trabalhos, que rodam em threads
+# próprias e sobrevivem aos reruns do Streamlit; a página só consulta o estado e o desenha.
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from cache_icp import CacheICP
+from coleta_sites import CacheHTTP, ColetorSites
+from execucoes import CheckpointExecucao, montar_resultado_parcial
+from filtros_icp import compilar_filtro_icp, compilar_preclassificador
+from metricas import Metricas, perfilar
+from qualificacao import (
+    EstatisticasLotes, LimitadorJusto, concluir_qualificacao, montar_criterios_icp, preparar_qualificacao,
+    qualificar_leads, resumir_icp_com_ia,
+)
+from roteamento import Roteador
+
+ESTADOS_ATIVOS = ('na_fila', 'executando')
+RETENCAO_PADRAO_SEGUNDOS = 6 * 3600
+JANELA_VAZAO = 50  # conclusões usadas no cálculo de vazão e ETA
+# Cota da API de IA do servidor, dividida por todas as análises; configurada só pelo ambiente (0 = sem limite de tokens)
+REQUISICOES_POR_MINUTO = int(os.environ.get('AGENTE_LDR_REQUISICOES_POR_MINUTO', '60'))
+TOKENS_POR_MINUTO = int(os.environ.get('AGENTE_LDR_TOKENS_POR_MINUTO', '0')) or None
+
+
+class ExecucaoCancelada(Exception):
+    pass
+
+
+class Trabalho:
+    """Uma análise de ICP sobre a própria cópia de `leads_df`; o id é o da execução (ver `gerar_id_execucao`).
+
+    `leads_df` não muda durante a execução: a thread do trabalho classifica outra cópia e só a publica
+    em `resultado` ao concluir, então a página pode ler o trabalho de outra thread a qualquer momento.
+    """
+
+    def __init__(self, id_trabalho, leads_df, icp, limitador, max_concorrencia=8, tamanho_lote=10, usar_cache=True,
+                 coletar_sites=True, preclassificar=True, perfil=False, camadas=None):
+        self.id = id_trabalho
+        self.leads_df = leads_df.copy()
+        self.icp = icp
+        self.filtro_icp = compilar_filtro_icp(icp['funcionarios'], icp['observacoes'], icp['paises'], icp['estados'])
+        self.preclassificador = compilar_preclassificador(icp['segmentos'], icp['observacoes']) if preclassificar else None
+        self.limitador = limitador.participante(id_trabalho)
+        self.max_concorrencia = max_concorrencia
+        self.tamanho_lote = tamanho_lote
+        self.usar_cache = usar_cache
+        self.coletar_sites = coletar_sites
+        self.perfilar = perfil
+        self.camadas = camadas  # lista de `roteamento.Camada`; None = só o modelo padrão
+        self.opcoes = {}  # opções com que o trabalho foi submetido (ver `RegistroTrabalhos.submeter`)
+
+        self.estado = 'na_fila'
+        self.etapa = ''
+        self.erro = None
+        self.criado_em = time.time()
+        self.iniciado_em = None
+        self.finalizado_em = None
+        self.icp_resumido = None
+        self.plano = None
+        self.resultado = None  # leads classificados, publicado só com o trabalho concluído
+        self.sessoes = set()  # sessões acompanhando o trabalho (ver `RegistroTrabalhos.cancelar`)
+        self._planejados = None  # leads depois do filtro e da regra local, base do resultado parcial
+        self.total = 0
+        self.concluidas = 0
+        self.acertos_cache = 0
+        self.falhas_cache = 0
+        self.coleta = None  # contagens do `ColetorSites` (rede, cache, revalidado, falha, robots)
+        self.estatisticas = EstatisticasLotes()
+        self.metricas = Metricas()
+        self.perfil = None  # `metricas.Perfil` da thread do trabalho, quando pedido
+        self.roteamento = None  # `roteamento.EstatisticasCamadas`, com a classificação em camadas
+        self._checkpoint = None
+        self._conclusoes = deque(maxlen=JANELA_VAZAO)
+        self._cancelar = threading.Event()
+
+    @property
+    def ativo(self):
+        return self.estado in ESTADOS_ATIVOS
+
+    def cancelar(self):
+        """Pede o cancelamento; lotes já enviados à IA terminam e ficam no checkpoint."""
+        self._cancelar.set()
+        if self.estado == 'na_fila':
+            self.estado, self.finalizado_em = 'cancelado', time.time()
+
+    def _verificar_cancelamento(self):
+        if self._cancelar.is_set():
+            raise ExecucaoCancelada()
+
+    def _ao_concluir(self, empresa, analise, concluidas):
+        self.concluidas = concluidas
+        self._conclusoes.append(time.monotonic())
+        self._verificar_cancelamento()
+
+    def executar(self):
+        if self._cancelar.is_set():
+            return
+        # O cProfile cobre a thread do trabalho (resumo, filtro, pré-classificação e espera pelos lotes);
+        # as chamadas à IA em si aparecem nas métricas por etapa
+        with perfilar(self.perfilar) as perfil:
+            self.perfil = perfil
+            self._executar()
+
+    def _executar(self):
+        self.estado, self.iniciado_em = 'executando', time.time()
+        cache = CacheICP() if self.usar_cache else None
+        coletor = ColetorSites(CacheHTTP() if self.usar_cache else None) if self.coletar_sites else None
+        self.coleta = coletor.contagens if coletor else None
+        roteador = None
+        if self.camadas:
+            # Sem a coleta antecipada, as camadas com `coletar_texto` baixam só os sites das empresas escaladas
+            coletor_camadas = coletor
+            if coletor_camadas is None and any(camada.coletar_texto for camada in self.camadas):
+                coletor_camadas = ColetorSites(CacheHTTP() if self.usar_cache else None)
+            roteador = Roteador(self.camadas, coletor_camadas)
+            self.roteamento = roteador.estatisticas
+        self._checkpoint = CheckpointExecucao(self.id)
+        try:
+            self.etapa = 'resumo_icp'
+            self.icp_resumido = self._checkpoint.icp_resumido
+            if not self.icp_resumido:
+                criterios_icp_texto = montar_criterios_icp(self.icp['segmentos'], self.icp['observacoes'])
+                with self.metricas.cronometrar('estacao2.resumo_icp'):
+                    self.icp_resumido = resumir_icp_com_ia(criterios_icp_texto, cache)
+                self._checkpoint.iniciar(self.icp_resumido)
+
+            self._verificar_cancelamento()
+            self.etapa = 'filtro'
+            classificados = self.leads_df.copy()
+            with self.metricas.cronometrar('estacao2.filtro'):
+                plano = preparar_qualificacao(classificados, self.filtro_icp, self.preclassificador)
+            # A cópia é publicada antes do plano: quem vê `plano` já encontra a base do resultado parcial
+            self._planejados = classificados.copy()
+            self.plano = plano
+            self.total = len(plano['sites_por_empresa'])
+            self._verificar_cancelamento()
+
+            self.etapa = 'ia'
+            resultados = qualificar_leads(
+                self.plano['sites_por_empresa'], self.icp_resumido, max_concorrencia=self.max_concorrencia,
+                ao_concluir=self._ao_concluir, cache=cache, tamanho_lote=self.tamanho_lote,
+                estatisticas=self.estatisticas, checkpoint=self._checkpoint, limitador=self.limitador,
+                coletor=coletor, metricas=self.metricas, roteador=roteador,
+            )
+            with self.metricas.cronometrar('estacao2.concluir'):
+                concluir_qualificacao(classificados, plano, resultados)
+            self.resultado = classificados
+            self.estado = 'concluido'
+        except ExecucaoCancelada:
+            self.estado = 'cancelado'
+        except Exception as e:
+            self.estado, self.erro = 'erro', f"{type(e).__name__}: {e}"
+        finally:
+            if cache:
+                self.acertos_cache, self.falhas_cache = cache.acertos, cache.falhas
+                cache.fechar()
+            if coletor:
+                coletor.fechar()
+            if roteador and roteador.coletor is not None and roteador.coletor is not coletor:
+                roteador.coletor.fechar()
+            self._checkpoint.fechar()
+            self.etapa = ''
+            self.finalizado_em = time.time()
+
+    def resultado_parcial(self):
+        """Cópia dos leads com os veredictos gravados até agora (do resultado final, se já concluído).
+
+        Parte da cópia feita logo após o filtro e reaproveita o `plano`: nada é refiltrado a cada consulta.
+        """
+        if self.resultado is not None:
+            return self.resultado.copy()
+        if self.plano is None:  # filtro ainda em andamento
+            return None
+        return montar_resultado_parcial(self._planejados, self.filtro_icp, self._checkpoint, plano=self.plano)
+
+    def snapshot(self):
+        """Estado atual em um dict simples, seguro para ler de outra thread."""
+        agora = time.time()
+        conclusoes = list(self._conclusoes)
+        empresas_por_minuto = None
+        if len(conclusoes) >= 2 and conclusoes[-1] > conclusoes[0]:
+            empresas_por_minuto = 60 * (len(conclusoes) - 1) / (conclusoes[-1] - conclusoes[0])
+        restantes = max(self.total - self.concluidas, 0)
+        return {
+            'id': self.id,
+            'estado': self.estado,
+            'etapa': self.etapa,
+            'erro': self.erro,
+            'linhas': len(self.leads_df),
+            'total': self.total,
+            'concluidas': self.concluidas,
+            'progresso': self.concluidas / self.total if self.total else (1.0 if self.estado == 'concluido' else 0.0),
+            'empresas_por_minuto': empresas_por_minuto,
+            'leads_por_minuto': self.metricas.vazao_por_minuto('ia.empresa'),
+            'eta_segundos': restantes * 60 / empresas_por_minuto if empresas_por_minuto and self.ativo else None,
+            'segundos_decorridos': (self.finalizado_em or agora) - self.iniciado_em if self.iniciado_em else 0.0,
+            'criado_em': self.criado_em,
+        }
+
+
+class RegistroTrabalhos:
+    """Registro de trabalhos do servidor: fila com no máximo `max_simultaneos` em execução e cota de IA compartilhada.
+
+    A cota (`LimitadorJusto`) é configuração do servidor, fixada na criação, e é distribuída em rodízio
+    entre os trabalhos em execução.
+    """
+
+    def __init__(self, requisicoes_por_minuto=REQUISICOES_POR_MINUTO, max_simultaneos=4, retencao_segundos=RETENCAO_PADRAO_SEGUNDOS,
+                 tokens_por_minuto=TOKENS_POR_MINUTO):
+        self.requisicoes_por_minuto = requisicoes_por_minuto
+        self.tokens_por_minuto = tokens_por_minuto
+        self.limitador = LimitadorJusto(requisicoes_por_minuto, tokens_por_minuto=tokens_por_minuto)
+        self.retencao_segundos = retencao_segundos
+        self._trabalhos = {}
+        self._trava = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_simultaneos, thread_name_prefix='analise-icp')
+
+    def submeter(self, id_trabalho, leads_df, icp, sessao=None, **opcoes):
+        """Enfileira a análise para `sessao`; se o mesmo trabalho ainda está ativo, devolve o existente em vez de duplicá-lo.
+
+        Outra sessão que envie o mesmo arquivo e ICP passa a acompanhar o mesmo trabalho (o checkpoint é um
+        só). O existente segue com as opções do primeiro envio: compare `trabalho.opcoes` com as pedidas para
+        avisar o usuário.
+        """
+        with self._trava:
+            self._descartar_antigos()
+            existente = self._trabalhos.get(id_trabalho)
+            if existente is not None and existente.ativo:
+                existente.sessoes.add(sessao)
+                return existente
+            trabalho = Trabalho(id_trabalho, leads_df, icp, self.limitador, **opcoes)
+            trabalho.opcoes = opcoes
+            trabalho.sessoes.add(sessao)
+            self._trabalhos[id_trabalho] = trabalho
+            self._executor.submit(trabalho.executar)
+            return trabalho
+
+    def cancelar(self, id_trabalho, sessao=None):
+        """Desliga `sessao` do trabalho; ele só é cancelado quando nenhuma outra sessão o acompanha.
+
+        Retorna True se o trabalho foi cancelado e False se segue em execução para outras sessões.
+        """
+        with self._trava:
+            trabalho = self._trabalhos.get(id_trabalho)
+            if trabalho is None:
+                return False
+            trabalho.sessoes.discard(sessao)
+            if trabalho.sessoes:
+                return False
+            trabalho.cancelar()  # sob a trava: nenhum envio se liga ao trabalho entre a checagem e o cancelamento
+            return True
+
+    def obter(self, id_trabalho):
+        return self._trabalhos.get(id_trabalho)
+
+    def listar(self, ids):
+        """Snapshots dos trabalhos de `ids` ainda no registro, dos mais recentes para os mais antigos."""
+        with self._trava:
+            trabalhos = [self._trabalhos[id_trabalho] for id_trabalho in set(ids) if id_trabalho in self._trabalhos]
+        return sorted((t.snapshot() for t in trabalhos), key=lambda s: s['criado_em'], reverse=True)
+
+    def _descartar_antigos(self):
+        limite = time.time() - self.retencao_segundos
+        for id_trabalho, trabalho in list(self._trabalhos.items()):
+            if not trabalho.ativo and (trabalho.finalizado_em or trabalho.criado_em) < limite:
+                del self._trabalhos[id_trabalho]